@@ -1,7 +1,9 @@
 from django.conf import settings
+from django.urls import path
 
 from rest_framework.routers import DefaultRouter, SimpleRouter
 
+from watersync.sensor.api.views import telemetry_view
 from watersync.users.api.views import UserViewSet
 
 router = DefaultRouter() if settings.DEBUG else SimpleRouter()
@@ -10,4 +12,7 @@ router.register("users", UserViewSet)
 
 
 app_name = "api"
-urlpatterns = router.urls
+urlpatterns = [
+    *router.urls,
+    path("telemetry/", telemetry_view, name="telemetry"),
+]
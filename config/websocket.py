@@ -1,4 +1,17 @@
+import re
+
+from watersync.sensor.live import stream_records
+
+# Live records of an ongoing deployment, see watersync.sensor.live
+RECORDS_PATH = re.compile(r"^/ws/deployments/(?P<pk>\d+)/records/$")
+
+
 async def websocket_application(scope, receive, send):
+    match = RECORDS_PATH.match(scope["path"])
+    if match:
+        await stream_records(scope, receive, send, int(match["pk"]))
+        return
+
     while True:
         event = await receive()
 
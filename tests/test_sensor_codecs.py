@@ -0,0 +1,81 @@
+"""
+Tests for the binary encodings of sensor record chunks.
+
+Encoding must be lossless and regular logger data must compress to a few
+bytes per reading.
+"""
+
+import numpy as np
+import pytest
+
+from watersync.sensor.codecs import (
+    CodecError,
+    decode_timestamps,
+    decode_values,
+    encode_timestamps,
+    encode_values,
+)
+
+
+@pytest.fixture
+def day():
+    """A day of 5-minute readings of a slowly varying water level."""
+    rng = np.random.default_rng(42)
+    timestamps = np.arange(288, dtype=np.int64) * 300_000 + 1_700_000_000_000
+    values = np.round(10 + np.cumsum(rng.normal(0, 0.01, 288)), 3)
+    return timestamps, values
+
+
+class TestTimestamps:
+    """Tests for delta-of-delta timestamp encoding."""
+
+    def test_round_trip(self, day):
+        timestamps, _ = day
+        assert np.array_equal(
+            decode_timestamps(encode_timestamps(timestamps)), timestamps
+        )
+
+    def test_irregular_round_trip(self, day):
+        timestamps, _ = day
+        timestamps = timestamps.copy()
+        timestamps[100:] += 1_234
+        assert np.array_equal(
+            decode_timestamps(encode_timestamps(timestamps)), timestamps
+        )
+
+    def test_datetime_input(self, day):
+        timestamps, _ = day
+        encoded = encode_timestamps(timestamps.astype("datetime64[ms]"))
+        assert np.array_equal(decode_timestamps(encoded), timestamps)
+
+    def test_regular_interval_is_tiny(self, day):
+        timestamps, _ = day
+        assert len(encode_timestamps(timestamps)) < 64
+
+    @pytest.mark.parametrize("size", [0, 1, 2])
+    def test_short_series(self, size):
+        timestamps = np.arange(size, dtype=np.int64) * 1000
+        assert np.array_equal(
+            decode_timestamps(encode_timestamps(timestamps)), timestamps
+        )
+
+
+class TestValues:
+    """Tests for XOR value encoding."""
+
+    def test_round_trip(self, day):
+        _, values = day
+        assert np.array_equal(decode_values(encode_values(values)), values)
+
+    def test_special_values(self):
+        values = np.array([0.0, -0.0, np.inf, -1e300, 5e-324, 1.0])
+        decoded = decode_values(encode_values(values))
+        assert np.array_equal(decoded.view(np.uint64), values.view(np.uint64))
+
+    def test_compression(self, day):
+        _, values = day
+        assert len(encode_values(values)) < 8 * len(values)
+
+    def test_corrupt_chunk(self):
+        with pytest.raises(CodecError):
+            decode_values(b"\x01\x05\x00\x00\x00garbage")
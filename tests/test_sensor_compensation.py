@@ -0,0 +1,67 @@
+"""
+Tests for the barometric compensation of pressure deployments.
+
+The as-of join and the hydrostatic conversion work on NumPy arrays and are
+tested with synthetic series.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from watersync.sensor.compensation import (
+    GRAVITY,
+    asof_indices,
+    compensate,
+    water_column,
+)
+
+
+def minutes(*values):
+    return np.array(values, dtype="datetime64[m]").astype("datetime64[ms]")
+
+
+class TestAsofIndices:
+    def test_nearest_within_tolerance(self):
+        reference = minutes(0, 60, 120)
+        timestamps = minutes(0, 20, 40, 119, 200)
+        index = asof_indices(timestamps, reference, timedelta(minutes=30))
+        assert index.tolist() == [0, 0, 1, 2, -1]
+
+    def test_before_first_reference(self):
+        index = asof_indices(minutes(0, 50), minutes(60), timedelta(minutes=15))
+        assert index.tolist() == [-1, 0]
+
+    def test_empty_reference(self):
+        index = asof_indices(minutes(0, 1), minutes(), timedelta(minutes=15))
+        assert index.tolist() == [-1, -1]
+
+
+class TestCompensate:
+    def test_water_column(self):
+        # 1 m of fresh water exerts density * g pascal
+        assert water_column(1000.0 * GRAVITY + 101_325.0, 101_325.0) == pytest.approx(
+            1.0
+        )
+
+    def test_compensate(self):
+        timestamps = minutes(0, 15, 30, 45, 300)
+        barometer_timestamps = minutes(0, 60)
+        pressure = np.array([111_132.0, 111_132.0, 112_132.0, 112_132.0, 112_132.0])
+        barometer = np.array([101_325.0, 102_325.0])
+
+        series = compensate(
+            timestamps,
+            pressure,
+            barometer_timestamps,
+            barometer,
+            tolerance=timedelta(minutes=30),
+            installation_elevation=50.0,
+        )
+
+        # The last reading has no barometer reading within 30 minutes
+        assert series.timestamps.tolist() == minutes(0, 15, 30, 45).tolist()
+        expected = np.array([9807.0, 9807.0, 10_807.0, 9807.0]) / (1000.0 * GRAVITY)
+        np.testing.assert_allclose(series.water_column, expected)
+        np.testing.assert_allclose(series.elevation, 50.0 + expected)
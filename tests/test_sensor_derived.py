@@ -0,0 +1,84 @@
+"""
+Tests for the transforms of derived series.
+
+The transforms work on NumPy arrays and are tested with synthetic series;
+the input deployments are only read for their units.
+"""
+
+from datetime import timedelta
+from types import SimpleNamespace
+
+import numpy as np
+
+from watersync.sensor.derived import (
+    TRANSFORM_CLASSES,
+    TRANSFORMS,
+    rolling_mean,
+)
+
+
+def minutes(*values):
+    return np.array(values, dtype="datetime64[m]").astype("datetime64[ms]")
+
+
+class TestRollingMean:
+    def test_trailing_window(self):
+        timestamps = minutes(0, 10, 20, 30)
+        values = np.array([1.0, 2.0, 3.0, 4.0])
+        result = rolling_mean(timestamps, values, timedelta(minutes=20))
+        # (t - 20 min, t] excludes the reading exactly one window back
+        np.testing.assert_allclose(result, [1.0, 1.5, 2.5, 3.5])
+
+    def test_irregular_sampling(self):
+        timestamps = minutes(0, 1, 2, 60)
+        values = np.array([1.0, 2.0, 3.0, 10.0])
+        result = rolling_mean(timestamps, values, timedelta(minutes=30))
+        np.testing.assert_allclose(result, [1.0, 1.5, 2.0, 10.0])
+
+    def test_empty(self):
+        assert len(rolling_mean(minutes(), np.array([]), timedelta(minutes=5))) == 0
+
+    def test_context_needs_window_of_history(self):
+        lookback, lookahead = TRANSFORM_CLASSES[TRANSFORMS.ROLLING_MEAN].context(
+            {"window": 600}
+        )
+        assert lookback == timedelta(minutes=10)
+        assert lookahead == timedelta(0)
+
+
+class TestUnitConversion:
+    def test_converts_values(self):
+        transform = TRANSFORM_CLASSES[TRANSFORMS.UNIT_CONVERSION]
+        timestamps = minutes(0, 1)
+        inputs = {"source": SimpleNamespace(unit="kPa")}
+        result_timestamps, values = transform.compute(
+            {"source": (timestamps, np.array([1.0, 2.5]))}, {"unit": "Pa"}, inputs
+        )
+        np.testing.assert_array_equal(result_timestamps, timestamps)
+        np.testing.assert_allclose(values, [1000.0, 2500.0])
+
+    def test_output_unit(self):
+        transform = TRANSFORM_CLASSES[TRANSFORMS.UNIT_CONVERSION]
+        assert (
+            transform.output_unit({"unit": "m"}, {"source": SimpleNamespace(unit="cm")})
+            == "m"
+        )
+
+
+class TestRegularisation:
+    def test_context_covers_clock_offset(self):
+        parameters = {
+            "interval": 900,
+            "reference_points": [["2024-03-01T10:00:00Z", "2024-03-01T09:58:00Z"]],
+        }
+        lookback, lookahead = TRANSFORM_CLASSES[TRANSFORMS.REGULARISATION].context(
+            parameters
+        )
+        assert lookback == lookahead == timedelta(minutes=9, seconds=30)
+
+    def test_resamples_source(self):
+        transform = TRANSFORM_CLASSES[TRANSFORMS.REGULARISATION]
+        series = {"source": (minutes(1, 14, 31), np.array([1.0, 2.0, 3.0]))}
+        timestamps, values = transform.compute(series, {"interval": 900}, {})
+        np.testing.assert_array_equal(timestamps, minutes(0, 15, 30))
+        np.testing.assert_allclose(values, [1.0, 2.0, 3.0])
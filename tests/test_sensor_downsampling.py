@@ -0,0 +1,80 @@
+"""
+Tests for the plot downsampling of sensor time series.
+
+Both methods must return sorted indices into the original series, keep the
+number of points bounded by the target width, and preserve the features of
+the series that matter visually.
+"""
+
+import numpy as np
+import pytest
+
+from watersync.sensor.downsampling import downsample, lttb, minmax
+
+
+@pytest.fixture
+def series():
+    """A year of 5-minute data with a single spike."""
+    n = 105_120
+    x = np.arange(n, dtype=np.int64) * 300_000
+    y = np.sin(np.arange(n) / 2000)
+    y[40_000] = 25.0
+    return x, y
+
+
+class TestLTTB:
+    """Tests for Largest-Triangle-Three-Buckets."""
+
+    def test_output_size(self, series):
+        x, y = series
+        assert len(lttb(x, y, 1000)) == 1000
+
+    def test_keeps_first_and_last_point(self, series):
+        x, y = series
+        indices = lttb(x, y, 500)
+        assert indices[0] == 0
+        assert indices[-1] == len(x) - 1
+
+    def test_indices_sorted_and_unique(self, series):
+        x, y = series
+        indices = lttb(x, y, 800)
+        assert np.all(np.diff(indices) > 0)
+
+    def test_keeps_spike(self, series):
+        x, y = series
+        assert 40_000 in lttb(x, y, 1000)
+
+    def test_short_series_returned_unchanged(self):
+        x = np.arange(10)
+        y = np.arange(10, dtype=float)
+        assert np.array_equal(lttb(x, y, 100), np.arange(10))
+
+
+class TestMinMax:
+    """Tests for min/max per bucket downsampling."""
+
+    def test_output_bounded(self, series):
+        x, y = series
+        assert len(minmax(x, y, 1000)) <= 1000
+
+    def test_keeps_global_extremes(self, series):
+        x, y = series
+        indices = minmax(x, y, 200)
+        assert np.argmax(y) in indices
+        assert np.argmin(y) in indices
+
+
+class TestDownsample:
+    """Tests for the downsample entry point."""
+
+    def test_datetime_axis(self, series):
+        x, y = series
+        timestamps = x.astype("datetime64[ms]")
+        ds_x, ds_y = downsample(timestamps, y, width=600)
+        assert ds_x.dtype == timestamps.dtype
+        assert len(ds_x) == len(ds_y) == 600
+
+    def test_unknown_method(self, series):
+        x, y = series
+        with pytest.raises(ValueError):
+            downsample(x, y, method="nope")
@@ -0,0 +1,75 @@
+"""
+Tests for the streaming writers of the sensor record export.
+
+The writers only see batches of column arrays, so they are tested with
+synthetic batches instead of database records.
+"""
+
+import gzip
+import io
+
+import numpy as np
+import pytest
+
+from watersync.sensor.export import write_arrow, write_csv, write_csv_gz, write_parquet
+
+
+def batches():
+    """Two monthly batches of a wide table with a gap in the second column."""
+    yield {
+        "timestamp": np.array(
+            ["2024-01-31T23:55", "2024-01-31T23:58"], dtype="datetime64[ms]"
+        ),
+        "a": np.array([1.0, 2.0]),
+        "b": np.array([np.nan, 3.5]),
+    }
+    yield {
+        "timestamp": np.array(["2024-02-01T00:00"], dtype="datetime64[ms]"),
+        "a": np.array([4.0]),
+        "b": np.array([5.25]),
+    }
+
+
+class TestCSV:
+    """Tests for the CSV writers."""
+
+    def test_header_and_rows(self):
+        lines = b"".join(write_csv(batches(), ["a", "b"], {})).decode().splitlines()
+        assert lines[0] == "timestamp,a,b"
+        assert lines[1] == "2024-01-31T23:55:00.000Z,1.000,"
+        assert len(lines) == 4
+
+    def test_constant_columns(self):
+        lines = (
+            b"".join(write_csv(batches(), ["a"], {"unit": "m"})).decode().splitlines()
+        )
+        assert lines[0] == "timestamp,a,unit"
+        assert lines[-1] == "2024-02-01T00:00:00.000Z,4.000,m"
+
+    def test_empty_export_has_header(self):
+        assert b"".join(write_csv(iter([]), ["value"], {})) == b"timestamp,value\n"
+
+    def test_gzip_matches_plain(self):
+        plain = b"".join(write_csv(batches(), ["a", "b"], {}))
+        compressed = b"".join(write_csv_gz(batches(), ["a", "b"], {}))
+        assert gzip.decompress(compressed) == plain
+
+
+class TestArrow:
+    """Tests for the Parquet and Arrow IPC writers."""
+
+    def test_parquet_row_groups(self):
+        pq = pytest.importorskip("pyarrow.parquet")
+        data = b"".join(write_parquet(batches(), ["a", "b"], {}))
+        parquet_file = pq.ParquetFile(io.BytesIO(data))
+        assert parquet_file.num_row_groups == 2
+        table = parquet_file.read()
+        assert table.column("b").null_count == 1
+        assert table.num_rows == 3
+
+    def test_arrow_stream(self):
+        pa = pytest.importorskip("pyarrow")
+        data = b"".join(write_arrow(batches(), ["a"], {"unit": "m"}))
+        table = pa.ipc.open_stream(io.BytesIO(data)).read_all()
+        assert table.schema.names == ["timestamp", "a", "unit"]
+        assert table.column("unit").to_pylist() == ["m", "m", "m"]
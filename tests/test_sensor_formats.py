@@ -0,0 +1,179 @@
+"""
+Tests for the streaming parsers of logger export formats.
+
+Every parser must yield raw `timestamp`/`value` chunks whose timestamps
+parse with the format it names, and resume after skipped rows.
+"""
+
+import io
+
+import pandas as pd
+import pytest
+
+from watersync.sensor.formats import get_format
+from watersync.sensor.ingest import SensorFileError, clean_chunk, variable_columns
+
+XLE = b"""<?xml version="1.0" encoding="UTF-8"?>
+<Body_xle>
+  <Ch1_data_header><Identification>LEVEL</Identification><Unit>m</Unit></Ch1_data_header>
+  <Ch2_data_header><Identification>TEMPERATURE</Identification><Unit>C</Unit></Ch2_data_header>
+  <Data>
+    <Log id="1"><Date>2024/03/13</Date><Time>10:00:00</Time><ms>0</ms><ch1>9.81</ch1><ch2>11.2</ch2></Log>
+    <Log id="2"><Date>2024/03/13</Date><Time>10:15:00</Time><ms>500</ms><ch1>9.79</ch1><ch2>11.3</ch2></Log>
+    <Log id="3"><Date>2024/03/13</Date><Time>10:30:00</Time><ms>0</ms><ch1>9.75</ch1><ch2>11.3</ch2></Log>
+  </Data>
+</Body_xle>
+"""
+
+MON = """Data file for DataLogger.
+==============================================================================
+[Logger settings]
+  Instrument type   =Micro-Diver
+[Channel 1]
+  Identification    =PRESSURE
+  Range             = 1000 cmH2O
+[Data]
+         3
+2024/03/13 10:00:00.0      1012.5      11.2
+2024/03/13 10:15:00.0      1012.7      11.3
+2024/03/13 10:30:00        1013.0      11.3
+END OF DATA FILE OF DATALOGGER FOR WINDOWS
+""".encode("latin-1")
+
+DIVER_CSV = """Serial number =..02-AB123 45
+Location      =Well 3
+Date/time;Pressure[cmH2O];Temperature[°C]
+2024/03/13 10:00:00;1012,5;11,2
+2024/03/13 10:15:00;1012,7;11,3
+END OF DATA FILE OF DATALOGGER FOR WINDOWS
+""".encode("latin-1")
+
+HOBO = b""""Plot Title: Well 3"
+"#","Date Time, GMT+01:00","Abs Pres, kPa (LGR S/N: 123)","Temp, \xc2\xb0C (LGR S/N: 123)"
+1,03/13/24 10:00:00 AM,101.25,11.2
+2,03/13/24 10:15:00 AM,101.27,11.3
+3,03/13/24 01:30:00 PM,101.30,11.3
+"""
+
+
+def parse(name, data, options=None, **kwargs):
+    logger_format = get_format(name, options)
+    file = io.BytesIO(data)
+    logger_format.check(file)
+    chunks = list(logger_format.iter_chunks(file, **kwargs))
+    raw = pd.concat(chunks, ignore_index=True)
+    clean, rejected = clean_chunk(raw, logger_format.timestamp_format)
+    return chunks, clean, rejected
+
+
+WIDE = b"""timestamp,location,sensor,pressure (kPa),temperature (degC)
+2024-03-13 10:00,Well 3,S1,101.25,11.2
+2024-03-13 10:15,Well 3,S1,101.27,
+"""
+
+
+class TestWatersyncCSV:
+    def test_variable_columns(self):
+        columns = [
+            "timestamp",
+            "location",
+            "sensor",
+            "pressure (kPa)",
+            "temperature(degC)",
+            "note",
+        ]
+        assert variable_columns(columns) == {
+            "pressure (kPa)": ("pressure", "kPa"),
+            "temperature(degC)": ("temperature", "degC"),
+        }
+
+    def test_multi_variable_chunks(self):
+        options = {"columns": {"7": "pressure (kPa)", "8": "temperature (degC)"}}
+        logger_format = get_format("csv", options)
+        file = io.BytesIO(WIDE)
+        logger_format.check(file)
+        chunks = list(logger_format.iter_chunks(file, chunk_size=1, skip_rows=1))
+        assert len(chunks) == 1
+        assert list(chunks[0].columns) == [
+            "timestamp",
+            "pressure (kPa)",
+            "temperature (degC)",
+        ]
+        assert chunks[0].iloc[0, 1] == "101.27"
+
+    def test_without_value_column(self):
+        with pytest.raises(SensorFileError, match="value"):
+            get_format("csv").check(io.BytesIO(b"timestamp,location,sensor,note\n"))
+
+
+class TestSolinstXLE:
+    def test_channels(self):
+        _, clean, rejected = parse("xle", XLE)
+        assert rejected == 0
+        assert clean["value"].tolist() == [9.81, 9.79, 9.75]
+        assert clean["timestamp"].iloc[1] == pd.Timestamp("2024-03-13T10:15:00.5Z")
+
+        _, clean, _ = parse("xle", XLE, {"channel": 2})
+        assert clean["value"].tolist() == [11.2, 11.3, 11.3]
+
+    def test_chunks_and_resume(self):
+        chunks, clean, _ = parse("xle", XLE, chunk_size=2, skip_rows=1)
+        assert [len(chunk) for chunk in chunks] == [2]
+        assert clean["value"].tolist() == [9.79, 9.75]
+
+    def test_not_xle(self):
+        with pytest.raises(SensorFileError):
+            get_format("xle").check(io.BytesIO(MON))
+
+
+class TestDiverExport:
+    def test_mon(self):
+        _, clean, rejected = parse("diver", MON)
+        assert rejected == 0
+        assert clean["value"].tolist() == [1012.5, 1012.7, 1013.0]
+        assert clean["timestamp"].iloc[2] == pd.Timestamp("2024-03-13T10:30:00Z")
+
+    def test_csv_with_decimal_commas(self):
+        _, clean, _ = parse("diver", DIVER_CSV, {"channel": 2})
+        assert clean["value"].tolist() == [11.2, 11.3]
+
+    def test_file_is_left_open(self):
+        file = io.BytesIO(MON)
+        list(get_format("diver").iter_chunks(file))
+        assert not file.closed
+
+
+class TestMappedCSV:
+    def test_hobo_profile(self):
+        _, clean, rejected = parse("hobo", HOBO)
+        assert rejected == 0
+        assert clean["value"].tolist() == [101.25, 101.27, 101.30]
+        assert clean["timestamp"].iloc[2] == pd.Timestamp("2024-03-13T13:30:00Z")
+
+    def test_date_and_time_columns(self):
+        data = b"Date;Time;Level\n13.03.2024;10:00;1,5\n13.03.2024;10:15;1,6\n"
+        options = {
+            "timestamp": ["Date", "Time"],
+            "value": "Level",
+            "timestamp_format": "%d.%m.%Y %H:%M",
+            "delimiter": ";",
+            "decimal": ",",
+        }
+        chunks, clean, _ = parse("mapped", data, options, chunk_size=1, skip_rows=1)
+        assert len(chunks) == 1
+        assert clean["value"].tolist() == [1.6]
+        assert clean["timestamp"].iloc[0] == pd.Timestamp("2024-03-13T10:15:00Z")
+
+    def test_missing_column(self):
+        with pytest.raises(SensorFileError, match="Level"):
+            get_format("mapped", {"timestamp": 0, "value": "Level"}).check(
+                io.BytesIO(b"a,b\n1,2\n")
+            )
+
+    def test_unmapped(self):
+        with pytest.raises(SensorFileError):
+            get_format("mapped", {"timestamp": 0})
+
+    def test_unknown_format(self):
+        with pytest.raises(SensorFileError):
+            get_format("dbf")
@@ -0,0 +1,90 @@
+"""
+Tests for the websocket that pushes new records of ongoing deployments.
+
+The database side is replaced by plain functions: the socket must only
+query when the cache version of the deployment changed, and continue after
+the last record it sent.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from watersync.sensor import live
+
+
+class FakeSocket:
+    """ASGI receive/send pair; disconnects after `rounds` receive timeouts."""
+
+    def __init__(self, rounds):
+        self.events = asyncio.Queue()
+        self.events.put_nowait({"type": "websocket.connect"})
+        self.rounds = rounds
+        self.sent = []
+
+    async def receive(self):
+        return await self.events.get()
+
+    async def send(self, message):
+        self.sent.append(message)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    state = {"version": 1, "queries": [], "allowed": True, "units": []}
+
+    def records_since(deployment_id, after, units=None):
+        state["queries"].append(after)
+        state["units"].append(units)
+        return {"x": [after + 10], "y": [1.0], "last": after + 10}
+
+    monkeypatch.setattr(live, "POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(
+        live, "_open_deployment", lambda scope, pk: "kPa" if state["allowed"] else None
+    )
+    monkeypatch.setattr(live, "get_version", lambda namespace, pk: state["version"])
+    monkeypatch.setattr(live, "records_since", records_since)
+    return state
+
+
+def run(socket, state, bump_at=None, query_string=b"after=100"):
+    async def main():
+        task = asyncio.ensure_future(
+            live.stream_records(
+                {"query_string": query_string}, socket.receive, socket.send, 1
+            )
+        )
+        for round_ in range(socket.rounds):
+            await asyncio.sleep(0.02)
+            if round_ == bump_at:
+                state["version"] += 1
+        socket.events.put_nowait({"type": "websocket.disconnect"})
+        await asyncio.wait_for(task, 1)
+
+    asyncio.run(main())
+
+
+class TestStreamRecords:
+    def test_queries_only_on_new_versions(self, server):
+        socket = FakeSocket(rounds=5)
+        run(socket, server, bump_at=2)
+
+        assert socket.sent[0] == {"type": "websocket.accept"}
+        updates = [json.loads(message["text"]) for message in socket.sent[1:]]
+        # Once on connect and once after the bump, continuing from the last
+        assert server["queries"] == [100, 110]
+        assert [update["last"] for update in updates] == [110, 120]
+        assert server["units"] == [("kPa", "kPa")] * 2
+
+    def test_refused(self, server):
+        server["allowed"] = False
+        socket = FakeSocket(rounds=1)
+        run(socket, server)
+        assert socket.sent == [{"type": "websocket.close", "code": 4403}]
+        assert server["queries"] == []
+
+    def test_invalid_unit(self, server):
+        socket = FakeSocket(rounds=1)
+        run(socket, server, query_string=b"after=100&unit=m**")
+        assert socket.sent == [{"type": "websocket.close", "code": 4400}]
@@ -0,0 +1,59 @@
+"""
+Tests for the NumPy side of aligned multi-deployment queries.
+
+Deployments with records in compressed chunks are bucketed in NumPy, which
+has to agree with the bucketing of `date_bin` in the database.
+"""
+
+import numpy as np
+import pytest
+
+from watersync.sensor.matrix import _align, bucket_series
+
+
+def minutes(*values):
+    return np.array(values, dtype="datetime64[m]").astype("datetime64[ms]")
+
+
+class TestBucketSeries:
+    @pytest.mark.parametrize(
+        ("agg", "expected"),
+        [
+            ("avg", [1.5, 4.0]),
+            ("min", [1.0, 3.0]),
+            ("max", [2.0, 5.0]),
+            ("sum", [3.0, 12.0]),
+            ("count", [2.0, 3.0]),
+        ],
+    )
+    def test_aggregates(self, agg, expected):
+        timestamps = minutes(0, 10, 30, 40, 50)
+        values = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+        buckets, result = bucket_series(timestamps, values, 1800, agg)
+        np.testing.assert_array_equal(buckets, minutes(0, 30))
+        np.testing.assert_allclose(result, expected)
+
+    def test_aligned_to_epoch(self):
+        buckets, _ = bucket_series(minutes(70, 95), np.array([1.0, 2.0]), 3600)
+        np.testing.assert_array_equal(buckets, minutes(60))
+
+    def test_empty_buckets_are_skipped(self):
+        buckets, _ = bucket_series(minutes(0, 200), np.array([1.0, 2.0]), 3600)
+        np.testing.assert_array_equal(buckets, minutes(0, 180))
+
+    def test_empty(self):
+        buckets, result = bucket_series(minutes(), np.array([]), 60)
+        assert len(buckets) == len(result) == 0
+
+
+class TestAlign:
+    def test_union_of_buckets(self):
+        timestamps, columns = _align(
+            [
+                (minutes(0, 60), [np.array([1.0, 2.0])]),
+                (minutes(60, 120), [np.array([3.0, 4.0])]),
+            ]
+        )
+        np.testing.assert_array_equal(timestamps, minutes(0, 60, 120))
+        np.testing.assert_array_equal(columns[0], [1.0, 2.0, np.nan])
+        np.testing.assert_array_equal(columns[1], [np.nan, 3.0, 4.0])
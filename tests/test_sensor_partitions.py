@@ -0,0 +1,52 @@
+"""
+Tests for the month arithmetic of the sensor record partitions.
+"""
+
+from datetime import UTC, date, datetime
+
+import pytest
+
+from watersync.sensor.partitions import (
+    Partition,
+    add_months,
+    month_windows,
+    partition_name,
+)
+
+
+class TestMonths:
+    """Tests for month stepping and partition naming."""
+
+    def test_add_months_across_year(self):
+        assert add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+
+    def test_add_months_backwards(self):
+        assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+
+    def test_partition_name(self):
+        assert partition_name(date(2024, 3, 1)) == "sensor_sensorrecord_p2024_03"
+
+    def test_partition_bounds(self):
+        partition = Partition("sensor_sensorrecord_p2024_12", date(2024, 12, 1))
+        assert partition.start == datetime(2024, 12, 1, tzinfo=UTC)
+        assert partition.end == datetime(2025, 1, 1, tzinfo=UTC)
+
+
+class TestMonthWindows:
+    """Tests for splitting time ranges at month boundaries."""
+
+    def test_split_at_month_boundaries(self):
+        start = datetime(2024, 1, 15, 6, tzinfo=UTC)
+        end = datetime(2024, 3, 2, tzinfo=UTC)
+        assert list(month_windows(start, end)) == [
+            (start, datetime(2024, 2, 1, tzinfo=UTC)),
+            (datetime(2024, 2, 1, tzinfo=UTC), datetime(2024, 3, 1, tzinfo=UTC)),
+            (datetime(2024, 3, 1, tzinfo=UTC), end),
+        ]
+
+    @pytest.mark.parametrize(
+        "end", [datetime(2024, 1, 20, tzinfo=UTC), datetime(2024, 2, 1, tzinfo=UTC)]
+    )
+    def test_single_month(self, end):
+        start = datetime(2024, 1, 15, tzinfo=UTC)
+        assert list(month_windows(start, end)) == [(start, end)]
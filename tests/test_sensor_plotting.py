@@ -0,0 +1,88 @@
+"""
+Tests for the typed-array encoding of plot data.
+
+plotly.js decodes the base64 arrays with the platform byte order, so the
+bytes must be little-endian and round trip to the original arrays.
+"""
+
+import base64
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from watersync.sensor.plotting import (
+    epoch_ms,
+    sensor_figure,
+    series_bytes,
+    typed_array,
+)
+
+
+def decode(array):
+    return np.frombuffer(base64.b64decode(array["bdata"]), dtype="<" + array["dtype"])
+
+
+@pytest.fixture
+def deployment():
+    return SimpleNamespace(
+        sensor=SimpleNamespace(identifier="S-1"),
+        unit="m",
+        get_variable_display=lambda: "Water level",
+    )
+
+
+class TestTypedArray:
+    def test_epoch_ms_is_exact(self):
+        timestamps = np.array(
+            ["2024-03-01T12:34:56.789", "2262-01-01"], dtype="datetime64[ms]"
+        )
+        ms = epoch_ms(timestamps)
+        assert ms.dtype == np.float64
+        np.testing.assert_array_equal(ms.astype(np.int64), timestamps.view(np.int64))
+
+    @pytest.mark.parametrize("dtype", ["f4", "f8"])
+    def test_round_trip(self, dtype):
+        values = np.array([1.5, -2.25, np.nan, 1e6])
+        encoded = typed_array(values, dtype)
+        assert encoded["dtype"] == dtype
+        np.testing.assert_array_equal(decode(encoded), values.astype(dtype))
+
+    def test_unknown_dtype(self):
+        with pytest.raises(KeyError):
+            typed_array([1.0], "i8")
+
+    def test_series_bytes(self):
+        timestamps = np.array(["2024-01-01", "2024-01-02"], dtype="datetime64[ms]")
+        data = series_bytes(timestamps, [1.0, 2.0], "f4")
+        assert len(data) == 2 * 8 + 2 * 4
+        np.testing.assert_array_equal(
+            np.frombuffer(data[:16], "<f8"), epoch_ms(timestamps)
+        )
+        np.testing.assert_array_equal(np.frombuffer(data[16:], "<f4"), [1.0, 2.0])
+
+
+class TestSensorFigure:
+    def test_trace(self, deployment):
+        timestamps = (
+            np.arange(10, dtype=np.int64)
+            .astype("datetime64[h]")
+            .astype("datetime64[ms]")
+        )
+        values = np.arange(10, dtype=np.float64)
+        figure = sensor_figure(timestamps, values, deployment, dtype="f4")
+
+        (trace,) = figure["data"]
+        assert trace["name"] == "Water level"
+        np.testing.assert_array_equal(decode(trace["x"]), epoch_ms(timestamps))
+        np.testing.assert_array_equal(decode(trace["y"]), values)
+        assert figure["layout"]["xaxis"]["type"] == "date"
+        assert figure["layout"]["yaxis"]["title"]["text"] == "Water level (m)"
+
+    def test_downsampled(self, deployment):
+        n = 100_000
+        timestamps = (np.arange(n, dtype=np.int64) * 60_000).astype("datetime64[ms]")
+        figure = sensor_figure(
+            timestamps, np.sin(np.arange(n) / 100), deployment, width=500
+        )
+        assert len(decode(figure["data"][0]["y"])) <= 500
@@ -0,0 +1,144 @@
+"""
+Tests for the quality control checks of sensor records.
+
+The checks are vectorised passes over NumPy arrays and are tested with
+synthetic series with known faults.
+"""
+
+import numpy as np
+import pytest
+
+from watersync.sensor.qc import (
+    Flag,
+    apply_ranges,
+    check_series,
+    flag_ranges,
+    flatline_mask,
+    gap_ranges,
+    spike_mask,
+    step_mask,
+)
+
+
+def minutes(*values):
+    return np.array(values, dtype="datetime64[m]").astype("datetime64[ms]")
+
+
+@pytest.fixture
+def noisy():
+    rng = np.random.default_rng(42)
+    return 10.0 + rng.normal(0.0, 0.01, 500)
+
+
+@pytest.fixture
+def quantised():
+    # Slow recession at the 1 mm resolution of the stored values
+    rng = np.random.default_rng(42)
+    days = np.arange(2880) / 96
+    return np.round(2.0 * np.exp(-days / 40) + rng.normal(0.0, 0.0003, 2880), 3)
+
+
+class TestSpikes:
+    def test_single_spike(self, noisy):
+        noisy[200] += 1.0
+        assert np.flatnonzero(spike_mask(noisy)).tolist() == [200]
+
+    def test_noise_is_not_flagged(self, noisy):
+        assert not spike_mask(noisy).any()
+
+    def test_spike_on_flat_series(self):
+        values = np.full(50, 5.0)
+        values[10] = 6.0
+        assert np.flatnonzero(spike_mask(values)).tolist() == [10]
+
+    def test_short_series(self):
+        assert not spike_mask(np.array([1.0, 100.0])).any()
+
+
+class TestFlatlines:
+    def test_long_runs_only(self):
+        values = np.array([1.0, 2.0, 2.0, 2.0, 3.0, 4.0, 4.0])
+        assert flatline_mask(values, min_run=3).tolist() == [
+            False,
+            True,
+            True,
+            True,
+            False,
+            False,
+            False,
+        ]
+
+    def test_empty(self):
+        assert len(flatline_mask(np.array([]))) == 0
+
+    def test_staircase_is_not_flagged(self):
+        values = np.repeat([1.003, 1.002, 1.001, 1.0], 20)
+        assert not flatline_mask(values, min_run=12, resolution=0.001).any()
+
+    def test_stuck_between_larger_changes(self):
+        values = np.concatenate([[1.0, 1.1], np.full(20, 1.101), [1.3, 1.2]])
+        mask = flatline_mask(values, min_run=12, resolution=0.001)
+        assert np.flatnonzero(mask).tolist() == list(range(2, 22))
+
+
+class TestSteps:
+    def test_lasting_jump(self, noisy):
+        noisy[300:] += 0.5
+        assert np.flatnonzero(step_mask(noisy)).tolist() == [300]
+
+    def test_spike_is_not_a_step(self, noisy):
+        noisy[200] += 1.0
+        assert not step_mask(noisy, spikes=spike_mask(noisy)).any()
+
+
+class TestQuantised:
+    def test_slow_series_is_not_flagged(self, quantised):
+        assert not check_series(None, quantised).any()
+
+    def test_faults_are_still_flagged(self, quantised):
+        quantised[1000] += 0.05
+        quantised[2000:] -= 0.1
+        flags = check_series(None, quantised)
+        assert np.flatnonzero(flags & Flag.SPIKE).tolist() == [1000]
+        assert np.flatnonzero(flags & Flag.STEP).tolist() == [2000]
+
+
+class TestGaps:
+    def test_gap_between_records(self):
+        timestamps = minutes(0, 10, 20, 30, 100, 110)
+        ranges = gap_ranges(timestamps, factor=5.0)
+        one = np.timedelta64(1, "ms")
+        assert ranges == [(timestamps[3] + one, timestamps[4] - one)]
+
+    def test_regular_series(self):
+        assert gap_ranges(minutes(*range(0, 100, 10))) == []
+
+
+class TestRanges:
+    def test_roundtrip(self, noisy):
+        noisy[100] += 1.0
+        noisy[300:320] = noisy[300]
+        timestamps = (
+            np.arange(len(noisy)).astype("datetime64[m]").astype("datetime64[ms]")
+        )
+        flags = check_series(timestamps, noisy)
+        ranges = flag_ranges(timestamps, flags)
+        np.testing.assert_array_equal(apply_ranges(timestamps, ranges), flags)
+        assert flags[100] == Flag.SPIKE
+        assert (flags[300:320] & Flag.FLATLINE).all()
+
+    def test_overlapping_ranges(self):
+        timestamps = minutes(0, 1, 2, 3)
+        ranges = [
+            (timestamps[0], timestamps[2], int(Flag.SPIKE)),
+            (timestamps[1], timestamps[3], int(Flag.STEP)),
+        ]
+        assert apply_ranges(timestamps, ranges).tolist() == [
+            Flag.SPIKE,
+            Flag.SPIKE | Flag.STEP,
+            Flag.SPIKE | Flag.STEP,
+            Flag.STEP,
+        ]
+
+    def test_no_flags(self):
+        assert flag_ranges(minutes(0, 1), np.zeros(2, dtype=np.uint16)) == []
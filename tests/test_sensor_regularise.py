@@ -0,0 +1,119 @@
+"""
+Tests for the regularisation of irregular logger timestamps.
+
+Drift correction and resampling are tested with synthetic series; the grid
+is aligned to the epoch, so regularising a series piece by piece must give
+the same result as regularising it at once.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from watersync.sensor.regularise import (
+    LINEAR,
+    correct_drift,
+    interpolate,
+    regular_grid,
+    regularise,
+    snap,
+)
+
+
+def minutes(*values):
+    return np.array(values, dtype="datetime64[m]").astype("datetime64[ms]")
+
+
+def seconds(*values):
+    return np.array(values, dtype="datetime64[s]").astype("datetime64[ms]")
+
+
+class TestCorrectDrift:
+    def test_interpolated_between_reference_points(self):
+        # The logger clock gains 60 s between the checks
+        references = [
+            ("1970-01-01T00:00", "1970-01-01T00:00"),
+            ("1970-01-01T01:00", "1970-01-01T00:59"),
+        ]
+        corrected = correct_drift(minutes(0, 30, 60, 90), references)
+        np.testing.assert_array_equal(corrected, seconds(0, 1770, 3540, 5340))
+
+    def test_constant_offset_outside_references(self):
+        corrected = correct_drift(
+            minutes(0, 10), [("1970-01-01T00:05Z", "1970-01-01T00:05:30Z")]
+        )
+        np.testing.assert_array_equal(corrected, seconds(30, 630))
+
+    def test_without_references(self):
+        np.testing.assert_array_equal(correct_drift(minutes(0, 1), None), minutes(0, 1))
+
+    def test_invalid_references(self):
+        with pytest.raises(ValueError):
+            correct_drift(minutes(0), [("1970-01-01T00:00",)])
+
+
+class TestResampling:
+    def test_grid_aligned_to_epoch(self):
+        grid = regular_grid(minutes(7)[0], minutes(40)[0], timedelta(minutes=15))
+        np.testing.assert_array_equal(grid, minutes(15, 30))
+
+    def test_snap_nearest_within_tolerance(self):
+        timestamps = seconds(10, 890, 2700)
+        values = snap(
+            timestamps, [1.0, 2.0, 3.0], minutes(0, 15, 30, 45), timedelta(minutes=5)
+        )
+        np.testing.assert_array_equal(values, [1.0, 2.0, np.nan, 3.0])
+
+    def test_interpolate_does_not_bridge_gaps(self):
+        timestamps = minutes(0, 10, 60)
+        values = interpolate(
+            timestamps, [0.0, 10.0, 60.0], minutes(0, 5, 30), timedelta(minutes=15)
+        )
+        np.testing.assert_array_equal(values, [0.0, 5.0, np.nan])
+
+    def test_interval_change(self):
+        # Sampling every 5 min, then every 20 min
+        timestamps = minutes(0, 5, 10, 30, 50)
+        grid, values = regularise(
+            timestamps,
+            [0.0, 5.0, 10.0, 30.0, 50.0],
+            timedelta(minutes=10),
+            LINEAR,
+            timedelta(minutes=5),
+        )
+        np.testing.assert_array_equal(grid, minutes(0, 10, 20, 30, 40, 50))
+        np.testing.assert_allclose(values, [0.0, 10.0, np.nan, 30.0, np.nan, 50.0])
+
+    def test_piecewise_matches_whole(self):
+        rng = np.random.default_rng(0)
+        timestamps = np.sort(
+            rng.choice(np.arange(0, 6000, dtype=np.int64), 400, replace=False)
+        )
+        timestamps = timestamps.astype("datetime64[s]").astype("datetime64[ms]")
+        values = rng.normal(size=len(timestamps))
+        interval, tolerance = timedelta(seconds=30), timedelta(seconds=20)
+        _, whole = regularise(timestamps, values, interval, LINEAR, tolerance)
+
+        split = seconds(3000)[0]
+        margin = np.timedelta64(20, "s")
+        head = timestamps < split + margin
+        tail = timestamps >= split - margin
+        head_grid, head_values = regularise(
+            timestamps[head], values[head], interval, LINEAR, tolerance
+        )
+        tail_grid, tail_values = regularise(
+            timestamps[tail], values[tail], interval, LINEAR, tolerance
+        )
+        pieces = np.concatenate(
+            [head_values[head_grid < split], tail_values[tail_grid >= split]]
+        )
+        np.testing.assert_array_equal(pieces, whole)
+
+    def test_unknown_method(self):
+        with pytest.raises(ValueError, match="Unknown"):
+            regularise(minutes(0), [1.0], timedelta(minutes=1), "cubic")
+
+    def test_empty(self):
+        grid, values = regularise(minutes(), [], timedelta(minutes=1))
+        assert len(grid) == len(values) == 0
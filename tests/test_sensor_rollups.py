@@ -0,0 +1,110 @@
+"""
+Tests for the bucket arithmetic of the sensor record rollups.
+
+The read path must only use a rollup when its buckets tile the requested
+range exactly (statistics) or give enough points for the plot width.
+"""
+
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+
+from watersync.sensor import rollups
+from watersync.sensor.rollups import (
+    DAY,
+    HOUR,
+    bucket_extremes,
+    floor_bucket,
+    is_aligned,
+    plot_resolution,
+    rebuild_rollups,
+    statistics_resolution,
+)
+
+T0 = datetime(2024, 3, 5, 14, 37, 12, tzinfo=UTC)
+
+
+class TestBuckets:
+    """Tests for bucket flooring and alignment."""
+
+    def test_floor_hour(self):
+        assert floor_bucket(T0, HOUR) == datetime(2024, 3, 5, 14, tzinfo=UTC)
+
+    def test_floor_day(self):
+        assert floor_bucket(T0, DAY) == datetime(2024, 3, 5, tzinfo=UTC)
+
+    def test_open_bound_is_aligned(self):
+        assert is_aligned(None, DAY)
+
+    def test_unaligned(self):
+        assert not is_aligned(T0, HOUR)
+
+
+class TestResolution:
+    """Tests for the choice of the rollup resolution."""
+
+    def test_statistics_uses_daily_for_whole_days(self):
+        start = datetime(2024, 1, 1, tzinfo=UTC)
+        assert statistics_resolution(start, start + timedelta(days=30)) == DAY
+
+    def test_statistics_uses_hourly_for_whole_hours(self):
+        start = datetime(2024, 1, 1, 6, tzinfo=UTC)
+        assert statistics_resolution(start, None) == HOUR
+
+    def test_statistics_falls_back_to_raw(self):
+        assert statistics_resolution(T0, None) is None
+
+    def test_plot_resolution(self):
+        start = datetime(2020, 1, 1, tzinfo=UTC)
+        assert plot_resolution(start, start + timedelta(days=7), 1200) is None
+        assert plot_resolution(start, start + timedelta(days=100), 1200) == HOUR
+        assert plot_resolution(start, start + timedelta(days=2000), 1200) == DAY
+
+
+class TestRebuild:
+    """Tests for rebuilding the rollups of a whole deployment."""
+
+    def test_month_by_month(self, monkeypatch):
+        first = datetime(2024, 1, 15, 6, tzinfo=UTC)
+        last = datetime(2024, 3, 2, 10, tzinfo=UTC)
+        refreshed = []
+        monkeypatch.setattr(
+            rollups, "series_range", lambda deployment_id: (first, last)
+        )
+        monkeypatch.setattr(
+            rollups,
+            "SensorRecordRollup",
+            SimpleNamespace(
+                objects=SimpleNamespace(
+                    filter=lambda **kwargs: SimpleNamespace(delete=lambda: None)
+                )
+            ),
+        )
+        monkeypatch.setattr(
+            rollups,
+            "refresh_rollups",
+            lambda deployment_id, start, end: refreshed.append((start, end)),
+        )
+
+        rebuild_rollups(1)
+        one = timedelta(milliseconds=1)
+        assert refreshed == [
+            (first, datetime(2024, 2, 1, tzinfo=UTC) - one),
+            (datetime(2024, 2, 1, tzinfo=UTC), datetime(2024, 3, 1, tzinfo=UTC) - one),
+            (datetime(2024, 3, 1, tzinfo=UTC), last),
+        ]
+
+
+class TestPlotSeries:
+    """Tests for the points plotted from rollups."""
+
+    def test_extremes_follow_the_trend(self):
+        # A rising bucket, a falling one and a flat one
+        values = bucket_extremes(
+            minimum=[1.0, 2.0, 5.0],
+            maximum=[3.0, 4.0, 6.0],
+            first=[1.0, 4.0, 5.5],
+            last=[3.0, 2.0, 5.5],
+        )
+        assert np.array_equal(values, [1.0, 3.0, 4.0, 2.0, 5.0, 6.0])
@@ -0,0 +1,180 @@
+"""
+Tests for the parsing and group commit of pushed telemetry.
+
+The group commit is tested without a database: the write of a group, or
+the transactions and loader it uses, are replaced, so only the grouping of
+concurrent batches and the isolation of failed ones are checked.
+"""
+
+import asyncio
+import contextlib
+import threading
+import time
+
+import pandas as pd
+import pytest
+from asgiref.sync import sync_to_async
+
+from watersync.sensor import telemetry
+from watersync.sensor.loaders import LoadResult
+from watersync.sensor.telemetry import (
+    GroupCommitter,
+    TelemetryError,
+    clean_rows,
+    parse_csv,
+    parse_ndjson,
+)
+
+NDJSON = b"""{"sensor": "S1", "variable": "pressure", "timestamp": "2024-03-13T10:00:00Z", "value": 1.5}
+{"sensor": "S1", "variable": "pressure", "timestamp": "2024-03-13T12:00:00+02:00", "value": "2"}
+{"sensor": "S1", "variable": "pressure", "timestamp": "2024-03-13T10:10:00", "value": "n/a"}
+{"sensor": "S1", "variable": "pressure", "timestamp": "yesterday", "value": 3}
+"""
+
+
+class TestParsing:
+    def test_ndjson(self):
+        rows = parse_ndjson(NDJSON)
+        assert list(rows.columns) == ["sensor", "variable", "timestamp", "value"]
+        assert len(rows) == 4
+
+    def test_csv(self):
+        rows = parse_csv(
+            b"sensor,variable,value,timestamp\nS1,pressure,1.5,2024-03-13T10:00:00Z\n"
+        )
+        assert rows.iloc[0].tolist() == [
+            "S1",
+            "pressure",
+            "2024-03-13T10:00:00Z",
+            "1.5",
+        ]
+
+    def test_missing_column(self):
+        with pytest.raises(TelemetryError, match="variable"):
+            parse_csv(b"sensor,timestamp,value\nS1,2024-03-13,1\n")
+
+    def test_invalid_json(self):
+        with pytest.raises(TelemetryError):
+            parse_ndjson(b'{"sensor": "S1"\n')
+
+    def test_empty(self):
+        assert parse_ndjson(b"\n").empty
+
+    def test_clean_rows(self):
+        clean, rejected = clean_rows(parse_ndjson(NDJSON))
+        # Both valid rows are the same instant, so the second is a repeat
+        assert rejected == 3
+        assert clean["timestamp"].tolist() == [pd.Timestamp("2024-03-13T10:00:00Z")]
+
+
+def chunk(minute):
+    return pd.DataFrame(
+        {
+            "timestamp": [
+                pd.Timestamp("2024-01-01T00:00:00Z") + pd.Timedelta(minutes=minute)
+            ],
+            "value": [1.0],
+        }
+    )
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+class TestGroupCommitter:
+    def test_batches_pending_during_a_write_share_the_next(self):
+        committer = GroupCommitter()
+        groups = []
+        release = threading.Event()
+
+        def write(group):
+            groups.append(len(group))
+            release.wait()
+            return [LoadResult(inserted=len(chunks)) for chunks, _, _ in group]
+
+        committer._write = write
+
+        results = [None] * 20
+
+        def push(index):
+            results[index] = committer.submit([(1, chunk(index)), (2, chunk(index))])
+
+        threads = [threading.Thread(target=push, args=(index,)) for index in range(20)]
+        threads[0].start()
+        wait_for(lambda: groups)
+        for thread in threads[1:]:
+            thread.start()
+        wait_for(lambda: len(committer._pending) == 19)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert groups == [1, 19]
+        assert all(result.inserted == 2 for result in results)
+
+    def test_full_group_is_closed(self):
+        committer = GroupCommitter(max_rows=2)
+        committer._pending = [([(1, chunk(index))], None, None) for index in range(5)]
+        assert len(committer._next_group()) == 2
+        assert len(committer._next_group()) == 2
+        assert len(committer._next_group()) == 1
+
+    def test_pushes_from_the_sync_thread_are_not_delayed(self):
+        # Under ASGI, sync views of a worker run one at a time in its sync
+        # thread, so a push must not wait for batches that cannot arrive
+        committer = GroupCommitter()
+        committer._write = lambda group: [LoadResult(inserted=1) for _ in group]
+        push = sync_to_async(
+            lambda index: committer.submit([(1, chunk(index))]),
+            thread_sensitive=True,
+        )
+
+        async def push_all():
+            return await asyncio.gather(*(push(index) for index in range(50)))
+
+        started = time.monotonic()
+        results = asyncio.run(push_all())
+        assert all(result.inserted == 1 for result in results)
+        assert time.monotonic() - started < 1
+
+    def test_failed_batch_fails_alone(self, monkeypatch):
+        monkeypatch.setattr(telemetry.transaction, "atomic", contextlib.nullcontext)
+        monkeypatch.setattr(telemetry, "drop_compacted", lambda pk, chunk: (chunk, 0))
+        refreshed = []
+        monkeypatch.setattr(
+            telemetry, "refresh_rollups", lambda pk, start, end: refreshed.append(pk)
+        )
+        monkeypatch.setattr(
+            "watersync.sensor.derived.invalidate", lambda pk, start: None
+        )
+
+        class Loader:
+            def load(self, pk, chunk, user=None):
+                if user == "broken":
+                    raise RuntimeError("invalid batch")
+                return LoadResult(inserted=len(chunk))
+
+        committer = GroupCommitter(loader=Loader())
+        results = committer._write(
+            [([(1, chunk(0))], "gateway", None), ([(2, chunk(1))], "broken", None)]
+        )
+        assert results[0].inserted == 1
+        assert isinstance(results[1], RuntimeError)
+        assert refreshed == [1]
+
+    def test_failure_reaches_every_batch(self):
+        committer = GroupCommitter()
+
+        def fail(group):
+            raise RuntimeError("database down")
+
+        committer._write = fail
+        with pytest.raises(RuntimeError):
+            committer.submit([(1, chunk(0))])
+        # The writer carries on with the next group
+        committer._write = lambda group: [LoadResult(inserted=1) for _ in group]
+        assert committer.submit([(1, chunk(1))]).inserted == 1
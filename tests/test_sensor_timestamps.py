@@ -0,0 +1,126 @@
+"""
+Tests for the inference of timestamp formats and the time zone profiles.
+
+A file is parsed with one format inferred from a sample, so ambiguous
+day/month orders must be settled by the sample as a whole.
+"""
+
+import pandas as pd
+import pytest
+
+from watersync.sensor.timestamps import (
+    ISO8601,
+    infer_format,
+    parse_timestamps,
+    validate_timezone,
+)
+
+
+def utc(*values):
+    return [pd.Timestamp(value, tz="UTC") for value in values]
+
+
+class TestInferFormat:
+    @pytest.mark.parametrize(
+        ("values", "expected"),
+        [
+            (["2024-03-13T10:00:00", "2024-03-13T10:15:00"], ISO8601),
+            (["2024-03-13 10:00:00+01:00"], ISO8601),
+            (["13/03/2024 10:00:00", "13/03/2024 10:15:00"], "%d/%m/%Y %H:%M:%S"),
+            (["13.03.2024 10:00", "13.03.2024 10:15"], "%d.%m.%Y %H:%M"),
+            (["2024/03/13 10:00:00.0"], ISO8601),
+            (["03/13/24 10:00:00 AM", "03/13/24 01:30:00 PM"], "%m/%d/%y %I:%M:%S %p"),
+        ],
+    )
+    def test_formats(self, values, expected):
+        assert infer_format(pd.Series(values)) == expected
+
+    def test_ambiguous_dates_default_to_day_first(self):
+        values = pd.Series(["01/02/2024 10:00", "02/02/2024 10:00"])
+        assert infer_format(values) == "%d/%m/%Y %H:%M"
+
+    def test_chronological_order_settles_month_first(self):
+        # Both orders parse, only month-first is in chronological order
+        values = pd.Series(["01/02/2024 10:00", "01/03/2024 10:00", "02/01/2024 10:00"])
+        assert infer_format(values) == "%m/%d/%Y %H:%M"
+
+    def test_stray_values_are_tolerated(self):
+        values = pd.Series(["13/03/2024 10:00"] * 99 + ["error"])
+        assert infer_format(values) == "%d/%m/%Y %H:%M"
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError, match="Unrecognised"):
+            infer_format(pd.Series(["yesterday", "today"]))
+
+
+class TestParseTimestamps:
+    def test_utc(self):
+        parsed = parse_timestamps(
+            pd.Series(["13/03/2024 10:00", "bad"]), "%d/%m/%Y %H:%M"
+        )
+        assert parsed.iloc[0] == pd.Timestamp("2024-03-13T10:00Z")
+        assert pd.isna(parsed.iloc[1])
+
+    def test_values_missed_by_the_iso_rewrite(self):
+        values = pd.Series(["13/03/2024 10:00", "3/4/2024 10:00", "31/02/2024 10:00"])
+        parsed = parse_timestamps(values, "%d/%m/%Y %H:%M")
+        assert parsed.iloc[:2].tolist() == utc("2024-03-13T10:00", "2024-04-03T10:00")
+        assert pd.isna(parsed.iloc[2])
+
+    def test_offsets_are_kept(self):
+        parsed = parse_timestamps(
+            pd.Series(["2024-03-13T12:00:00+02:00", "2024-03-13T10:15:00Z"])
+        )
+        assert parsed.tolist() == utc("2024-03-13T10:00", "2024-03-13T10:15")
+
+    def test_mixed_offsets_and_local_times(self):
+        values = pd.Series(
+            [
+                "2024-07-01T12:00:00",
+                "2024-07-01T12:15:00+02:00",
+                "bad",
+                "2024-07-01T12:30:00Z",
+            ]
+        )
+        parsed = parse_timestamps(values, ISO8601, timezone="Europe/Brussels")
+        assert parsed.iloc[[0, 1, 3]].tolist() == utc(
+            "2024-07-01T10:00", "2024-07-01T10:15", "2024-07-01T12:30"
+        )
+        assert pd.isna(parsed.iloc[2])
+
+    def test_fixed_offset(self):
+        parsed = parse_timestamps(pd.Series(["2024-07-01 12:00"]), timezone="Etc/GMT-1")
+        assert parsed.tolist() == utc("2024-07-01T11:00")
+
+    def test_daylight_saving_time(self):
+        values = pd.Series(
+            [
+                "2024-03-31 01:30",
+                "2024-03-31 02:30",  # Skipped when clocks go forward
+                "2024-03-31 03:30",
+            ]
+        )
+        parsed = parse_timestamps(values, timezone="Europe/Brussels")
+        assert parsed.iloc[0] == pd.Timestamp("2024-03-31T00:30Z")
+        assert pd.isna(parsed.iloc[1])
+        assert parsed.iloc[2] == pd.Timestamp("2024-03-31T01:30Z")
+
+    def test_repeated_hour_is_ordered(self):
+        values = pd.Series(
+            [
+                "2024-10-27 01:30",
+                "2024-10-27 02:00",
+                "2024-10-27 02:30",
+                "2024-10-27 02:00",  # Clocks went back
+                "2024-10-27 02:30",
+                "2024-10-27 03:00",
+            ]
+        )
+        parsed = parse_timestamps(values, timezone="Europe/Brussels")
+        assert parsed.is_monotonic_increasing
+        assert parsed.iloc[1] == pd.Timestamp("2024-10-27T00:00Z")
+        assert parsed.iloc[3] == pd.Timestamp("2024-10-27T01:00Z")
+
+    def test_unknown_timezone(self):
+        with pytest.raises(ValueError):
+            validate_timezone("Europe/Belgium")
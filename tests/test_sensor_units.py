@@ -0,0 +1,68 @@
+"""
+Tests for the cached unit conversion of sensor series.
+
+Every conversion is reduced to a scale and an offset, which must match
+converting the values through pint.
+"""
+
+from django.conf import settings
+
+import numpy as np
+import pytest
+
+from watersync.sensor.units import (
+    UnitConversionError,
+    conversion,
+    convert,
+    convert_statistics,
+)
+
+
+class TestConversion:
+    @pytest.mark.parametrize(
+        ("source", "target"),
+        [
+            ("kPa", "cmH2O"),
+            ("kPa", "mH2O"),
+            ("degC", "degF"),
+            ("degC", "kelvin"),
+            ("uS/cm", "mS/cm"),
+        ],
+    )
+    def test_matches_pint(self, source, target):
+        values = np.array([-12.5, 0.0, 3.25, 1013.0])
+        expected = settings.UREG.Quantity(values, source).to(target).magnitude
+        np.testing.assert_allclose(convert(values, source, target), expected)
+
+    def test_cached(self):
+        conversion.cache_clear()
+        conversion("kPa", "psi")
+        conversion("kPa", "psi")
+        assert conversion.cache_info().hits == 1
+
+    def test_same_unit_keeps_values(self):
+        values = np.array([1.0, 2.0])
+        assert convert(values, "kPa", "kPa") is values
+        assert convert(values, "kPa", None) is values
+
+    @pytest.mark.parametrize(
+        "target", ["m", "furlongs_per_fortnight_x", "1/0", "kPa)", "__import__('os')"]
+    )
+    def test_invalid(self, target):
+        with pytest.raises(UnitConversionError):
+            conversion("kPa", target)
+
+
+class TestStatistics:
+    def test_converted(self):
+        statistics = {
+            "min_value": 0.0,
+            "max_value": 100.0,
+            "avg_value": None,
+            "count": 3,
+        }
+        converted = convert_statistics(statistics, "degC", "degF")
+        assert converted["min_value"] == pytest.approx(32.0)
+        assert converted["max_value"] == pytest.approx(212.0)
+        assert converted["avg_value"] is None
+        assert converted["count"] == 3
@@ -0,0 +1,24 @@
+"""Tests for the index scheme of time series tables."""
+
+from django.contrib.postgres.indexes import BrinIndex
+from django.db.models import Q
+
+from watersync.core.generics.indexes import timeseries_indexes
+
+
+class TestTimeseriesIndexes:
+    def test_live_index(self):
+        (index,) = timeseries_indexes("gwl_manual", ["location", "fieldwork"])
+        assert index.name == "gwl_manual_live_idx"
+        assert index.fields == ["location", "fieldwork"]
+        assert index.include == ("value",)
+        assert index.condition == Q(is_deleted=False)
+
+    def test_brin_index(self):
+        live, brin = timeseries_indexes(
+            "sensor_record", ["deployment", "-timestamp"], brin_field="timestamp"
+        )
+        assert live.fields == ["deployment", "-timestamp"]
+        assert isinstance(brin, BrinIndex)
+        assert brin.fields == ["timestamp"]
+        assert brin.autosummarize
@@ -0,0 +1,52 @@
+"""Cache entries of per-object data, invalidated with version keys.
+
+Everything cached for an object lives under keys that contain the current
+version of the object. Invalidation bumps the version instead of finding
+and deleting the entries: readers miss from then on, and the stale entries
+expire on their own. This works on any cache backend, including ones that
+cannot delete by pattern.
+
+Versions start at the current time in nanoseconds rather than at 1, so a
+version key evicted from the cache never comes back with the number of
+entries that are still cached.
+
+Typical usage:
+
+    >>> key = versioned_key("sensor-overview", deployment.pk, "2024-01-01")
+    >>> cache.set(key, overview)
+    >>> bump_version("sensor-overview", deployment.pk)  # key is stale now
+"""
+
+import time
+
+from django.core.cache import cache
+
+
+def _version_key(namespace: str, pk) -> str:
+    return f"{namespace}:version:{pk}"
+
+
+def get_version(namespace: str, pk) -> int:
+    """Return the current version of an object's entries in `namespace`."""
+    key = _version_key(namespace, pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace: str, pk) -> None:
+    """Invalidate all entries of an object in `namespace`."""
+    key = _version_key(namespace, pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # No version yet, so nothing of the object is cached
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def versioned_key(namespace: str, pk, *parts) -> str:
+    """Return the cache key of an entry of an object, at its current version."""
+    suffix = ":".join(str(part) for part in parts)
+    return f"{namespace}:{pk}:{get_version(namespace, pk)}:{suffix}"
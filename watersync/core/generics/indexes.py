@@ -0,0 +1,61 @@
+"""Index scheme of time series tables.
+
+Almost every query on a time series table reads the live records of one
+series (a deployment, a location, a sample) over a time range, newest or
+oldest first. Instead of one b-tree per column, time series models get:
+
+    - A composite b-tree on the series and time columns, partial on
+      `NOT is_deleted` and covering `value` with INCLUDE. Range plots,
+      statistics and keyset pages of a series are answered by an index-only
+      scan of exactly the rows they return; soft-deleted rows are not in the
+      index at all.
+    - Optionally a BRIN index on an append-ordered timestamp column, for
+      queries over a time range across all series (maintenance, rollups,
+      partition moves). It is a few pages per partition instead of a
+      b-tree of the size of the table.
+
+The soft delete flag itself is not indexed: nearly all rows are live, so an
+index on it is never selective.
+
+Typical usage:
+
+    >>> class Meta:
+    ...     indexes = timeseries_indexes("sensor_record", ["deployment", "-timestamp"],
+    ...                                  brin_field="timestamp")
+"""
+
+from django.contrib.postgres.indexes import BrinIndex
+from django.db import models
+from django.db.models import Q
+
+LIVE_CONDITION = Q(is_deleted=False)
+
+
+def timeseries_indexes(
+    prefix: str, fields, include=("value",), brin_field=None
+) -> list:
+    """Return the indexes of a time series model for its Meta.indexes.
+
+    Args:
+        prefix: Prefix of the index names, at most 20 characters.
+        fields: Series and time fields of the composite index, with a
+            leading "-" for descending order like in Meta.ordering.
+        include: Non-key columns stored in the composite index.
+        brin_field: Timestamp field to add a BRIN index on, if any.
+
+    Returns:
+        List of Index instances.
+    """
+    indexes = [
+        models.Index(
+            fields=list(fields),
+            include=list(include),
+            condition=LIVE_CONDITION,
+            name=f"{prefix}_live_idx",
+        )
+    ]
+    if brin_field:
+        indexes.append(
+            BrinIndex(fields=[brin_field], autosummarize=True, name=f"{prefix}_brin")
+        )
+    return indexes
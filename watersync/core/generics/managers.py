@@ -130,6 +130,15 @@ class TimeSeriesManager(SoftDeleteMixin, LocationScopedManager):
     def for_plotting(self, include_location=False):
         return self.get_queryset().for_plotting(include_location)
 
+    def as_arrays(self):
+        return self.get_queryset().as_arrays()
+
+    def resample(self, interval, aggs=("avg",)):
+        return self.get_queryset().resample(interval, aggs)
+
+    def aligned(self, series_field, keys, interval, agg="avg"):
+        return self.get_queryset().aligned(series_field, keys, interval, agg)
+
 
 class SoftDeleteLocationScopedManager(SoftDeleteMixin, LocationScopedManager):
     """Manager for location-scoped models with soft delete."""
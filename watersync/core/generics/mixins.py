@@ -2,9 +2,11 @@
 
 import csv
 
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
 
+from watersync.core.generics.pagination import InvalidCursor, KeysetPaginator
+
 
 class ExportCsvMixin:
     def export_as_csv(self, request, queryset):
@@ -235,3 +237,61 @@ class FilterMixin:
         return context
 
 
+class KeysetPaginationMixin:
+    """Mixin that replaces ListView's OFFSET pagination with keyset pagination.
+
+    Pages are addressed by an opaque `cursor` query parameter instead of a
+    page number, and no COUNT(*) is run. Meant for long time series
+    listings; works with any TimeSeriesModel queryset
+    (see watersync.core.generics.pagination.KeysetPaginator).
+
+    Attributes:
+        paginate_by: Page size, as for ListView.
+        cursor_kwarg: Name of the query parameter holding the cursor.
+        keyset_fields: Unique sort key; defaults to the model's
+            timestamp_field and the primary key.
+
+    Template context:
+        page_obj: KeysetPage with has_next/has_previous and the cursors
+        next_page_query: Query string of the next page, or None
+        previous_page_query: Query string of the previous page, or None
+
+    Example:
+        class MeasurementListView(KeysetPaginationMixin, WatersyncListView):
+            model = GWLManualMeasurement
+            paginate_by = 100
+
+        In template:
+            {% if next_page_query %}
+                <a hx-get="{{ request.path }}?{{ next_page_query }}">Older</a>
+            {% endif %}
+    """
+
+    cursor_kwarg = "cursor"
+    keyset_fields = None
+
+    def paginate_queryset(self, queryset, page_size):
+        """Return the page addressed by the cursor in the request."""
+        paginator = KeysetPaginator(queryset, page_size, fields=self.keyset_fields)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor as e:
+            raise Http404(str(e)) from e
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_page_query(self, cursor):
+        """Return the current query string with the cursor replaced."""
+        if cursor is None:
+            return None
+        params = self.request.GET.copy()
+        params[self.cursor_kwarg] = cursor
+        return params.urlencode()
+
+    def get_context_data(self, **kwargs):
+        """Add the query strings of the neighbouring pages."""
+        context = super().get_context_data(**kwargs)
+        page = context.get("page_obj")
+        if page is not None:
+            context["next_page_query"] = self.get_page_query(page.next_cursor)
+            context["previous_page_query"] = self.get_page_query(page.previous_cursor)
+        return context
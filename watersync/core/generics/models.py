@@ -61,7 +61,9 @@ class SoftDeleteMixin(models.Model):
     Use `.all_with_deleted()` or `.deleted_only()` for including them.
     """
 
-    is_deleted = models.BooleanField(default=False, db_index=True)
+    # Not indexed on its own: nearly all rows are live. Time series tables
+    # use indexes partial on NOT is_deleted instead (see indexes.py).
+    is_deleted = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
     deleted_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -112,6 +114,10 @@ class TimeSeriesModel(SoftDeleteMixin, models.Model):
         - date_range(): Get (min, max) timestamps
         - statistics(): Get min, max, avg, count for values
         - for_plotting(): Get (timestamp, value) tuples for charting
+        - as_arrays(): Get timestamps and values as NumPy arrays
+        - resample(interval, aggs): Aggregate values into time buckets in SQL
+        - aligned(series_field, keys, interval, agg): Aggregate several series
+          onto one time grid in SQL
 
     All methods are chainable after filter():
         stats = Model.objects.filter(location=loc).statistics()
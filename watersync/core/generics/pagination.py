@@ -0,0 +1,191 @@
+"""Keyset (seek) pagination for time series listings.
+
+OFFSET pagination reads and discards every row before the requested page
+and needs a COUNT(*) for the page numbers, so deep pages of a large series
+get slower the further back they are. Keyset pagination instead remembers
+the sort key of the last row shown, `(timestamp, id)` for time series, and
+asks for the rows after it. Every page is a bounded index range scan,
+whatever its depth, and no count is run.
+
+Pages are addressed by opaque cursor tokens instead of page numbers. The
+paginator works on any queryset of a `TimeSeriesModel`, using its
+`timestamp_field` (which may span relations) and the primary key.
+
+Typical usage:
+
+    >>> paginator = KeysetPaginator(SensorRecord.objects.filter(deployment=d), 100)
+    >>> page = paginator.page(request.GET.get("cursor"))
+    >>> page.next_cursor
+    'eyJkIjogIm4iLCAiayI6IFsiMjAyNC0wMS0wMVQwMDowMDowMCswMDowMCIsIDQyXX0'
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from datetime import date
+
+from django.db.models import F, Q
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token cannot be decoded."""
+
+
+def _serialize(value):
+    # Full precision isoformat: DjangoJSONEncoder would cut microseconds
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(direction: str, key: tuple) -> str:
+    """Encode a page direction and sort key as an opaque URL-safe token."""
+    payload = json.dumps({"d": direction, "k": [_serialize(value) for value in key]})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[str, list]:
+    """Decode a token created by `encode_cursor`.
+
+    Key values come back as JSON scalars; timestamps stay ISO strings, which
+    the ORM parses when filtering.
+
+    Raises:
+        InvalidCursor: If the token is malformed.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction, key = payload["d"], payload["k"]
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(f"Invalid cursor: {token!r}") from e
+    if direction not in (NEXT, PREVIOUS) or not isinstance(key, list):
+        raise InvalidCursor(f"Invalid cursor: {token!r}")
+    return direction, key
+
+
+@dataclass
+class KeysetPage:
+    """One page of a keyset-paginated queryset.
+
+    Mirrors the parts of Django's `Page` that do not depend on a count, so
+    it can stand in for `page_obj` in list templates.
+    """
+
+    object_list: list
+    next_cursor: str | None = None
+    previous_cursor: str | None = None
+    paginator: "KeysetPaginator | None" = field(default=None, repr=False)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Paginate a queryset by seeking on a unique sort key.
+
+    Args:
+        queryset: Queryset to paginate; its ordering is replaced.
+        per_page: Number of objects per page.
+        fields: Sort key, most significant first. Must be unique as a whole.
+            Defaults to the model's `timestamp_field` and the primary key.
+        descending: Newest first, as in record listings.
+    """
+
+    def __init__(self, queryset, per_page: int, fields=None, descending: bool = True):
+        if fields is None:
+            fields = (getattr(queryset.model, "timestamp_field", "timestamp"), "pk")
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.fields = tuple(fields)
+        self.descending = descending
+        # Paths across relations are read back through annotations
+        self._aliases = {
+            path: f"keyset_{index}"
+            for index, path in enumerate(self.fields)
+            if "__" in path
+        }
+
+    def _key(self, obj) -> tuple:
+        return tuple(
+            getattr(obj, self._aliases.get(path, path)) for path in self.fields
+        )
+
+    def _seek(self, key, forward: bool) -> Q:
+        """Filter for the rows strictly after `key` in the walking direction.
+
+        Expands the row comparison `(a, b) < (x, y)` to `a <= x AND (a < x OR
+        (a = x AND b < y))`; the leading `a <= x` is what lets PostgreSQL
+        use it as an index bound instead of a filter.
+        """
+        lookup = "lt" if forward == self.descending else "gt"
+        inclusive = Q(**{f"{self.fields[0]}__{lookup}e": key[0]})
+
+        condition = Q()
+        for index, path in enumerate(self.fields):
+            equal = {self.fields[i]: key[i] for i in range(index)}
+            condition |= Q(**equal, **{f"{path}__{lookup}": key[index]})
+        return inclusive & condition
+
+    def _ordering(self, forward: bool) -> list:
+        if forward == self.descending:
+            return [F(path).desc() for path in self.fields]
+        return [F(path).asc() for path in self.fields]
+
+    def page(self, cursor: str | None = None) -> KeysetPage:
+        """Return the page addressed by `cursor`, or the first page.
+
+        Raises:
+            InvalidCursor: If the cursor is malformed or does not match the
+                sort key.
+        """
+        direction, key = NEXT, None
+        if cursor:
+            direction, key = decode_cursor(cursor)
+            if len(key) != len(self.fields):
+                raise InvalidCursor(f"Invalid cursor: {cursor!r}")
+
+        forward = direction == NEXT
+        queryset = self.queryset
+        if self._aliases:
+            queryset = queryset.annotate(
+                **{alias: F(path) for path, alias in self._aliases.items()}
+            )
+        if key is not None:
+            queryset = queryset.filter(self._seek(key, forward))
+
+        # One extra row tells whether there is a page beyond this one
+        rows = list(queryset.order_by(*self._ordering(forward))[: self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if not forward:
+            rows.reverse()
+
+        page = KeysetPage(rows, paginator=self)
+        if rows:
+            has_next = more if forward else key is not None
+            has_previous = key is not None if forward else more
+            if has_next:
+                page.next_cursor = encode_cursor(NEXT, self._key(rows[-1]))
+            if has_previous:
+                page.previous_cursor = encode_cursor(PREVIOUS, self._key(rows[0]))
+        return page
@@ -1,5 +1,23 @@
+import re
+from datetime import timedelta
+
 from django.db import models
-from django.db.models import Avg, Count, Max, Min
+from django.db.models import (
+    Aggregate,
+    Avg,
+    Count,
+    DateTimeField,
+    F,
+    FloatField,
+    Func,
+    Max,
+    Min,
+    Q,
+    Sum,
+)
+from django.db.models.functions import Cast, Trunc
+
+import numpy as np
 
 
 class UserScopedQuerySet(models.QuerySet):
@@ -165,6 +183,144 @@ class LocationWithCountsAndDetailQuerySet(WithCountsMixin, WithDetailMixin, Loca
     pass
 
 
+# ============================================================================
+# TIME SERIES EXPRESSIONS - PostgreSQL functions used by TimeSeriesMixin
+# ============================================================================
+
+
+class Epoch(Func):
+    """Seconds since the Unix epoch of a timestamp or date, as float."""
+
+    template = "EXTRACT(EPOCH FROM %(expressions)s)::double precision"
+    output_field = FloatField()
+
+
+class DateBin(Func):
+    """Bin a timestamp into fixed-width buckets with PostgreSQL `date_bin`.
+
+    The bucket width is given in seconds and buckets are aligned to the
+    Unix epoch.
+    """
+
+    template = (
+        "date_bin(make_interval(secs => %(seconds)s), %(expressions)s, "
+        "TIMESTAMPTZ '1970-01-01 00:00:00+00')"
+    )
+    output_field = DateTimeField()
+
+    def __init__(self, expression, seconds, **extra):
+        super().__init__(expression, seconds=int(seconds), **extra)
+
+
+class First(Aggregate):
+    """Value of the earliest row of a group.
+
+    Takes the value and the timestamp to order by:
+    `First("value", "timestamp")`.
+    """
+
+    template = "(ARRAY_AGG(%(expressions)s))[1]"
+    arg_joiner = " ORDER BY "
+    name = "First"
+
+
+class Last(First):
+    """Value of the latest row of a group."""
+
+    template = "(ARRAY_AGG(%(expressions)s DESC))[1]"
+    name = "Last"
+
+
+# Aggregates available in resample(). Each takes the value expression and the
+# timestamp expression.
+RESAMPLE_AGGREGATES = {
+    "min": lambda value, ts: Min(value),
+    "max": lambda value, ts: Max(value),
+    "avg": lambda value, ts: Avg(value),
+    "sum": lambda value, ts: Sum(value),
+    "count": lambda value, ts: Count(value),
+    "first": lambda value, ts: First(value, ts, output_field=FloatField()),
+    "last": lambda value, ts: Last(value, ts, output_field=FloatField()),
+}
+
+# Aggregates available in aligned(). Each takes the value expression and the
+# condition selecting the rows of one series, rendered as a FILTER clause.
+ALIGNED_AGGREGATES = {
+    "min": lambda value, condition: Min(value, filter=condition),
+    "max": lambda value, condition: Max(value, filter=condition),
+    "avg": lambda value, condition: Avg(value, filter=condition),
+    "sum": lambda value, condition: Sum(value, filter=condition),
+    "count": lambda value, condition: Count(value, filter=condition),
+}
+
+# Calendar units handled with date_trunc. Any other interval uses date_bin.
+TRUNC_KINDS = ("year", "quarter", "month", "week", "day", "hour", "minute")
+
+INTERVAL_RE = re.compile(
+    r"^\s*(?P<amount>\d+)\s*(?P<unit>second|minute|hour|day|week)s?\s*$"
+)
+INTERVAL_SECONDS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+    "week": 604800,
+}
+
+
+def interval_seconds(interval) -> int:
+    """Convert a timedelta or a string like "15 minutes" to seconds.
+
+    Raises:
+        ValueError: If the interval is not understood or not positive.
+    """
+    if isinstance(interval, timedelta):
+        seconds = int(interval.total_seconds())
+    else:
+        match = INTERVAL_RE.match(str(interval))
+        if not match:
+            raise ValueError(f"Invalid interval: {interval!r}")
+        seconds = int(match["amount"]) * INTERVAL_SECONDS[match["unit"]]
+
+    if seconds <= 0:
+        raise ValueError(f"Interval must be positive: {interval!r}")
+    return seconds
+
+
+def timestamp_expression(model):
+    """Return the timestamp field of a time series model as a timestamp.
+
+    Models measured on a date, like the manual groundwater levels and the
+    water quality measurements (fieldwork date), have a DateField as their
+    `timestamp_field`. It is cast to a timestamp at midnight UTC, so dates
+    are binned like timestamps and keep their day.
+    """
+    timestamp_field = getattr(model, "timestamp_field", "timestamp")
+    *relations, name = timestamp_field.split("__")
+    opts = model._meta
+    for relation in relations:
+        opts = opts.get_field(relation).related_model._meta
+    field = opts.get_field(name)
+    if isinstance(field, models.DateField) and not isinstance(
+        field, models.DateTimeField
+    ):
+        return Cast(timestamp_field, DateTimeField())
+    return F(timestamp_field)
+
+
+def bucket_expression(timestamp, interval):
+    """Return the SQL expression that maps a timestamp to its bucket start.
+
+    Args:
+        timestamp: Timestamp expression, see `timestamp_expression`.
+        interval: A calendar unit from TRUNC_KINDS (aligned with date_trunc),
+            a timedelta, or a string like "15 minutes" (aligned with date_bin).
+    """
+    if interval in TRUNC_KINDS:
+        return Trunc(timestamp, interval, output_field=DateTimeField())
+    return DateBin(timestamp, interval_seconds(interval))
+
+
 class TimeSeriesMixin:
     """Mixin that adds time series analysis methods to QuerySet."""
 
@@ -197,6 +353,133 @@ class TimeSeriesMixin:
 
         return self.values_list(*fields)
 
+    def as_arrays(self):
+        """Return timestamps and values as NumPy arrays sorted by time.
+
+        The conversion to epoch seconds and to float happens in SQL, so rows
+        are streamed from the database cursor straight into a structured
+        array without creating model instances or Decimals.
+
+        Returns:
+            Tuple of (timestamps as datetime64[ms] in UTC, values as float64).
+        """
+        timestamp_field = getattr(self.model, "timestamp_field", "timestamp")
+        rows = self.order_by(timestamp_field).values_list(
+            Epoch(F(timestamp_field)), Cast("value", FloatField())
+        )
+        data = np.fromiter(
+            rows.iterator(chunk_size=10_000),
+            dtype=[("epoch", np.float64), ("value", np.float64)],
+        )
+        timestamps = (
+            np.round(data["epoch"] * 1000).astype(np.int64).astype("datetime64[ms]")
+        )
+        return timestamps, data["value"]
+
+    def resample(self, interval, aggs=("avg",)):
+        """Aggregate values into time buckets in the database.
+
+        Grouping and aggregation run in SQL, only one row per bucket is
+        transferred. Buckets without records are not returned.
+
+        Args:
+            interval: Bucket width. Either a calendar unit ("hour", "day",
+                "week", "month", ...), aligned with `date_trunc` in the
+                current time zone, or a
+                timedelta or string like "15 minutes", aligned with
+                `date_bin` to the Unix epoch.
+            aggs: Aggregates to compute, any of "min", "max", "avg", "sum",
+                "count", "first" and "last".
+
+        Returns:
+            Dict of NumPy column arrays: "bucket" with the bucket starts as
+            datetime64[ms] in UTC, plus one array per aggregate. Counts are
+            int64, all other aggregates float64 with NaN for missing values.
+
+        Example:
+            >>> records = SensorRecord.objects.filter(deployment=d)
+            >>> records.resample("day", ["min", "max"])
+            {"bucket": array([...]), "min": array([...]), "max": array([...])}
+        """
+        unknown = set(aggs) - set(RESAMPLE_AGGREGATES)
+        if unknown:
+            raise ValueError(f"Unknown aggregates: {', '.join(sorted(unknown))}")
+
+        timestamp = timestamp_expression(self.model)
+        value = Cast("value", FloatField())
+        annotations = {
+            name: RESAMPLE_AGGREGATES[name](value, timestamp) for name in aggs
+        }
+        rows = (
+            self.order_by()
+            .annotate(bucket=Epoch(bucket_expression(timestamp, interval)))
+            .values("bucket")
+            .annotate(**annotations)
+            .order_by("bucket")
+            .values_list("bucket", *aggs)
+        )
+
+        columns = list(zip(*rows, strict=True)) or [()] * (len(aggs) + 1)
+        epochs = np.array(columns[0], dtype=np.float64)
+        result = {
+            "bucket": np.round(epochs * 1000).astype(np.int64).astype("datetime64[ms]")
+        }
+        for name, column in zip(aggs, columns[1:], strict=True):
+            dtype = np.int64 if name == "count" else np.float64
+            result[name] = np.array(column, dtype=dtype)
+        return result
+
+    def aligned(self, series_field, keys, interval, agg="avg"):
+        """Aggregate several series onto one time grid in a single query.
+
+        Rows are grouped by time bucket only; every series becomes one
+        aggregate column restricted to its rows with a FILTER clause, so
+        the database returns the aligned (bucket x series) matrix directly.
+
+        Args:
+            series_field: Field identifying the series, e.g. "deployment_id".
+            keys: Values of `series_field` to return, in column order.
+            interval: Bucket width, see `resample()`.
+            agg: One of "min", "max", "avg", "sum" and "count".
+
+        Returns:
+            Dict of NumPy column arrays: "bucket" with the bucket starts as
+            datetime64[ms] in UTC, plus one float64 array per key with NaN
+            where a series has no records in a bucket.
+
+        Example:
+            >>> SensorRecord.objects.aligned("deployment_id", [1, 2], "1 hour")
+            {"bucket": array([...]), 1: array([...]), 2: array([...])}
+        """
+        if agg not in ALIGNED_AGGREGATES:
+            raise ValueError(f"Unknown aggregate: {agg}")
+
+        timestamp = timestamp_expression(self.model)
+        value = Cast("value", FloatField())
+        keys = list(keys)
+        annotations = {
+            f"series_{index}": ALIGNED_AGGREGATES[agg](value, Q(**{series_field: key}))
+            for index, key in enumerate(keys)
+        }
+        rows = (
+            self.filter(**{f"{series_field}__in": keys})
+            .order_by()
+            .annotate(bucket=Epoch(bucket_expression(timestamp, interval)))
+            .values("bucket")
+            .annotate(**annotations)
+            .order_by("bucket")
+            .values_list("bucket", *annotations)
+        )
+
+        columns = list(zip(*rows, strict=True)) or [()] * (len(keys) + 1)
+        epochs = np.array(columns[0], dtype=np.float64)
+        result = {
+            "bucket": np.round(epochs * 1000).astype(np.int64).astype("datetime64[ms]")
+        }
+        for key, column in zip(keys, columns[1:], strict=True):
+            result[key] = np.array(column, dtype=np.float64)
+        return result
+
 
 class TimeSeriesQuerySet(TimeSeriesMixin, WithCountsMixin, LocationScopedQuerySet):
     """Location-scoped queryset with time series methods and counts."""
@@ -0,0 +1,43 @@
+"""Tests for version-key invalidation of cached per-object data."""
+
+from django.core.cache import cache
+
+import pytest
+
+from watersync.core.generics.cache import bump_version, get_version, versioned_key
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+class TestVersionedKey:
+    def test_stable_until_bumped(self):
+        key = versioned_key("overview", 1, "2024-01-01", 1200)
+        assert versioned_key("overview", 1, "2024-01-01", 1200) == key
+
+        bump_version("overview", 1)
+        assert versioned_key("overview", 1, "2024-01-01", 1200) != key
+
+    def test_objects_are_independent(self):
+        key = versioned_key("overview", 2)
+        bump_version("overview", 1)
+        assert versioned_key("overview", 2) == key
+
+    def test_bump_increments(self):
+        version = get_version("overview", 1)
+        bump_version("overview", 1)
+        assert get_version("overview", 1) == version + 1
+
+    def test_evicted_version_does_not_revive_entries(self):
+        key = versioned_key("overview", 1)
+        cache.set(key, "stale")
+        cache.delete("overview:version:1")
+        assert cache.get(versioned_key("overview", 1)) is None
+
+    def test_bump_without_version(self):
+        bump_version("overview", 3)
+        assert get_version("overview", 3) is not None
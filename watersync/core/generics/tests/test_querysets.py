@@ -0,0 +1,98 @@
+"""Tests for resampling time series that are measured on a date.
+
+Manual groundwater levels and water quality measurements take their time
+from the fieldwork date. Resampling must bin those dates like timestamps at
+midnight UTC, including for intervals shorter than a day.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.gis.geos import Point
+
+import numpy as np
+import pytest
+
+from watersync.core.models import Fieldwork, Location, Project
+from watersync.groundwater.models import GWLManualMeasurement
+from watersync.waterquality.models import Measurement, Sample
+from watersync.waterquality.models_setup import Protocol
+
+DAYS = [date(2024, 3, 1), date(2024, 3, 2), date(2024, 3, 9)]
+
+
+def buckets(*days):
+    return np.array([day.isoformat() for day in days], dtype="datetime64[ms]")
+
+
+@pytest.fixture
+def location(db):
+    project = Project.objects.create(name="Test Project")
+    return Location.objects.create(
+        project=project,
+        name="Test Location",
+        geom=Point(0, 0, 0),
+        type=Location.LocationTypes.WELL,
+    )
+
+
+@pytest.fixture
+def fieldworks(location):
+    return [
+        Fieldwork.objects.create(project=location.project, date=day) for day in DAYS
+    ]
+
+
+@pytest.fixture
+def groundwater_levels(location, fieldworks):
+    for fieldwork, value in zip(fieldworks, ["1.5", "2.0", "2.5"], strict=True):
+        GWLManualMeasurement.objects.create(
+            fieldwork=fieldwork, location=location, value=Decimal(value)
+        )
+
+
+@pytest.fixture
+def measurements(location, fieldworks):
+    protocol = Protocol.objects.create(method_name="Standard Water Quality")
+    for fieldwork, value in zip(fieldworks, ["12.5", "15.5", "9"], strict=True):
+        sample = Sample.objects.create(
+            fieldwork=fieldwork,
+            location=location,
+            protocol=protocol,
+            parameter_group="physicochemical",
+        )
+        Measurement.objects.create(
+            sample=sample, parameter="temperature", value=Decimal(value), unit="degC"
+        )
+
+
+class TestResampleGroundwaterLevels:
+    @pytest.mark.parametrize("interval", ["minute", "hour", "day", "15 minutes"])
+    def test_sub_day_intervals_keep_the_day(self, groundwater_levels, interval):
+        result = GWLManualMeasurement.objects.resample(interval, ["avg", "first"])
+        assert np.array_equal(result["bucket"], buckets(*DAYS))
+        assert result["avg"].tolist() == [1.5, 2.0, 2.5]
+        assert result["first"].tolist() == [1.5, 2.0, 2.5]
+
+    def test_week(self, groundwater_levels):
+        result = GWLManualMeasurement.objects.resample("week", ["count"])
+        assert np.array_equal(
+            result["bucket"], buckets(date(2024, 2, 26), date(2024, 3, 4))
+        )
+        assert result["count"].tolist() == [2, 1]
+
+
+class TestResampleMeasurements:
+    @pytest.mark.parametrize("interval", ["hour", "day", "1 day"])
+    def test_intervals_up_to_a_day(self, measurements, interval):
+        result = Measurement.objects.filter(parameter="temperature").resample(
+            interval, ["avg", "last"]
+        )
+        assert np.array_equal(result["bucket"], buckets(*DAYS))
+        assert result["avg"].tolist() == [12.5, 15.5, 9.0]
+        assert result["last"].tolist() == [12.5, 15.5, 9.0]
+
+    def test_month(self, measurements):
+        result = Measurement.objects.resample("month", ["sum"])
+        assert np.array_equal(result["bucket"], buckets(date(2024, 3, 1)))
+        assert result["sum"].tolist() == [37.0]
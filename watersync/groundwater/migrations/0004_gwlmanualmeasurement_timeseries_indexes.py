@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("groundwater", "0003_alter_gwlmanualmeasurement_location"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="gwlmanualmeasurement",
+            name="is_deleted",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name="gwlmanualmeasurement",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["location", "fieldwork"],
+                include=("value",),
+                name="gwl_manual_live_idx",
+            ),
+        ),
+    ]
@@ -2,6 +2,7 @@ from decimal import Decimal
 
 from django.db import models
 
+from watersync.core.generics.indexes import timeseries_indexes
 from watersync.core.generics.models import TimeSeriesModel
 from watersync.core.models import Location
 
@@ -40,6 +41,7 @@ class GWLManualMeasurement(TimeSeriesModel):
 
     class Meta:
         ordering = ["-fieldwork__date"]
+        indexes = timeseries_indexes("gwl_manual", ["location", "fieldwork"])
 
     _list_view_fields = {
         "Location": "location",
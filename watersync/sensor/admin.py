@@ -1,6 +1,16 @@
 from django.contrib import admin
 
-from .models import Deployment, Sensor, SensorRecord
+from .models import (
+    Deployment,
+    DerivedSeries,
+    DerivedSeriesInput,
+    QCFlag,
+    Sensor,
+    SensorImportJob,
+    SensorRecord,
+    SensorRecordChunk,
+    SensorRecordRollup,
+)
 from .models_detail import PressureSensorDeploymentDetail
 
 
@@ -44,3 +54,82 @@ class DeploymentRecordAdmin(admin.ModelAdmin):
 class PressureSensorDeploymentDetailAdmin(admin.ModelAdmin):
     list_display = ("deployment", "installation_elevation")
     search_fields = ("deployment__sensor__identifier",)
+
+
+@admin.register(SensorImportJob)
+class SensorImportJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "deployment",
+        "status",
+        "format",
+        "rows_parsed",
+        "rows_inserted",
+        "rows_rejected",
+        "created_at",
+    )
+    list_filter = ("status", "format")
+    readonly_fields = (
+        "rows_parsed",
+        "rows_inserted",
+        "rows_skipped",
+        "rows_covered",
+        "rows_rejected",
+        "started_at",
+        "finished_at",
+    )
+
+
+@admin.register(SensorRecordRollup)
+class SensorRecordRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        "deployment",
+        "resolution",
+        "bucket",
+        "min_value",
+        "max_value",
+        "count",
+    )
+    list_filter = ("resolution",)
+    readonly_fields = (
+        "min_value",
+        "max_value",
+        "sum_value",
+        "count",
+        "first_value",
+        "last_value",
+        "first_at",
+        "last_at",
+    )
+
+
+@admin.register(SensorRecordChunk)
+class SensorRecordChunkAdmin(admin.ModelAdmin):
+    list_display = (
+        "deployment",
+        "start",
+        "count",
+        "min_value",
+        "max_value",
+        "updated_at",
+    )
+    exclude = ("timestamps", "values")
+    readonly_fields = ("start", "end", "count", "min_value", "max_value")
+
+
+class DerivedSeriesInputInline(admin.TabularInline):
+    model = DerivedSeriesInput
+    extra = 0
+
+
+@admin.register(DerivedSeries)
+class DerivedSeriesAdmin(admin.ModelAdmin):
+    list_display = ("output", "transform", "computed_until", "updated_at")
+    list_filter = ("transform",)
+    readonly_fields = ("computed_until",)
+    inlines = (DerivedSeriesInputInline,)
+
+
+@admin.register(QCFlag)
+class QCFlagAdmin(admin.ModelAdmin):
+    list_display = ("deployment", "start", "end", "flags", "created_at")
+    list_filter = ("flags",)
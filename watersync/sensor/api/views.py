@@ -0,0 +1,61 @@
+from django.db import transaction
+
+import pandas as pd
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from watersync.sensor.telemetry import (
+    TelemetryError,
+    parse_csv,
+    parse_ndjson,
+    push_telemetry,
+)
+
+
+class NDJSONParser(BaseParser):
+    """Telemetry rows as newline-delimited JSON objects."""
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return parse_ndjson(stream.read())
+        except TelemetryError as e:
+            raise ParseError(str(e)) from e
+
+
+class CSVParser(BaseParser):
+    """Telemetry rows as CSV with a header line."""
+
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return parse_csv(stream.read())
+        except TelemetryError as e:
+            raise ParseError(str(e)) from e
+
+
+class TelemetryView(APIView):
+    """Push endpoint for telemetry gateways.
+
+    Accepts a batch of `sensor`, `variable`, `timestamp` (ISO 8601) and
+    `value` rows as NDJSON or CSV and writes them to the ongoing deployments
+    of the caller's sensors, see `watersync.sensor.telemetry`. Answers with
+    the accepted, inserted, duplicate and rejected row counts of the batch.
+    """
+
+    parser_classes = [NDJSONParser, CSVParser]
+
+    def post(self, request, *args, **kwargs):
+        if not isinstance(request.data, pd.DataFrame):
+            # Empty bodies are not passed to the parsers
+            raise ParseError("Send the rows as application/x-ndjson or text/csv.")
+        result = push_telemetry(request.data, user=request.user)
+        return Response(result.as_dict())
+
+
+# The group commit is the transaction; the request must not wrap it in its own
+telemetry_view = transaction.non_atomic_requests(TelemetryView.as_view())
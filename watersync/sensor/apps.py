@@ -1,6 +1,12 @@
+import contextlib
+
 from django.apps import AppConfig
 
 
 class SensorConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "watersync.sensor"
+
+    def ready(self):
+        with contextlib.suppress(ImportError):
+            import watersync.sensor.signals  # noqa: F401
@@ -0,0 +1,394 @@
+"""Compressed chunk storage of sensor records.
+
+A SensorRecord row costs well over 100 bytes per reading once indexes are
+counted. Compaction moves the history of a deployment into
+`SensorRecordChunk` rows holding one UTC day each, with timestamps and
+values encoded by `watersync.sensor.codecs` (a few bytes per reading), and
+removes the compacted rows from the record table.
+
+Recent records stay rows, so imports, soft deletes and the admin keep
+working on them. Readers that need the full series of a deployment use
+`load_series`, which decodes the chunks of the range and merges them with
+the remaining rows. Soft-deleted records are never compacted.
+
+Compacted readings are not model instances: the record listing only shows
+rows, and they cannot be soft deleted. `delete_compacted` removes them for
+good by rewriting their chunks.
+
+Records arriving later for an already compacted day are merged into its
+chunk by the next compaction. Compacted records are not covered by the
+(deployment, timestamp) unique constraint of the record table, so writers
+drop timestamps already stored in chunks first (see
+`watersync.sensor.ingest.drop_stored` and `drop_compacted`). Where a row
+and a chunk still hold the same timestamp, the chunk wins.
+
+Typical usage:
+
+    >>> compact_records(deployment.pk, before=timezone.now() - timedelta(days=30))
+    >>> timestamps, values = load_series(deployment.pk, start, end)
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Max, Min
+
+import numpy as np
+
+from watersync.sensor.codecs import (
+    decode_timestamps,
+    decode_values,
+    encode_timestamps,
+    encode_values,
+)
+from watersync.sensor.models import SensorRecord, SensorRecordChunk
+from watersync.sensor.partitions import month_windows
+
+logger = logging.getLogger(__name__)
+
+CHUNK_MS = 86_400_000
+
+# Rows read at a time from the records removed by a compaction
+FETCH_SIZE = 10_000
+
+FIRST_COMPACTABLE_SQL = """
+    SELECT min("timestamp") FROM sensor_sensorrecord
+    WHERE deployment_id = %s AND "timestamp" < %s AND NOT is_deleted
+"""
+
+# Removes the rows to compact and returns them, so that rows inserted
+# concurrently are either compacted or left alone, never lost.
+DELETE_COMPACTED_SQL = """
+    DELETE FROM sensor_sensorrecord
+    WHERE deployment_id = %s
+        AND "timestamp" >= %s AND "timestamp" < %s
+        AND NOT is_deleted
+    RETURNING
+        (EXTRACT(EPOCH FROM "timestamp") * 1000)::bigint,
+        value::double precision
+"""
+
+
+@dataclass
+class CompactResult:
+    """Outcome of compacting the records of a deployment."""
+
+    records: int = 0
+    chunks: int = 0
+    bytes: int = 0
+
+    def __str__(self) -> str:
+        per_record = self.bytes / self.records if self.records else 0
+        return (
+            f"{self.records} records into {self.chunks} chunks "
+            f"({self.bytes} bytes, {per_record:.1f} bytes/record)"
+        )
+
+
+def _to_datetime(ms: int) -> datetime:
+    return datetime.fromtimestamp(ms / 1000, tz=UTC)
+
+
+def _merge(timestamps, values, extra_timestamps, extra_values):
+    """Merge two series, keeping the first series on equal timestamps."""
+    timestamps = np.concatenate([timestamps, extra_timestamps])
+    values = np.concatenate([values, extra_values])
+    # np.unique keeps the first occurrence, i.e. the entry of the first series
+    timestamps, index = np.unique(timestamps, return_index=True)
+    return timestamps, values[index]
+
+
+def decode_chunk(chunk: SensorRecordChunk) -> tuple[np.ndarray, np.ndarray]:
+    """Return the epoch milliseconds and values stored in a chunk."""
+    return decode_timestamps(bytes(chunk.timestamps)), decode_values(
+        bytes(chunk.values)
+    )
+
+
+def _day_chunk(deployment_id, day_start, timestamps, values) -> SensorRecordChunk:
+    return SensorRecordChunk(
+        deployment_id=deployment_id,
+        start=day_start,
+        end=day_start + timedelta(milliseconds=CHUNK_MS),
+        count=len(timestamps),
+        min_value=float(values.min()),
+        max_value=float(values.max()),
+        timestamps=encode_timestamps(timestamps),
+        values=encode_values(values),
+    )
+
+
+def _save_chunks(chunks) -> None:
+    """Insert chunks, replacing the chunks of the same days."""
+    SensorRecordChunk.objects.bulk_create(
+        chunks,
+        update_conflicts=True,
+        unique_fields=["deployment", "start"],
+        update_fields=[
+            "end",
+            "count",
+            "min_value",
+            "max_value",
+            "timestamps",
+            "values",
+        ],
+    )
+
+
+def write_chunks(
+    deployment_id, timestamps: np.ndarray, values: np.ndarray
+) -> CompactResult:
+    """Store a series in the daily chunks of a deployment.
+
+    Existing chunks of the affected days are decoded and merged with the
+    new records.
+
+    Args:
+        deployment_id: Primary key of the deployment.
+        timestamps: Sorted datetime64[ms] or epoch milliseconds.
+        values: Float values.
+
+    Returns:
+        CompactResult with the number of records and chunks written.
+    """
+    timestamps = np.asarray(timestamps).astype("datetime64[ms]").view(np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    result = CompactResult()
+    if not len(timestamps):
+        return result
+
+    days = timestamps // CHUNK_MS
+    starts = np.flatnonzero(np.diff(days, prepend=days[0] - 1))
+    stops = np.append(starts[1:], len(days))
+
+    existing = {
+        chunk.start: chunk
+        for chunk in SensorRecordChunk.objects.filter(
+            deployment_id=deployment_id,
+            start__gte=_to_datetime(int(days[0]) * CHUNK_MS),
+            start__lte=_to_datetime(int(days[-1]) * CHUNK_MS),
+        )
+    }
+
+    chunks = []
+    for start, stop in zip(starts, stops, strict=True):
+        day_start = _to_datetime(int(days[start]) * CHUNK_MS)
+        day_timestamps, day_values = timestamps[start:stop], values[start:stop]
+        if day_start in existing:
+            day_timestamps, day_values = _merge(
+                *decode_chunk(existing[day_start]), day_timestamps, day_values
+            )
+
+        chunk = _day_chunk(deployment_id, day_start, day_timestamps, day_values)
+        chunks.append(chunk)
+        result.records += stop - start
+        result.bytes += len(chunk.timestamps) + len(chunk.values)
+
+    _save_chunks(chunks)
+    result.chunks = len(chunks)
+    return result
+
+
+def _fetch_rows(cursor) -> np.ndarray:
+    """Read (ms, value) rows from a cursor in blocks, sorted by time."""
+    dtype = [("ms", np.int64), ("value", np.float64)]
+    blocks = [np.empty(0, dtype=dtype)]
+    while rows := cursor.fetchmany(FETCH_SIZE):
+        blocks.append(np.array(rows, dtype=dtype))
+    rows = np.concatenate(blocks)
+    rows.sort(order="ms")
+    return rows
+
+
+def compact_records(deployment_id, before: datetime) -> CompactResult:
+    """Move the records of a deployment older than `before` into chunks.
+
+    Only whole days are compacted: `before` is rounded down to midnight UTC.
+    Every calendar month is compacted in its own transaction, which writes
+    its chunks and deletes its rows, so memory use is bounded by a month of
+    records and an interrupted run keeps the months already compacted.
+
+    Args:
+        deployment_id: Primary key of the deployment.
+        before: Records before this time are compacted.
+
+    Returns:
+        CompactResult with the number of records moved.
+    """
+    cutoff = _to_datetime(int(before.timestamp() * 1000) // CHUNK_MS * CHUNK_MS)
+    with connection.cursor() as cursor:
+        cursor.execute(FIRST_COMPACTABLE_SQL, [deployment_id, cutoff])
+        (first,) = cursor.fetchone()
+
+    result = CompactResult()
+    if first is None:
+        return result
+    for window_start, window_end in month_windows(first, cutoff):
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    DELETE_COMPACTED_SQL, [deployment_id, window_start, window_end]
+                )
+                rows = _fetch_rows(cursor)
+            month = write_chunks(deployment_id, rows["ms"], rows["value"])
+        result.records += month.records
+        result.chunks += month.chunks
+        result.bytes += month.bytes
+
+    logger.info("Compacted deployment %s: %s", deployment_id, result)
+    return result
+
+
+def truncate_chunks(deployment_id, start: datetime) -> None:
+    """Remove the chunked records of a deployment from `start` on.
+
+    Used when derived records are recomputed. The chunk of the day of
+    `start` is rewritten with its earlier records.
+    """
+    chunks = SensorRecordChunk.objects.filter(
+        deployment_id=deployment_id, end__gt=start
+    )
+    partial = chunks.filter(start__lt=start).first()
+    chunks.delete()
+    if partial is not None:
+        timestamps, values = decode_chunk(partial)
+        keep = timestamps < int(start.timestamp() * 1000)
+        write_chunks(deployment_id, timestamps[keep], values[keep])
+
+
+def delete_compacted(deployment_id, start: datetime, end: datetime) -> int:
+    """Delete the compacted records of a deployment within [start, end).
+
+    The chunks of the affected days are rewritten without the records, or
+    removed when nothing is left. Unlike rows, compacted records are not
+    soft deleted; they are gone for good. Rows in the range are left alone.
+    Like other bulk paths, the caller refreshes the rollups and derived
+    series of the range.
+
+    Returns:
+        Number of records deleted.
+    """
+    lower, upper = int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+    deleted, rewritten, emptied = 0, [], []
+    with transaction.atomic():
+        chunks = SensorRecordChunk.objects.select_for_update().filter(
+            deployment_id=deployment_id, end__gt=start, start__lt=end
+        )
+        for chunk in chunks.iterator(chunk_size=100):
+            timestamps, values = decode_chunk(chunk)
+            keep = (timestamps < lower) | (timestamps >= upper)
+            if keep.all():
+                continue
+            deleted += len(timestamps) - int(keep.sum())
+            if keep.any():
+                rewritten.append(
+                    _day_chunk(
+                        deployment_id, chunk.start, timestamps[keep], values[keep]
+                    )
+                )
+            else:
+                emptied.append(chunk.pk)
+        SensorRecordChunk.objects.filter(pk__in=emptied).delete()
+        _save_chunks(rewritten)
+
+    logger.info("Deleted %s compacted records of deployment %s", deleted, deployment_id)
+    return deleted
+
+
+def load_series(deployment_id, start=None, end=None) -> tuple[np.ndarray, np.ndarray]:
+    """Return all records of a deployment, from chunks and rows.
+
+    Args:
+        deployment_id: Primary key of the deployment.
+        start: Inclusive lower bound (aware) or None.
+        end: Exclusive upper bound (aware) or None.
+
+    Returns:
+        Tuple of (timestamps as datetime64[ms], values as float64), sorted.
+    """
+    chunks = SensorRecordChunk.objects.filter(deployment_id=deployment_id)
+    records = SensorRecord.objects.filter(deployment_id=deployment_id)
+    if start is not None:
+        chunks = chunks.filter(end__gt=start)
+        records = records.filter(timestamp__gte=start)
+    if end is not None:
+        chunks = chunks.filter(start__lt=end)
+        records = records.filter(timestamp__lt=end)
+
+    decoded = [decode_chunk(chunk) for chunk in chunks.order_by("start").iterator()]
+    chunk_timestamps = np.concatenate(
+        [np.empty(0, dtype=np.int64)] + [timestamps for timestamps, _ in decoded]
+    )
+    chunk_values = np.concatenate(
+        [np.empty(0, dtype=np.float64)] + [values for _, values in decoded]
+    )
+
+    # Chunks cover whole days; trim them to the requested range
+    mask = np.ones(len(chunk_timestamps), dtype=bool)
+    if start is not None:
+        mask &= chunk_timestamps >= int(start.timestamp() * 1000)
+    if end is not None:
+        mask &= chunk_timestamps < int(end.timestamp() * 1000)
+    chunk_timestamps, chunk_values = chunk_timestamps[mask], chunk_values[mask]
+
+    row_timestamps, row_values = records.as_arrays()
+    if not len(chunk_timestamps):
+        return row_timestamps, row_values
+
+    timestamps, values = _merge(
+        chunk_timestamps, chunk_values, row_timestamps.view(np.int64), row_values
+    )
+    return timestamps.astype("datetime64[ms]"), values
+
+
+def compacted_timestamps(deployment_id, start: datetime, end: datetime) -> np.ndarray:
+    """Return the epoch milliseconds stored in chunks within [start, end].
+
+    Only the timestamps of the chunks overlapping the range are decoded.
+    """
+    encoded = SensorRecordChunk.objects.filter(
+        deployment_id=deployment_id, end__gt=start, start__lte=end
+    ).values_list("timestamps", flat=True)
+    timestamps = np.concatenate(
+        [np.empty(0, dtype=np.int64)]
+        + [decode_timestamps(bytes(data)) for data in encoded]
+    )
+    lower, upper = int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+    return timestamps[(timestamps >= lower) & (timestamps <= upper)]
+
+
+def compacted_until(deployment_id, start=None, end=None) -> datetime | None:
+    """End of the last chunk of the deployment overlapping [start, end)."""
+    chunks = SensorRecordChunk.objects.filter(deployment_id=deployment_id)
+    if start is not None:
+        chunks = chunks.filter(end__gt=start)
+    if end is not None:
+        chunks = chunks.filter(start__lt=end)
+    return chunks.aggregate(until=Max("end"))["until"]
+
+
+def has_chunks(deployment_id, start=None, end=None) -> bool:
+    """Whether any chunk of the deployment overlaps [start, end)."""
+    chunks = SensorRecordChunk.objects.filter(deployment_id=deployment_id)
+    if start is not None:
+        chunks = chunks.filter(end__gt=start)
+    if end is not None:
+        chunks = chunks.filter(start__lt=end)
+    return chunks.exists()
+
+
+def series_range(deployment_id):
+    """Return the (first, last) time covered by rows or chunks of a deployment.
+
+    For chunks the bounds of their days are used. Returns (None, None) when
+    the deployment has no records.
+    """
+    first, last = SensorRecord.objects.filter(deployment_id=deployment_id).date_range()
+    chunks = SensorRecordChunk.objects.filter(deployment_id=deployment_id).aggregate(
+        first=Min("start"), last=Max("end")
+    )
+    firsts = [value for value in (first, chunks["first"]) if value is not None]
+    lasts = [value for value in (last, chunks["last"]) if value is not None]
+    return (min(firsts), max(lasts)) if firsts else (None, None)
@@ -0,0 +1,229 @@
+"""Barometric compensation of pressure deployments.
+
+A pressure transducer below the water table measures the weight of the
+water column above it. A gauge (vented) sensor measures it directly, an
+absolute sensor also measures the weight of the atmosphere, which has to
+be subtracted using a barometer deployed nearby:
+
+    water column = (p_sensor - p_barometer) / (density * g)
+    water table elevation = installation elevation + water column
+
+The barometer is linked on the `PressureSensorDeploymentDetail` of the
+absolute deployment. Loggers and barometers rarely sample at the same
+instants, so every sensor reading is paired with the barometer reading
+nearest in time (an as-of join); readings without a barometer reading
+within the tolerance are dropped rather than compensated with a stale one.
+
+Everything is computed with NumPy over the whole requested range at once;
+the series are read with `watersync.sensor.chunks.load_series`. When the
+water level of a deployment is materialised as a derived series (see
+`watersync.sensor.derived`), readers use its stored records instead.
+
+Typical usage:
+
+    >>> series = compensate_deployment(deployment, start, end)
+    >>> series.timestamps, series.water_column, series.elevation
+"""
+
+from dataclasses import dataclass
+from datetime import timedelta
+
+import numpy as np
+
+from watersync.sensor.chunks import load_series
+from watersync.sensor.models import Deployment, DerivedSeries
+from watersync.sensor.models_detail import PressureSensorDeploymentDetail
+from watersync.sensor.units import conversion
+
+GRAVITY = 9.80665  # m/s², standard gravity
+DEFAULT_TOLERANCE = timedelta(minutes=30)
+
+
+class CompensationError(ValueError):
+    """Raised when a deployment cannot be compensated."""
+
+
+@dataclass
+class CompensatedSeries:
+    """Water column height and water table elevation of a deployment."""
+
+    timestamps: np.ndarray
+    water_column: np.ndarray
+    elevation: np.ndarray
+
+
+def pascal_factor(unit: str) -> float:
+    """Return the factor converting pressures in `unit` to pascal."""
+    scale, _ = conversion(unit, "Pa")
+    return scale
+
+
+def asof_indices(timestamps, reference, tolerance: timedelta) -> np.ndarray:
+    """Pair every timestamp with the nearest reference timestamp.
+
+    Args:
+        timestamps: Sorted datetime64[ms] array to look up.
+        reference: Sorted datetime64[ms] array to look up in.
+        tolerance: Largest time difference of a pair.
+
+    Returns:
+        For every timestamp the index into `reference` of its pair, or -1.
+    """
+    timestamps = np.asarray(timestamps, dtype="datetime64[ms]").view(np.int64)
+    reference = np.asarray(reference, dtype="datetime64[ms]").view(np.int64)
+    if not len(reference):
+        return np.full(len(timestamps), -1, dtype=np.int64)
+
+    after = np.searchsorted(reference, timestamps)
+    before = np.clip(after - 1, 0, len(reference) - 1)
+    after = np.clip(after, 0, len(reference) - 1)
+    distance_before = np.abs(timestamps - reference[before])
+    distance_after = np.abs(reference[after] - timestamps)
+
+    index = np.where(distance_after < distance_before, after, before)
+    distance = np.minimum(distance_before, distance_after)
+    limit = int(tolerance.total_seconds() * 1000)
+    return np.where(distance <= limit, index, -1)
+
+
+def water_column(pressure_pa, barometer_pa=0.0, density: float = 1000.0) -> np.ndarray:
+    """Height in metres of the water column exerting the pressure difference."""
+    return (np.asarray(pressure_pa) - barometer_pa) / (density * GRAVITY)
+
+
+def compensate(
+    timestamps,
+    pressure_pa,
+    barometer_timestamps,
+    barometer_pa,
+    tolerance: timedelta = DEFAULT_TOLERANCE,
+    density: float = 1000.0,
+    installation_elevation: float = 0.0,
+) -> CompensatedSeries:
+    """Compensate absolute pressures with barometric pressures.
+
+    Args:
+        timestamps: Sorted datetime64[ms] of the sensor readings.
+        pressure_pa: Absolute pressures in Pa.
+        barometer_timestamps: Sorted datetime64[ms] of the barometer.
+        barometer_pa: Barometric pressures in Pa.
+        tolerance: Largest time difference of paired readings.
+        density: Water density in kg/m³.
+        installation_elevation: Elevation of the sensor in m.
+
+    Returns:
+        CompensatedSeries of the readings that have a barometer reading.
+    """
+    index = asof_indices(timestamps, barometer_timestamps, tolerance)
+    paired = index >= 0
+    height = water_column(
+        np.asarray(pressure_pa)[paired],
+        np.asarray(barometer_pa)[index[paired]],
+        density,
+    )
+    return CompensatedSeries(
+        timestamps=np.asarray(timestamps)[paired],
+        water_column=height,
+        elevation=installation_elevation + height,
+    )
+
+
+def _pressure_series(deployment, start, end):
+    timestamps, values = load_series(deployment.pk, start, end)
+    return timestamps, values * pascal_factor(deployment.unit)
+
+
+def pressure_detail(deployment: Deployment) -> PressureSensorDeploymentDetail:
+    """Return the installation details of a deployment that can be compensated.
+
+    Raises:
+        CompensationError: If the deployment is not a pressure deployment,
+            has no installation details or, when absolute, no barometer.
+    """
+    types = Deployment.DeploymentTypes
+    if deployment.type not in (types.GAUGE_PRESSURE, types.ABSOLUTE_PRESSURE):
+        raise CompensationError(f"{deployment} is not a pressure deployment.")
+    try:
+        detail = deployment.pressure_sensor_detail
+    except PressureSensorDeploymentDetail.DoesNotExist as e:
+        raise CompensationError(f"{deployment} has no installation details.") from e
+    if deployment.type == types.ABSOLUTE_PRESSURE and detail.barometer is None:
+        raise CompensationError(f"{deployment} has no barometer to compensate with.")
+    return detail
+
+
+def compensate_deployment(
+    deployment: Deployment,
+    start=None,
+    end=None,
+    tolerance: timedelta = DEFAULT_TOLERANCE,
+) -> CompensatedSeries:
+    """Return the water column and water table elevation of a pressure deployment.
+
+    Gauge pressure deployments need no barometer. The barometer series is
+    read with a margin of `tolerance` around the range, so readings at the
+    edges still find their pair.
+
+    Args:
+        deployment: A gauge or absolute pressure deployment.
+        start: Inclusive lower bound (aware) or None.
+        end: Exclusive upper bound (aware) or None.
+        tolerance: Largest time difference of paired readings.
+
+    Raises:
+        CompensationError: See `pressure_detail`.
+    """
+    detail = pressure_detail(deployment)
+
+    timestamps, pressure = _pressure_series(deployment, start, end)
+    if deployment.type == Deployment.DeploymentTypes.GAUGE_PRESSURE:
+        height = water_column(pressure, density=detail.fluid_density)
+        return CompensatedSeries(
+            timestamps, height, detail.installation_elevation + height
+        )
+
+    barometer_timestamps, barometer = _pressure_series(
+        detail.barometer,
+        start and start - tolerance,
+        end and end + tolerance,
+    )
+    return compensate(
+        timestamps,
+        pressure,
+        barometer_timestamps,
+        barometer,
+        tolerance=tolerance,
+        density=detail.fluid_density,
+        installation_elevation=detail.installation_elevation,
+    )
+
+
+def water_level_output(deployment_id):
+    """Return the pk of the materialised water level of a deployment, or None."""
+    return (
+        DerivedSeries.objects.filter(
+            transform=DerivedSeries.Transforms.WATER_LEVEL,
+            inputs__role="pressure",
+            inputs__deployment_id=deployment_id,
+        )
+        .values_list("output_id", flat=True)
+        .first()
+    )
+
+
+def water_level_series(deployment_id, start=None, end=None):
+    """Water table elevation of a pressure deployment, shaped like `load_series`.
+
+    Reads the materialised water level if there is one.
+
+    Returns:
+        Tuple of (timestamps as datetime64[ms], elevations in m as float64).
+    """
+    output_id = water_level_output(deployment_id)
+    if output_id is not None:
+        return load_series(output_id, start, end)
+    deployment = Deployment.objects.select_related(
+        "pressure_sensor_detail__barometer"
+    ).get(pk=deployment_id)
+    series = compensate_deployment(deployment, start, end)
+    return series.timestamps, series.elevation
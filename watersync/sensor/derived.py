@@ -0,0 +1,443 @@
+"""Materialised, incrementally refreshed derived series.
+
+A `DerivedSeries` combines the records of its input deployments with a
+transform and stores the result as the records of its output deployment.
+Plots, rollups, statistics and exports of the output therefore read stored
+records instead of recomputing the transform on every request.
+
+Every transform declares how far its output reaches in time around an
+input reading:
+
+    - lookback: input history needed before an output timestamp, e.g. the
+      window of a rolling mean.
+    - lookahead: how far before an input reading outputs depend on it, e.g.
+      the as-of tolerance of the barometric compensation or the clock
+      offset of a regularised series.
+
+`DerivedSeries.computed_until` marks the time up to which the inputs are
+reflected in the output. A refresh recomputes only the output from there
+on, month by month, reading the inputs with the lookback as margin. New
+input records after `computed_until` just extend the output; late records
+before it move `computed_until` back by the lookahead first (see
+`invalidate`). Both the ingest pipeline and the record signals call
+`invalidate`, which queues the refresh as a Celery task.
+
+Typical usage:
+
+    >>> series = create_derived_series(
+    ...     DerivedSeries.Transforms.ROLLING_MEAN,
+    ...     {"source": deployment},
+    ...     parameters={"window": 3600},
+    ... )
+    >>> refresh_series(series)
+"""
+
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+import numpy as np
+import pandas as pd
+
+from watersync.sensor.chunks import load_series, series_range, truncate_chunks
+from watersync.sensor.compensation import (
+    DEFAULT_TOLERANCE,
+    CompensationError,
+    compensate,
+    pascal_factor,
+    pressure_detail,
+    water_column,
+)
+from watersync.sensor.ingest import write_batches
+from watersync.sensor.models import Deployment, DerivedSeries, DerivedSeriesInput
+from watersync.sensor.partitions import month_windows
+from watersync.sensor.regularise import default_tolerance, max_offset, regularise
+from watersync.sensor.rollups import refresh_rollups
+from watersync.sensor.units import convert
+
+logger = logging.getLogger(__name__)
+
+TRANSFORMS = DerivedSeries.Transforms
+
+DELETE_OUTPUT_SQL = """
+    DELETE FROM sensor_sensorrecord WHERE deployment_id = %s AND "timestamp" >= %s
+"""
+
+
+class DerivedSeriesError(ValueError):
+    """Raised when a derived series cannot be computed."""
+
+
+# ================ Transforms ========================
+
+
+class Transform(ABC):
+    """Computes the output of a derived series from its input series.
+
+    Attributes:
+        roles: Input roles, the first one is the primary input whose time
+            range the output covers. Roles in `optional` may be missing.
+        variable, unit: Variable and unit of the output deployment; None
+            takes them from the primary input.
+    """
+
+    roles: tuple[str, ...] = ("source",)
+    optional: tuple[str, ...] = ()
+    variable: str | None = None
+    unit: str | None = None
+
+    def context(self, parameters) -> tuple[timedelta, timedelta]:
+        """Return the (lookback, lookahead) of the transform."""
+        return timedelta(0), timedelta(0)
+
+    def output_unit(self, parameters, inputs) -> str:
+        return self.unit or inputs[self.roles[0]].unit
+
+    @abstractmethod
+    def compute(self, series, parameters, inputs):
+        """Compute the output.
+
+        Args:
+            series: Dict of role to (timestamps, values) of the inputs.
+            parameters: The parameters of the derived series.
+            inputs: Dict of role to input Deployment.
+
+        Returns:
+            Tuple of (timestamps as datetime64[ms], values as float64).
+        """
+
+
+class WaterLevelTransform(Transform):
+    """Water table elevation of a pressure deployment.
+
+    Absolute pressures are compensated with the "barometer" input, gauge
+    pressures are used as they are. See `watersync.sensor.compensation`.
+    Parameters: `tolerance` of the as-of join in seconds.
+    """
+
+    roles = ("pressure", "barometer")
+    optional = ("barometer",)
+    variable = "water_level"
+    unit = "m"
+
+    def tolerance(self, parameters) -> timedelta:
+        seconds = parameters.get("tolerance", DEFAULT_TOLERANCE.total_seconds())
+        return timedelta(seconds=seconds)
+
+    def context(self, parameters):
+        tolerance = self.tolerance(parameters)
+        return tolerance, tolerance
+
+    def compute(self, series, parameters, inputs):
+        try:
+            detail = pressure_detail(inputs["pressure"])
+        except CompensationError as e:
+            raise DerivedSeriesError(str(e)) from e
+
+        timestamps, pressure = series["pressure"]
+        pressure = pressure * pascal_factor(inputs["pressure"].unit)
+        if "barometer" not in series:
+            height = water_column(pressure, density=detail.fluid_density)
+            return timestamps, detail.installation_elevation + height
+
+        barometer_timestamps, barometer = series["barometer"]
+        result = compensate(
+            timestamps,
+            pressure,
+            barometer_timestamps,
+            barometer * pascal_factor(inputs["barometer"].unit),
+            tolerance=self.tolerance(parameters),
+            density=detail.fluid_density,
+            installation_elevation=detail.installation_elevation,
+        )
+        return result.timestamps, result.elevation
+
+
+class UnitConversionTransform(Transform):
+    """The source converted to another unit with pint.
+
+    Parameters: target `unit`.
+    """
+
+    def output_unit(self, parameters, inputs):
+        return parameters["unit"]
+
+    def compute(self, series, parameters, inputs):
+        timestamps, values = series["source"]
+        return timestamps, convert(values, inputs["source"].unit, parameters["unit"])
+
+
+class RollingMeanTransform(Transform):
+    """Trailing mean of the source over a time window.
+
+    Every output is the mean of the readings in (t - window, t], so
+    irregular sampling is handled. Parameters: `window` in seconds.
+    """
+
+    def window(self, parameters) -> timedelta:
+        return timedelta(seconds=parameters["window"])
+
+    def context(self, parameters):
+        return self.window(parameters), timedelta(0)
+
+    def compute(self, series, parameters, inputs):
+        timestamps, values = series["source"]
+        return timestamps, rolling_mean(timestamps, values, self.window(parameters))
+
+
+def rolling_mean(timestamps, values, window: timedelta) -> np.ndarray:
+    """Trailing time-window mean, vectorised with cumulative sums."""
+    ms = np.asarray(timestamps, dtype="datetime64[ms]").view(np.int64)
+    sums = np.concatenate([[0.0], np.cumsum(values)])
+    first = np.searchsorted(ms, ms - int(window.total_seconds() * 1000), side="right")
+    last = np.arange(1, len(ms) + 1)
+    return (sums[last] - sums[first]) / (last - first)
+
+
+class RegularisationTransform(Transform):
+    """The source resampled on a regular grid after correcting clock drift.
+
+    See `watersync.sensor.regularise`. Parameters: grid `interval` and
+    optional `tolerance` in seconds, `method` "snap" (default) or "linear"
+    and `reference_points`, a list of [logger time, true time] clock checks.
+    The output covers the time span of the logger timestamps of the source.
+    """
+
+    def interval(self, parameters) -> timedelta:
+        return timedelta(seconds=parameters["interval"])
+
+    def method(self, parameters) -> str:
+        return parameters.get("method", "snap")
+
+    def tolerance(self, parameters) -> timedelta:
+        if "tolerance" in parameters:
+            return timedelta(seconds=parameters["tolerance"])
+        return default_tolerance(self.interval(parameters), self.method(parameters))
+
+    def context(self, parameters):
+        # A reading moves by up to the clock offset, then reaches the grid
+        # points within the tolerance on either side
+        try:
+            reach = self.tolerance(parameters) + max_offset(
+                parameters.get("reference_points")
+            )
+        except ValueError as e:
+            raise DerivedSeriesError(str(e)) from e
+        return reach, reach
+
+    def compute(self, series, parameters, inputs):
+        timestamps, values = series["source"]
+        try:
+            return regularise(
+                timestamps,
+                values,
+                self.interval(parameters),
+                method=self.method(parameters),
+                tolerance=self.tolerance(parameters),
+                reference_points=parameters.get("reference_points"),
+            )
+        except ValueError as e:
+            raise DerivedSeriesError(str(e)) from e
+
+
+TRANSFORM_CLASSES = {
+    TRANSFORMS.WATER_LEVEL: WaterLevelTransform(),
+    TRANSFORMS.UNIT_CONVERSION: UnitConversionTransform(),
+    TRANSFORMS.ROLLING_MEAN: RollingMeanTransform(),
+    TRANSFORMS.REGULARISATION: RegularisationTransform(),
+}
+
+
+# ================ Materialisation ========================
+
+
+def create_derived_series(
+    transform, inputs, parameters=None, **fields
+) -> DerivedSeries:
+    """Create a derived series and its output deployment.
+
+    The output deployment shares location, sensor and time span of the
+    primary input. Nothing is computed yet, see `refresh_series`.
+
+    Args:
+        transform: A DerivedSeries.Transforms value.
+        inputs: Dict of role to input Deployment.
+        parameters: Parameters of the transform.
+        **fields: Fields of the output deployment overriding the defaults.
+
+    Raises:
+        DerivedSeriesError: If a required input is missing or a deployment
+            like the output already exists, e.g. a rolling mean in the unit
+            of its source. Pass another `sensor` or `started_at` then.
+    """
+    parameters = parameters or {}
+    handler = TRANSFORM_CLASSES[transform]
+    missing = set(handler.roles) - set(handler.optional) - set(inputs)
+    if missing:
+        raise DerivedSeriesError(f"Missing inputs: {', '.join(sorted(missing))}")
+    primary = inputs[handler.roles[0]]
+
+    fields = {
+        "location": primary.location,
+        "sensor": primary.sensor,
+        "variable": handler.variable or primary.variable,
+        "unit": handler.output_unit(parameters, inputs),
+        "started_at": primary.started_at,
+        "ended_at": primary.ended_at,
+    } | fields
+    unique = {
+        name: fields[name]
+        for name in ("sensor", "location", "variable", "unit", "started_at")
+    }
+    if Deployment.objects.filter(**unique).exists():
+        raise DerivedSeriesError(
+            "A deployment like the output of the series already exists."
+        )
+
+    with transaction.atomic():
+        output = Deployment.objects.create(**fields)
+        series = DerivedSeries.objects.create(
+            output=output, transform=transform, parameters=parameters
+        )
+        DerivedSeriesInput.objects.bulk_create(
+            DerivedSeriesInput(series=series, deployment=deployment, role=role)
+            for role, deployment in inputs.items()
+        )
+    return series
+
+
+def create_water_level_series(deployment: Deployment) -> DerivedSeries:
+    """Create the compensated water level series of a pressure deployment."""
+    try:
+        detail = pressure_detail(deployment)
+    except CompensationError as e:
+        raise DerivedSeriesError(str(e)) from e
+    inputs = {"pressure": deployment}
+    if deployment.type == Deployment.DeploymentTypes.ABSOLUTE_PRESSURE:
+        inputs["barometer"] = detail.barometer
+    return create_derived_series(TRANSFORMS.WATER_LEVEL, inputs)
+
+
+def _clear_output(output_id, start: datetime) -> None:
+    """Remove the output records from `start` on, rows and chunks."""
+    _, last = series_range(output_id)
+    with connection.cursor() as cursor:
+        cursor.execute(DELETE_OUTPUT_SQL, [output_id, start])
+    truncate_chunks(output_id, start)
+    if last is not None and last >= start:
+        refresh_rollups(output_id, start, last)
+
+
+def refresh_series(series: DerivedSeries, full: bool = False) -> int:
+    """Recompute the output of a derived series after `computed_until`.
+
+    The output is computed one calendar month at a time, each month in its
+    own transaction that also advances `computed_until`, so an interrupted
+    refresh resumes where it stopped.
+
+    Args:
+        series: The derived series.
+        full: Recompute the whole output.
+
+    Returns:
+        Number of output records written.
+
+    Raises:
+        DerivedSeriesError: If a required input is missing or the transform
+            fails.
+    """
+    handler = TRANSFORM_CLASSES[series.transform]
+    inputs = {
+        link.role: link.deployment
+        for link in series.inputs.select_related("deployment")
+    }
+    missing = set(handler.roles) - set(handler.optional) - set(inputs)
+    if missing:
+        raise DerivedSeriesError(
+            f"{series} is missing inputs: {', '.join(sorted(missing))}"
+        )
+
+    first, last = series_range(inputs[handler.roles[0]].pk)
+    if first is None:
+        return 0
+    start = (
+        first
+        if full or series.computed_until is None
+        else max(series.computed_until, first)
+    )
+    end = last + timedelta(milliseconds=1)
+    if start >= end:
+        return 0
+
+    lookback, lookahead = handler.context(series.parameters)
+    written = 0
+    cleared = False
+    for window_start, window_end in month_windows(start, end):
+        loaded = {
+            role: load_series(
+                deployment.pk, window_start - lookback, window_end + lookahead
+            )
+            for role, deployment in inputs.items()
+        }
+        timestamps, values = handler.compute(loaded, series.parameters, inputs)
+        timestamps, values = (
+            np.asarray(timestamps),
+            np.asarray(values, dtype=np.float64),
+        )
+        keep = (
+            (timestamps >= np.datetime64(window_start.replace(tzinfo=None), "ms"))
+            & (timestamps < np.datetime64(window_end.replace(tzinfo=None), "ms"))
+            & np.isfinite(values)
+        )
+        chunk = pd.DataFrame(
+            {
+                "timestamp": pd.to_datetime(timestamps[keep]).tz_localize("UTC"),
+                "value": values[keep],
+            }
+        )
+
+        with transaction.atomic():
+            if not cleared:
+                _clear_output(series.output_id, start)
+                cleared = True
+            written += write_batches(series.output, chunk).inserted
+            if len(chunk):
+                refresh_rollups(
+                    series.output_id,
+                    chunk["timestamp"].iloc[0].to_pydatetime(),
+                    chunk["timestamp"].iloc[-1].to_pydatetime(),
+                )
+            DerivedSeries.objects.filter(pk=series.pk).update(
+                computed_until=window_end, updated_at=timezone.now()
+            )
+            series.computed_until = window_end
+
+    # The output is an input of other series in turn
+    invalidate(series.output_id, start)
+    logger.info("Refreshed %s from %s: %s records", series, start, written)
+    return written
+
+
+def invalidate(deployment_id, start: datetime) -> None:
+    """Mark the derived series fed by a deployment as stale from `start` on.
+
+    Moves `computed_until` of every dependent series back to cover outputs
+    that depend on input records at or after `start`, and queues their
+    refresh once the current transaction commits.
+    """
+    # Imported here, the tasks module imports this one
+    from watersync.sensor.tasks import refresh_derived_series
+
+    dependent = DerivedSeries.objects.filter(
+        inputs__deployment_id=deployment_id
+    ).distinct()
+    for series in dependent:
+        _, lookahead = TRANSFORM_CLASSES[series.transform].context(series.parameters)
+        cutoff = start - lookahead
+        DerivedSeries.objects.filter(pk=series.pk, computed_until__gt=cutoff).update(
+            computed_until=cutoff
+        )
+        transaction.on_commit(lambda pk=series.pk: refresh_derived_series.delay(pk))
@@ -0,0 +1,143 @@
+"""Downsampling of time series for plotting.
+
+A plot cannot show more points than it has pixels, so sending every record of
+a long deployment to the browser only costs page weight and render time. The
+functions here reduce a series to a fixed number of points that depends on the
+target width of the plot, not on the length of the series.
+
+Two methods are available:
+
+    - lttb: Largest-Triangle-Three-Buckets. Keeps one point per bucket, the
+      one forming the largest triangle with its neighbours. Preserves the
+      visual shape of the series well.
+    - minmax: Keeps the minimum and maximum of every bucket. Guarantees that
+      spikes are never dropped.
+
+Both work on NumPy arrays. `x` must be numeric and sorted ascending
+(e.g. epoch milliseconds), `y` must be float.
+"""
+
+import numpy as np
+
+DEFAULT_WIDTH = 1200
+
+
+def _bucket_edges(n: int, n_buckets: int) -> np.ndarray:
+    """Return the start indices of `n_buckets` equal buckets over `n` points."""
+    return np.linspace(0, n, n_buckets + 1).astype(np.int64)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Select points with the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and last point are always kept. The remaining points are split
+    into `n_out - 2` buckets and from each bucket the point forming the
+    largest triangle with the previously selected point and the mean of the
+    next bucket is kept. Triangle areas are computed with NumPy for a whole
+    bucket at once.
+
+    Args:
+        x: Sorted x coordinates.
+        y: Values.
+        n_out: Number of points to return.
+
+    Returns:
+        Sorted integer indices of the selected points.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+
+    # Buckets over the inner points, excluding the first and the last one
+    edges = _bucket_edges(n - 2, n_out - 2) + 1
+    starts, stops = edges[:-1], edges[1:]
+
+    # Mean of every bucket, used as third triangle vertex. The last bucket
+    # looks ahead to the final point.
+    sums_x = np.add.reduceat(x[1:-1], starts - 1)
+    sums_y = np.add.reduceat(y[1:-1], starts - 1)
+    counts = stops - starts
+    next_x = np.append(sums_x[1:] / counts[1:], x[-1])
+    next_y = np.append(sums_y[1:] / counts[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    prev = 0
+
+    for i, (start, stop) in enumerate(zip(starts, stops, strict=True)):
+        bx = x[start:stop]
+        by = y[start:stop]
+        # Twice the triangle area; the constant factor does not change argmax
+        area = np.abs(
+            (x[prev] - next_x[i]) * (by - y[prev])
+            - (x[prev] - bx) * (next_y[i] - y[prev])
+        )
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+
+    return selected
+
+
+def minmax(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Select the minimum and maximum point of every bucket.
+
+    Args:
+        x: Sorted x coordinates.
+        y: Values.
+        n_out: Maximum number of points to return. Half of it is used as
+            number of buckets.
+
+    Returns:
+        Sorted integer indices of the selected points.
+    """
+    n = len(x)
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+
+    edges = _bucket_edges(n, n_buckets)
+    starts = edges[:-1]
+    bucket = np.repeat(np.arange(n_buckets), np.diff(edges))
+
+    # Sort by (bucket, value); the first and last entry of every bucket are
+    # its minimum and maximum.
+    order = np.lexsort((y, bucket))
+    stops = edges[1:] - 1
+    selected = np.concatenate([order[starts], order[stops]])
+
+    return np.unique(selected)
+
+
+METHODS = {
+    "lttb": lttb,
+    "minmax": minmax,
+}
+
+
+def downsample(
+    x: np.ndarray,
+    y: np.ndarray,
+    width: int = DEFAULT_WIDTH,
+    method: str = "lttb",
+) -> tuple[np.ndarray, np.ndarray]:
+    """Reduce a series to about one point per pixel of the target width.
+
+    Args:
+        x: Sorted x coordinates (numeric or datetime64).
+        y: Values.
+        width: Target plot width in pixels.
+        method: "lttb" or "minmax".
+
+    Returns:
+        Tuple of (x, y) arrays with at most `width` points.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method: {method}")
+
+    numeric_x = x.view(np.int64) if np.issubdtype(x.dtype, np.datetime64) else x
+    indices = METHODS[method](numeric_x, y, width)
+    return x[indices], y[indices]
@@ -0,0 +1,333 @@
+"""Streaming export of sensor records.
+
+Exports are generated month by month and streamed to the client, so memory
+use is bounded by one month of data regardless of the size of the export.
+Every month is read with `watersync.sensor.chunks.load_series`, i.e. from a
+server-side cursor over `values_list` and from compressed chunks, straight
+into NumPy arrays without creating model instances.
+
+Supported formats:
+
+    - csv: Plain CSV.
+    - csv.gz: Gzip-compressed CSV, compressed while streaming.
+    - parquet: Apache Parquet with one row group per month.
+    - arrow: Arrow IPC stream with one record batch per month.
+
+Parquet and Arrow output requires pyarrow.
+
+A single deployment is exported as `timestamp, value, unit`. Several
+deployments are exported as a wide table aligned on the union of their
+timestamps, with one value column per deployment and empty cells where a
+deployment has no reading. With a target unit every series is converted
+from the unit of its deployment, see `watersync.sensor.units`. Aligned
+matrices of bucket aggregates (see `watersync.sensor.matrix`) are written
+with the same writers.
+"""
+
+import io
+import zlib
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from datetime import UTC, date, datetime
+
+import numpy as np
+
+from watersync.sensor.chunks import load_series, series_range
+from watersync.sensor.partitions import add_months
+from watersync.sensor.units import conversion, convert
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    """Output format of an export."""
+
+    content_type: str
+    extension: str
+    writer: Callable
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError(
+            "Parquet and Arrow export requires pyarrow. Please use CSV."
+        ) from e
+    return pa, pq
+
+
+def column_labels(deployments) -> list[str]:
+    """Return unique column names for the value columns of `deployments`."""
+    labels = [f"{d.sensor.identifier}_{d.variable}" for d in deployments]
+    return [
+        f"{label}_{d.pk}" if labels.count(label) > 1 else label
+        for label, d in zip(labels, deployments, strict=True)
+    ]
+
+
+def _month_start(timestamp: datetime) -> datetime:
+    return datetime(timestamp.year, timestamp.month, 1, tzinfo=UTC)
+
+
+def _as_datetime(month: date) -> datetime:
+    return datetime(month.year, month.month, 1, tzinfo=UTC)
+
+
+def _align(timestamps: np.ndarray, series: list[tuple[np.ndarray, np.ndarray]]):
+    """Place every series on the common `timestamps`, NaN where missing."""
+    columns = []
+    for series_timestamps, values in series:
+        column = np.full(len(timestamps), np.nan)
+        column[np.searchsorted(timestamps, series_timestamps)] = values
+        columns.append(column)
+    return columns
+
+
+def iter_batches(
+    deployments, labels, start=None, end=None, loader=load_series
+) -> Iterator[dict[str, np.ndarray]]:
+    """Yield the records of `deployments` month by month as column arrays.
+
+    Args:
+        deployments: Deployments to export, in column order.
+        labels: Column name of every deployment.
+        start: Inclusive lower bound (aware) or None.
+        end: Exclusive upper bound (aware) or None.
+        loader: Function reading a series, with the signature of `load_series`.
+
+    Yields:
+        Dicts with a "timestamp" datetime64[ms] array and one float64 array
+        per deployment, keyed by its label.
+    """
+    ranges = [series_range(deployment.pk) for deployment in deployments]
+    firsts = [first for first, _ in ranges if first is not None]
+    if not firsts:
+        return
+    first = max(min(firsts), start) if start else min(firsts)
+    last = max(last for _, last in ranges if last is not None)
+    if end:
+        last = min(last, end)
+
+    month = _month_start(first).date()
+    while _as_datetime(month) <= last:
+        window_start = max(_as_datetime(month), first)
+        window_end = _as_datetime(add_months(month, 1))
+        if end:
+            window_end = min(window_end, end)
+        month = add_months(month, 1)
+
+        series = [
+            loader(deployment.pk, window_start, window_end)
+            for deployment in deployments
+        ]
+        if len(series) == 1:
+            timestamps, values = series[0]
+            columns = [values]
+        else:
+            timestamps = np.unique(np.concatenate([ts for ts, _ in series]))
+            columns = _align(timestamps, series)
+
+        if len(timestamps):
+            yield {"timestamp": timestamps, **dict(zip(labels, columns, strict=True))}
+
+
+def _format_value(value: float) -> str:
+    return "" if np.isnan(value) else f"{value:.3f}"
+
+
+def write_csv(batches, columns, constants) -> Iterator[bytes]:
+    """Write batches as CSV lines."""
+    yield (",".join(["timestamp", *columns, *constants]) + "\n").encode()
+    suffix = "".join(f",{value}" for value in constants.values())
+
+    for batch in batches:
+        timestamps = np.datetime_as_string(
+            batch["timestamp"], unit="ms", timezone="UTC"
+        )
+        rows = zip(timestamps, *(batch[column] for column in columns), strict=True)
+        yield "".join(
+            ",".join([timestamp, *map(_format_value, values)]) + suffix + "\n"
+            for timestamp, *values in rows
+        ).encode()
+
+
+def write_csv_gz(batches, columns, constants) -> Iterator[bytes]:
+    """Write batches as gzip-compressed CSV."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for data in write_csv(batches, columns, constants):
+        compressed = compressor.compress(data)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+class _StreamSink(io.RawIOBase):
+    """Write-only file that hands out what was written since the last drain.
+
+    Writers like Parquet record file offsets, so the position keeps growing
+    although the data is released.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def _arrow_table(pa, schema, batch, columns, constants):
+    size = len(batch["timestamp"])
+    return pa.table(
+        [
+            pa.array(batch["timestamp"], type=schema.field("timestamp").type),
+            *(pa.array(batch[column], from_pandas=True) for column in columns),
+            *(
+                pa.array([value] * size, type=pa.string())
+                for value in constants.values()
+            ),
+        ],
+        schema=schema,
+    )
+
+
+def _arrow_schema(pa, columns, constants):
+    return pa.schema(
+        [
+            ("timestamp", pa.timestamp("ms", tz="UTC")),
+            *((column, pa.float64()) for column in columns),
+            *((name, pa.string()) for name in constants),
+        ]
+    )
+
+
+def write_parquet(batches, columns, constants) -> Iterator[bytes]:
+    """Write batches as a Parquet file with one row group per batch."""
+    pa, pq = _require_pyarrow()
+    schema = _arrow_schema(pa, columns, constants)
+    sink = _StreamSink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for batch in batches:
+            writer.write_table(_arrow_table(pa, schema, batch, columns, constants))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def write_arrow(batches, columns, constants) -> Iterator[bytes]:
+    """Write batches as an Arrow IPC stream."""
+    pa, _ = _require_pyarrow()
+    schema = _arrow_schema(pa, columns, constants)
+    sink = _StreamSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in batches:
+            writer.write_table(_arrow_table(pa, schema, batch, columns, constants))
+            yield sink.drain()
+    yield sink.drain()
+
+
+FORMATS = {
+    "csv": ExportFormat("text/csv", "csv", write_csv),
+    "csv.gz": ExportFormat("application/gzip", "csv.gz", write_csv_gz),
+    "parquet": ExportFormat("application/vnd.apache.parquet", "parquet", write_parquet),
+    "arrow": ExportFormat("application/vnd.apache.arrow.stream", "arrows", write_arrow),
+}
+
+
+def export_records(
+    deployments,
+    format="csv",
+    start=None,
+    end=None,
+    loader=load_series,
+    unit=None,
+    target_unit=None,
+) -> Iterator[bytes]:
+    """Stream the records of one or more deployments in `format`.
+
+    Args:
+        deployments: Deployments to export. One deployment gives
+            `timestamp, value, unit`, several an aligned wide table.
+        format: Key of FORMATS.
+        start: Inclusive lower bound (aware) or None.
+        end: Exclusive upper bound (aware) or None.
+        loader: Function reading a series, e.g. a derived series like
+            `watersync.sensor.compensation.water_level_series`.
+        unit: Unit of a single exported series, defaults to the deployment's.
+        target_unit: Unit to convert the values to, or None to keep them.
+
+    Raises:
+        ValueError: If the format is unknown or the values cannot be
+            converted to `target_unit`.
+        ImportError: If the format needs pyarrow and it is not installed.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown export format: {format}")
+    if FORMATS[format].writer in (write_parquet, write_arrow):
+        _require_pyarrow()
+
+    deployments = list(deployments)
+    if len(deployments) == 1:
+        units = {deployments[0].pk: unit or deployments[0].unit}
+    else:
+        units = {deployment.pk: deployment.unit for deployment in deployments}
+
+    if target_unit:
+        # Checked up front, the batches are only read while streaming
+        for source in units.values():
+            conversion(source, target_unit)
+        read = loader
+
+        def loader(deployment_id, start, end):
+            timestamps, values = read(deployment_id, start, end)
+            return timestamps, convert(values, units[deployment_id], target_unit)
+
+    if len(deployments) == 1:
+        columns, constants = (
+            ["value"],
+            {"unit": target_unit or units[deployments[0].pk]},
+        )
+    else:
+        columns, constants = column_labels(deployments), {}
+
+    batches = iter_batches(deployments, columns, start, end, loader)
+    return FORMATS[format].writer(batches, columns, constants)
+
+
+def export_matrix(matrix, deployments, format="csv") -> Iterator[bytes]:
+    """Stream an aligned matrix of `deployments` in `format`.
+
+    Args:
+        matrix: An `watersync.sensor.matrix.AlignedMatrix`; its timestamps
+            are the bucket starts.
+        deployments: The deployments of the matrix columns, in column order.
+        format: Key of FORMATS.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown export format: {format}")
+    if FORMATS[format].writer in (write_parquet, write_arrow):
+        _require_pyarrow()
+
+    deployments = list(deployments)
+    labels = column_labels(deployments)
+    batch = {
+        "timestamp": matrix.timestamps,
+        **{
+            label: matrix.columns[d.pk]
+            for label, d in zip(labels, deployments, strict=True)
+        },
+    }
+    return FORMATS[format].writer([batch], labels, {})
@@ -0,0 +1,338 @@
+"""Streaming parsers of logger export formats.
+
+Besides our own CSV with `timestamp`, `value` (or one column per variable),
+`location` and `sensor` columns, uploads can be the native exports of common loggers:
+
+    - xle: Solinst Levelogger XML. Parsed incrementally with `iterparse`;
+      processed <Log> elements are dropped right away.
+    - diver: van Essen Diver .MON files and Diver .CSV exports, a block of
+      header lines followed by the data rows.
+    - hobo: Onset HOBOware CSV exports, a mapped CSV with a fixed profile.
+    - mapped: Any multi-column CSV, with the timestamp and value columns,
+      the timestamp format and the header position given as options.
+
+Every format yields raw chunks of `timestamp` and `value` strings, shaped
+like `watersync.sensor.ingest.iter_chunks`, and names the format of its
+timestamps for `clean_chunk`. Only one chunk is held in memory at a time.
+Logger files carry no location or sensor, so they are imported into the
+deployment they are uploaded to.
+
+Typical usage:
+
+    >>> logger_format = get_format("xle", {"channel": 2})
+    >>> for raw_chunk in logger_format.iter_chunks(file):
+    ...     ingest_chunk(
+    ...         deployment, raw_chunk, timestamp_format=logger_format.timestamp_format
+    ...     )
+"""
+
+import io
+import itertools
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+
+import pandas as pd
+
+from watersync.sensor.ingest import (
+    DEFAULT_CHUNK_SIZE,
+    RECORD_COLUMNS,
+    SensorFileError,
+    iter_chunks,
+    read_header,
+    variable_columns,
+)
+
+# Bytes read to recognise a file
+SNIFF_SIZE = 64 * 1024
+
+
+class LoggerFormat(ABC):
+    """Base of the logger formats.
+
+    Subclasses implement `iter_chunks`, reading the file in chunks with
+    pandas, or derive from `RowFormat` to yield the readings one by one.
+
+    Attributes:
+        name: Key of the format in FORMAT_CLASSES, one of
+            `SensorImportJob.Formats`.
+        timestamp_format: strptime format of the timestamps, or None to
+            infer it from the file.
+    """
+
+    name = ""
+    timestamp_format: str | None = None
+
+    def __init__(self, **options):
+        self.options = options
+
+    @abstractmethod
+    def check(self, file) -> None:
+        """Raise SensorFileError if the file is not in this format, then rewind."""
+
+    @abstractmethod
+    def iter_chunks(
+        self, file, chunk_size: int = DEFAULT_CHUNK_SIZE, skip_rows: int = 0
+    ) -> Iterator[pd.DataFrame]:
+        """Yield raw chunks of `timestamp` and `value` strings.
+
+        Args:
+            file: Binary file-like object.
+            chunk_size: Rows per chunk.
+            skip_rows: Data rows to skip, to resume an interrupted import.
+        """
+
+
+class RowFormat(LoggerFormat):
+    """Base of the formats parsed reading by reading, e.g. XML exports."""
+
+    @abstractmethod
+    def rows(self, file) -> Iterator[tuple[str, str]]:
+        """Yield raw (timestamp, value) string pairs."""
+
+    def iter_chunks(self, file, chunk_size=DEFAULT_CHUNK_SIZE, skip_rows=0):
+        rows = itertools.islice(self.rows(file), skip_rows, None)
+        while batch := list(itertools.islice(rows, chunk_size)):
+            yield pd.DataFrame(batch, columns=RECORD_COLUMNS)
+
+
+def _sniff(file) -> bytes:
+    try:
+        return file.read(SNIFF_SIZE)
+    finally:
+        file.seek(0)
+
+
+def _text(file, encoding: str):
+    """Iterate over the lines of a binary file without closing it afterwards."""
+    wrapper = io.TextIOWrapper(file, encoding=encoding, errors="replace", newline="")
+    try:
+        # Not `yield from`, which would close the wrapper and the file
+        for line in wrapper:  # noqa: UP028
+            yield line
+    finally:
+        wrapper.detach()
+
+
+class WatersyncCSV(LoggerFormat):
+    """Our own CSV format, see `watersync.sensor.ingest`.
+
+    Options:
+        columns: Column of every deployment pk, for multi-variable files
+            fanned out by `ingest_columns`. Only `value` is read otherwise.
+    """
+
+    name = "csv"
+
+    def check(self, file):
+        columns = read_header(file, required=["timestamp", "location", "sensor"])
+        if "value" not in columns and not variable_columns(columns):
+            raise SensorFileError("Missing required column: value")
+
+    def iter_chunks(self, file, chunk_size=DEFAULT_CHUNK_SIZE, skip_rows=0):
+        value_columns = list((self.options.get("columns") or {}).values()) or ["value"]
+        return iter_chunks(file, chunk_size, skip_rows, value_columns)
+
+
+class SolinstXLE(RowFormat):
+    """Solinst Levelogger .xle export.
+
+    Every reading is a <Log> element with <Date>, <Time>, <ms> and one
+    <chN> element per channel.
+
+    Options:
+        channel: Channel to import, 1 (level) by default.
+    """
+
+    name = "xle"
+    timestamp_format = "%Y/%m/%d %H:%M:%S.%f"
+
+    def check(self, file):
+        if b"<Body_xle" not in _sniff(file):
+            raise SensorFileError("The file is not a Solinst .xle export.")
+
+    def rows(self, file):
+        channel = f"ch{int(self.options.get('channel') or 1)}"
+        parent = None
+        try:
+            for event, element in ET.iterparse(file, events=("start", "end")):
+                if event == "start":
+                    if element.tag == "Data":
+                        parent = element
+                    continue
+                if element.tag != "Log":
+                    continue
+                date = (element.findtext("Date") or "").replace("-", "/")
+                milliseconds = int(element.findtext("ms") or 0)
+                timestamp = f"{date} {element.findtext('Time')}.{milliseconds:03d}"
+                yield timestamp, element.findtext(channel)
+                # Drop the processed readings to keep the tree small
+                if parent is not None:
+                    parent.clear()
+        except ET.ParseError as e:
+            raise SensorFileError(f"Error parsing .xle file: {e!s}") from e
+
+
+class DiverExport(RowFormat):
+    """van Essen Diver .MON file or Diver .CSV export.
+
+    .MON files list the readings after a `[Data]` line and a line with
+    their number, separated by whitespace. .CSV exports have a
+    `Date/time` header line followed by delimited rows. Both start with a
+    block of logger and channel settings and end with an `END OF DATA`
+    line. Decimal commas are accepted in semicolon-delimited files.
+
+    Options:
+        channel: Channel to import, 1 (pressure) by default.
+    """
+
+    name = "diver"
+    timestamp_format = "%Y/%m/%d %H:%M:%S.%f"
+
+    def check(self, file):
+        head = _sniff(file)
+        if b"[Data]" not in head and b"Date/time" not in head:
+            raise SensorFileError("The file is not a Diver .MON or .CSV export.")
+
+    def rows(self, file):
+        channel = int(self.options.get("channel") or 1)
+        lines = _text(file, "latin-1")
+        for line in lines:
+            if line.strip() == "[Data]":
+                next(lines, None)  # Number of readings
+                delimiter = None  # Whitespace
+                break
+            if line.startswith("Date/time"):
+                delimiter = ";" if ";" in line else ","
+                break
+        else:
+            raise SensorFileError("The file contains no data section.")
+
+        for line in lines:
+            if line.startswith("END OF DATA"):
+                break
+            fields = line.strip().split(delimiter)
+            if len(fields) < 2:
+                continue
+            if delimiter is None:
+                # Whitespace separates the date and the time as well
+                fields = [f"{fields[0]} {fields[1]}", *fields[2:]]
+            timestamp = fields[0]
+            if "." not in timestamp.rpartition(" ")[2]:
+                timestamp += ".0"
+            value = fields[channel] if len(fields) > channel else ""
+            yield timestamp, value.replace(",", ".")
+
+
+class MappedCSV(LoggerFormat):
+    """Multi-column CSV with a column mapping.
+
+    Options:
+        timestamp: Timestamp column, by name or 0-based position. A list of
+            columns is joined with spaces, e.g. separate date and time.
+        value: Value column, by name or 0-based position.
+        timestamp_format: strptime format of the joined timestamp, or empty
+            to infer it from the file.
+        skip_lines: Lines before the header line.
+        delimiter: Field delimiter, "," by default.
+        decimal: Decimal separator, "." by default.
+        encoding: Text encoding, "utf-8" by default.
+    """
+
+    name = "mapped"
+    defaults = {}
+
+    def __init__(self, **options):
+        given = {
+            key: value for key, value in options.items() if value not in (None, "")
+        }
+        options = {**self.defaults, **given}
+        super().__init__(**options)
+        self.timestamp_format = options.get("timestamp_format") or None
+        columns = options.get("timestamp")
+        self.timestamp_columns = columns if isinstance(columns, list) else [columns]
+        self.value_column = options.get("value")
+        if None in self.timestamp_columns or self.value_column is None:
+            raise SensorFileError("The timestamp and value columns must be mapped.")
+
+    def _read(self, file, **kwargs):
+        skip_lines = int(self.options.get("skip_lines") or 0)
+        skip_rows = kwargs.pop("skip_rows", 0)
+        return pd.read_csv(
+            file,
+            sep=self.options.get("delimiter") or ",",
+            encoding=self.options.get("encoding") or "utf-8",
+            header=0,
+            dtype=str,
+            skiprows=[
+                *range(skip_lines),
+                *range(skip_lines + 1, skip_lines + 1 + skip_rows),
+            ],
+            **kwargs,
+        )
+
+    def _column(self, chunk, column) -> pd.Series:
+        if isinstance(column, int) or str(column).isdigit():
+            return chunk.iloc[:, int(column)]
+        return chunk[column]
+
+    def check(self, file):
+        try:
+            header = self._read(file, nrows=0)
+            for column in [*self.timestamp_columns, self.value_column]:
+                self._column(header, column)
+        except (KeyError, IndexError) as e:
+            raise SensorFileError(f"Missing mapped column: {e!s}") from e
+        except (ValueError, pd.errors.ParserError) as e:
+            raise SensorFileError(f"Error parsing CSV file: {e!s}") from e
+        finally:
+            file.seek(0)
+
+    def iter_chunks(self, file, chunk_size=DEFAULT_CHUNK_SIZE, skip_rows=0):
+        decimal = self.options.get("decimal") or "."
+        with self._read(file, chunksize=chunk_size, skip_rows=skip_rows) as reader:
+            for chunk in reader:
+                parts = [
+                    self._column(chunk, column) for column in self.timestamp_columns
+                ]
+                timestamps = (
+                    parts[0].str.cat(parts[1:], sep=" ") if len(parts) > 1 else parts[0]
+                )
+                values = self._column(chunk, self.value_column)
+                if decimal != ".":
+                    values = values.str.replace(decimal, ".", regex=False)
+                yield pd.DataFrame(
+                    {"timestamp": timestamps.values, "value": values.values}
+                )
+
+
+class HoboCSV(MappedCSV):
+    """Onset HOBOware CSV export: a title line, then `#`, date-time and
+    measurement columns with US-style 12-hour timestamps."""
+
+    name = "hobo"
+    defaults = {
+        "skip_lines": 1,
+        "timestamp": 1,
+        "value": 2,
+        "timestamp_format": "%m/%d/%y %I:%M:%S %p",
+    }
+
+
+FORMAT_CLASSES = {
+    format_class.name: format_class
+    for format_class in (WatersyncCSV, SolinstXLE, DiverExport, HoboCSV, MappedCSV)
+}
+
+
+def get_format(name: str = "csv", options: dict | None = None) -> LoggerFormat:
+    """Return the parser of a logger format.
+
+    Raises:
+        SensorFileError: If the format is unknown or its options are invalid.
+    """
+    try:
+        format_class = FORMAT_CLASSES[name]
+    except KeyError as e:
+        raise SensorFileError(f"Unknown file format: {name}") from e
+    return format_class(**(options or {}))
@@ -2,8 +2,6 @@ import json
 
 from django import forms
 
-import pandas as pd
-
 from watersync.core.config import (
     get_sensor_unit_choices,
     get_variable_choices,
@@ -12,7 +10,9 @@ from watersync.core.config import (
     is_valid_unit_for_variable,
 )
 from watersync.core.generics.forms import WatersyncForm
-from watersync.sensor.models import Deployment, Sensor
+from watersync.sensor.formats import get_format
+from watersync.sensor.ingest import SensorFileError
+from watersync.sensor.models import Deployment, Sensor, SensorImportJob
 
 
 class SensorForm(WatersyncForm):
@@ -69,7 +69,16 @@ class DeploymentForm(WatersyncForm):
 
     class Meta:
         model = Deployment
-        fields = ["sensor", "location", "type", "variable", "unit", "started_at", "ended_at"]
+        fields = [
+            "sensor",
+            "location",
+            "type",
+            "variable",
+            "unit",
+            "started_at",
+            "ended_at",
+            "timezone",
+        ]
         widgets = {
             "started_at": forms.DateTimeInput(attrs={"type": "datetime-local"}),
             "ended_at": forms.DateTimeInput(attrs={"type": "datetime-local"}),
@@ -107,35 +116,78 @@ class DeploymentForm(WatersyncForm):
 
 
 class SensorRecordForm(forms.Form):
-    """Form for uploading sensor data with a time zone selection."""
-
-    csv_file = forms.FileField(help_text="Upload a CSV file")
-    # time_zone = forms.TypedChoiceField(
-    #     choices=[(tz, tz) for tz in sorted(zoneinfo.available_timezones())],
-    #     coerce=str,
-    #     initial="Europe/Belgium"
-    # )
-
-    def clean_csv_file(self):
-        # Get the cleaned data from the form fields
-        csv_file = self.cleaned_data["csv_file"]
-        # time_zone_str = self.cleaned_data['time_zone']
+    """Form for uploading sensor data.
+
+    Only the header of the file is checked here. The rows themselves are
+    streamed into the database by `watersync.sensor.ingest`, so the file is
+    never loaded into memory as a whole. Logger exports are read by the
+    parser of their format, see `watersync.sensor.formats`; the channel and
+    column fields are their options. Timestamps without an offset are read
+    in the time zone of the deployment.
+    """
 
-        try:
-            df = pd.read_csv(csv_file)
-        except Exception as e:
-            raise forms.ValidationError(f"Error parsing CSV file: {e!s}")
+    csv_file = forms.FileField(help_text="Upload a CSV file or logger export")
+    format = forms.ChoiceField(
+        choices=SensorImportJob.Formats.choices,
+        initial=SensorImportJob.Formats.CSV,
+    )
+    channel = forms.IntegerField(
+        required=False,
+        min_value=1,
+        help_text="Channel of Solinst and Diver files, 1 by default",
+    )
+    timestamp_column = forms.CharField(
+        required=False,
+        help_text=(
+            "Column name or 0-based position; "
+            "separate date and time columns with commas"
+        ),
+    )
+    value_column = forms.CharField(
+        required=False, help_text="Column name or 0-based position"
+    )
+    timestamp_format = forms.CharField(
+        required=False,
+        help_text="e.g. %Y-%m-%d %H:%M:%S, inferred from the file if empty",
+    )
+    skip_lines = forms.IntegerField(
+        required=False, min_value=0, help_text="Lines before the header line"
+    )
+    delimiter = forms.CharField(required=False, max_length=1)
+
+    def get_options(self) -> dict:
+        """Return the options of the selected format from the cleaned data."""
+        data = self.cleaned_data
+        if data["format"] in (
+            SensorImportJob.Formats.XLE,
+            SensorImportJob.Formats.DIVER,
+        ):
+            return {"channel": data.get("channel")}
+        if data["format"] != SensorImportJob.Formats.MAPPED:
+            return {}
+        timestamp = [
+            column.strip() for column in data.get("timestamp_column", "").split(",")
+        ]
+        return {
+            "timestamp": timestamp if len(timestamp) > 1 else timestamp[0] or None,
+            "value": data.get("value_column") or None,
+            "timestamp_format": data.get("timestamp_format"),
+            "skip_lines": data.get("skip_lines"),
+            "delimiter": data.get("delimiter"),
+        }
 
-        required_columns = ["timestamp", "value", "unit", "type"]
-        for col in required_columns:
-            if col not in df.columns:
-                raise forms.ValidationError(f"Missing required column: {col}")
+    def clean(self):
+        cleaned_data = super().clean()
+        csv_file = cleaned_data.get("csv_file")
+        if csv_file is None or "format" not in cleaned_data:
+            return cleaned_data
 
         try:
-            df["timestamp"] = pd.to_datetime(df["timestamp"])
+            cleaned_data["logger_format"] = get_format(
+                cleaned_data["format"], self.get_options()
+            )
+            cleaned_data["logger_format"].check(csv_file)
+        except SensorFileError as e:
+            self.add_error("csv_file", str(e))
 
-            df["timestamp"] = df["timestamp"].dt.tz_localize("UTC")
-        except Exception as e:
-            raise forms.ValidationError(f"Error processing timestamps: {e!s}")
-
-        return df
+        return cleaned_data
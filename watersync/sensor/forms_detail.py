@@ -13,7 +13,7 @@ class PressureSensorDeploymentDetailForm(ModelForm):
 
     class Meta:
         model = PressureSensorDeploymentDetail
-        fields = ["installation_elevation"]
+        fields = ["installation_elevation", "barometer", "fluid_density"]
 
 
 # Mapping from deployment type to detail form class
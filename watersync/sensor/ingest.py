@@ -0,0 +1,521 @@
+"""Streaming ingestion of sensor record files.
+
+Logger exports can run to millions of rows, so the upload is never loaded
+into memory as a whole. The file is read in chunks, each chunk is parsed and
+validated on its own, and the valid rows are written to the database in
+fixed-size batches by a loader from `watersync.sensor.loaders` (PostgreSQL
+COPY by default). Memory use is bounded by the chunk size rather than by the
+size of the file.
+
+Logger files are usually downloaded cumulatively, so a new file repeats the
+records of the previous ones. Chunks that overlap the stored time range of
+the deployment are compared with the stored timestamps first, and the rows
+already stored are dropped before they reach the loader; chunks after the
+stored range go to the loader without a check.
+
+Multi-variable loggers write several value columns into one file. Instead
+of a `value` column such files have one column per variable named like
+"temperature (degC)", and every column is fanned out to the deployment of
+the sensor and location measuring that variable in that unit, see
+`resolve_columns` and `ingest_columns`. The file is still read once.
+
+Typical usage:
+
+    >>> result = ingest_sensor_file(uploaded_file, deployment, user=request.user)
+    >>> result.rows_per_second
+"""
+
+import logging
+import re
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.db import connection
+
+import numpy as np
+import pandas as pd
+
+from watersync.sensor.chunks import (
+    compacted_timestamps,
+    has_chunks,
+    load_series,
+    series_range,
+)
+from watersync.sensor.loaders import LoadResult, get_loader
+from watersync.sensor.models import Deployment
+from watersync.sensor.rollups import refresh_rollups
+from watersync.sensor.timestamps import infer_format, parse_timestamps
+
+logger = logging.getLogger(__name__)
+
+# Columns of an uploaded file. Location and sensor resolve the deployment
+# and are not needed when the deployment is given explicitly.
+RECORD_COLUMNS = ["timestamp", "value"]
+REQUIRED_COLUMNS = [*RECORD_COLUMNS, "location", "sensor"]
+
+# Value columns of multi-variable files, e.g. "temperature (degC)"
+VALUE_COLUMN_PATTERN = re.compile(r"\s*(?P<variable>\w+)\s*\((?P<unit>[^()]+)\)\s*")
+
+# Rows read from the file at once. Bounds the memory used by the pipeline.
+DEFAULT_CHUNK_SIZE = 50_000
+# Rows sent to the database in a single load.
+DEFAULT_BATCH_SIZE = 5_000
+
+# Stored timestamps of a span in epoch milliseconds, as one array in one
+# row, which is about twice as fast to read as a row per timestamp
+STORED_TIMESTAMPS_SQL = """
+    SELECT array_agg((EXTRACT(EPOCH FROM "timestamp") * 1000)::bigint)
+    FROM sensor_sensorrecord
+    WHERE deployment_id = %s
+        AND "timestamp" >= %s AND "timestamp" < %s
+        AND NOT is_deleted
+"""
+
+
+class SensorFileError(ValueError):
+    """Raised when an uploaded sensor file cannot be ingested."""
+
+
+@dataclass
+class IngestResult:
+    """Summary of a finished ingest run.
+
+    Attributes:
+        rows_parsed: Rows read from the file.
+        rows_inserted: Valid rows that were new and got inserted.
+        rows_skipped: Valid rows skipped because (deployment, timestamp)
+            already existed.
+        rows_covered: Part of rows_skipped found in the stored records
+            before loading, see `drop_stored`.
+        rows_rejected: Rows dropped because the timestamp or value was invalid.
+        elapsed: Wall-clock duration of the run in seconds.
+    """
+
+    rows_parsed: int = 0
+    rows_inserted: int = 0
+    rows_skipped: int = 0
+    rows_covered: int = 0
+    rows_rejected: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        """Throughput of the run in parsed rows per second."""
+        if not self.elapsed:
+            return 0.0
+        return self.rows_parsed / self.elapsed
+
+    def __add__(self, other):
+        return IngestResult(
+            rows_parsed=self.rows_parsed + other.rows_parsed,
+            rows_inserted=self.rows_inserted + other.rows_inserted,
+            rows_skipped=self.rows_skipped + other.rows_skipped,
+            rows_covered=self.rows_covered + other.rows_covered,
+            rows_rejected=self.rows_rejected + other.rows_rejected,
+            elapsed=self.elapsed + other.elapsed,
+        )
+
+    def __str__(self) -> str:
+        return (
+            f"{self.rows_parsed} rows parsed, {self.rows_inserted} inserted, "
+            f"{self.rows_skipped} skipped ({self.rows_covered} already covered), "
+            f"{self.rows_rejected} rejected ({self.rows_per_second:,.0f} rows/s)"
+        )
+
+
+def read_header(file, required: list[str] = REQUIRED_COLUMNS) -> list[str]:
+    """Return the column names of a CSV file and rewind it.
+
+    Raises:
+        SensorFileError: If the file cannot be parsed or misses required columns.
+    """
+    try:
+        columns = list(pd.read_csv(file, nrows=0).columns)
+    except Exception as e:
+        raise SensorFileError(f"Error parsing CSV file: {e!s}") from e
+    finally:
+        file.seek(0)
+
+    for col in required:
+        if col not in columns:
+            raise SensorFileError(f"Missing required column: {col}")
+    return columns
+
+
+def resolve_deployment(file) -> Deployment:
+    """Resolve the deployment from the location and sensor of the first row.
+
+    Raises:
+        Deployment.DoesNotExist: If no deployment matches the first row.
+    """
+    try:
+        first_row = pd.read_csv(file, nrows=1, usecols=["location", "sensor"])
+    finally:
+        file.seek(0)
+
+    if first_row.empty:
+        raise SensorFileError("The file does not contain any records.")
+
+    return Deployment.objects.get(
+        location__name=first_row.iloc[0]["location"],
+        sensor__identifier=first_row.iloc[0]["sensor"],
+    )
+
+
+def variable_columns(columns: list[str]) -> dict[str, tuple[str, str]]:
+    """Return the (variable, unit) of the value columns of a multi-variable file."""
+    variables = {}
+    for column in columns:
+        match = VALUE_COLUMN_PATTERN.fullmatch(column)
+        if match:
+            variables[column] = (match["variable"], match["unit"].strip())
+    return variables
+
+
+def resolve_columns(file) -> dict[str, Deployment]:
+    """Resolve the deployment of every value column of a file.
+
+    A file with a `value` column goes to the deployment of the location and
+    sensor of its first row, see `resolve_deployment`. In a multi-variable
+    file every "variable (unit)" column goes to the deployment of that
+    location and sensor with that variable and unit; the latest started
+    wins if there are several.
+
+    Returns:
+        Dict of value column to deployment, in the order of the columns.
+
+    Raises:
+        SensorFileError: If the file has no value column, or a column has
+            no matching deployment.
+        Deployment.DoesNotExist: If no deployment matches a single-variable file.
+    """
+    columns = read_header(file, required=["timestamp", "location", "sensor"])
+    if "value" in columns:
+        return {"value": resolve_deployment(file)}
+    variables = variable_columns(columns)
+    if not variables:
+        raise SensorFileError("Missing required column: value")
+
+    try:
+        first_row = pd.read_csv(file, nrows=1, usecols=["location", "sensor"])
+    finally:
+        file.seek(0)
+    if first_row.empty:
+        raise SensorFileError("The file does not contain any records.")
+    location, sensor = first_row.iloc[0]["location"], first_row.iloc[0]["sensor"]
+
+    deployments = {}
+    candidates = Deployment.objects.filter(
+        location__name=location, sensor__identifier=sensor
+    ).order_by("-started_at")
+    for deployment in candidates:
+        deployments.setdefault((deployment.variable, deployment.unit), deployment)
+
+    resolved = {}
+    for column, key in variables.items():
+        if key not in deployments:
+            raise SensorFileError(
+                f"No deployment of {sensor} at {location} measures {column}."
+            )
+        resolved[column] = deployments[key]
+    return resolved
+
+
+def iter_chunks(
+    file,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    skip_rows: int = 0,
+    value_columns=("value",),
+) -> Iterator[pd.DataFrame]:
+    """Yield raw chunks of the timestamp and value columns of a CSV file.
+
+    Args:
+        file: File-like object.
+        chunk_size: Rows per chunk.
+        skip_rows: Data rows to skip at the start of the file, used to resume
+            an interrupted import from its checkpoint.
+        value_columns: Value columns to read, several for multi-variable files.
+    """
+    reader = pd.read_csv(
+        file,
+        usecols=["timestamp", *value_columns],
+        dtype=str,
+        chunksize=chunk_size,
+        skiprows=range(1, skip_rows + 1) if skip_rows else None,
+    )
+    with reader:
+        yield from reader
+
+
+def clean_chunk(
+    chunk: pd.DataFrame, timestamp_format: str | None = None, timezone: str = "UTC"
+) -> tuple[pd.DataFrame, int]:
+    """Parse and validate a raw chunk.
+
+    Timestamps are parsed in one pass with `timestamp_format`, inferred from
+    the chunk if not given, see `watersync.sensor.timestamps`. Timestamps
+    without an offset are read in `timezone`. Rows with an unparseable
+    timestamp or value are dropped, as are repeated timestamps within the
+    chunk.
+
+    Returns:
+        Tuple of (clean chunk with `timestamp` and `value` columns, number
+        of rejected rows).
+    """
+    timestamps = parse_timestamps(chunk["timestamp"], timestamp_format, timezone)
+    return clean_values(timestamps, chunk["value"])
+
+
+def clean_values(timestamps: pd.Series, values: pd.Series) -> tuple[pd.DataFrame, int]:
+    """Pair parsed timestamps with a column of raw values, see `clean_chunk`."""
+    clean = pd.DataFrame(
+        {
+            "timestamp": timestamps,
+            "value": pd.to_numeric(values, errors="coerce"),
+        }
+    ).dropna()
+    clean = clean.drop_duplicates(subset="timestamp", keep="first")
+
+    return clean, len(values) - len(clean)
+
+
+def drop_stored(
+    deployment_id, chunk: pd.DataFrame, coverage=None
+) -> tuple[pd.DataFrame, int]:
+    """Drop the rows of a clean chunk whose timestamps are already stored.
+
+    Chunks entirely outside the stored (first, last) range of the deployment
+    are returned as they are, without a query. Otherwise the stored
+    timestamps within the span of the chunk are read once and matched in
+    NumPy: as a single array when they are all rows, through `load_series`
+    when compressed chunks overlap the span. A chunk that is fully covered
+    comes back empty.
+
+    Args:
+        deployment_id: Primary key of the deployment.
+        chunk: Clean chunk from `clean_chunk`.
+        coverage: (first, last) from `series_range`, queried if None.
+
+    Returns:
+        Tuple of (remaining rows, number of dropped rows).
+    """
+    if chunk.empty:
+        return chunk, 0
+    first, last = coverage or series_range(deployment_id)
+    start = chunk["timestamp"].min().to_pydatetime()
+    end = chunk["timestamp"].max().to_pydatetime()
+    if first is None or end < first or start > last:
+        return chunk, 0
+
+    stop = end + timedelta(milliseconds=1)
+    if has_chunks(deployment_id, start, stop):
+        stored, _ = load_series(deployment_id, start, stop)
+    else:
+        with connection.cursor() as cursor:
+            cursor.execute(STORED_TIMESTAMPS_SQL, [deployment_id, start, stop])
+            (stored,) = cursor.fetchone()
+        if not stored:
+            return chunk, 0
+        stored = np.array(stored, dtype=np.int64).view("datetime64[ms]")
+
+    timestamps = (
+        chunk["timestamp"].dt.tz_convert(None).to_numpy().astype("datetime64[ms]")
+    )
+    new = ~np.isin(timestamps, stored)
+    return chunk[new], int(len(chunk) - new.sum())
+
+
+def drop_compacted(deployment_id, chunk: pd.DataFrame) -> tuple[pd.DataFrame, int]:
+    """Drop the rows of a clean chunk whose timestamps are compacted.
+
+    Compacted records live in `SensorRecordChunk` rows, outside the
+    (deployment, timestamp) unique constraint of the record table. Writers
+    that rely on the constraint to skip repeated readings, like the
+    telemetry push, call this first. Only the compressed chunks overlapping
+    the span of the chunk are read, usually none for recent readings.
+
+    Returns:
+        Tuple of (remaining rows, number of dropped rows).
+    """
+    if chunk.empty:
+        return chunk, 0
+    compacted = compacted_timestamps(
+        deployment_id,
+        chunk["timestamp"].min().to_pydatetime(),
+        chunk["timestamp"].max().to_pydatetime(),
+    )
+    if not len(compacted):
+        return chunk, 0
+    timestamps = (
+        chunk["timestamp"].dt.tz_convert(None).to_numpy().astype("datetime64[ms]")
+    )
+    new = ~np.isin(timestamps.view(np.int64), compacted)
+    return chunk[new], int(len(chunk) - new.sum())
+
+
+def infer_file_format(raw_chunk: pd.DataFrame) -> str:
+    """Infer the timestamp format of a file from its first raw chunk.
+
+    Raises:
+        SensorFileError: If the timestamps match no known format.
+    """
+    try:
+        return infer_format(raw_chunk["timestamp"])
+    except ValueError as e:
+        raise SensorFileError(str(e)) from e
+
+
+def write_batches(
+    deployment: Deployment,
+    chunk: pd.DataFrame,
+    user=None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    loader=None,
+) -> LoadResult:
+    """Write a clean chunk to the database in fixed-size batches.
+
+    Returns:
+        LoadResult with the inserted and skipped row counts.
+    """
+    loader = loader or get_loader()
+    result = LoadResult()
+
+    for start in range(0, len(chunk), batch_size):
+        batch = chunk.iloc[start : start + batch_size]
+        result += loader.load(deployment.pk, batch, user=user)
+
+    return result
+
+
+def load_chunk(
+    deployment: Deployment,
+    chunk: pd.DataFrame,
+    user=None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    loader=None,
+) -> IngestResult:
+    """Load a clean chunk into a deployment.
+
+    Rows already stored are dropped first. The rollups of the time range of
+    the chunk are refreshed afterwards and the derived series fed by the
+    deployment are queued for a refresh.
+
+    Returns:
+        IngestResult with the inserted, skipped and covered row counts.
+    """
+    chunk, covered = drop_stored(deployment.pk, chunk)
+    loaded = write_batches(deployment, chunk, user, batch_size, loader)
+
+    # Bulk loads do not send signals, so the rollups are refreshed here
+    if loaded.inserted:
+        refresh_rollups(
+            deployment.pk,
+            chunk["timestamp"].min().to_pydatetime(),
+            chunk["timestamp"].max().to_pydatetime(),
+        )
+        # Imported here, the derived module writes through this one
+        from watersync.sensor.derived import invalidate
+
+        invalidate(deployment.pk, chunk["timestamp"].min().to_pydatetime())
+    return IngestResult(
+        rows_inserted=loaded.inserted,
+        rows_skipped=loaded.skipped + covered,
+        rows_covered=covered,
+    )
+
+
+def ingest_chunk(
+    deployment: Deployment,
+    raw_chunk: pd.DataFrame,
+    user=None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    loader=None,
+    timestamp_format: str | None = None,
+) -> IngestResult:
+    """Parse, validate and load a single raw chunk.
+
+    Timestamps without an offset are read in the time zone of the
+    deployment. Pass the `timestamp_format` inferred for the whole file,
+    see `infer_file_format`; otherwise it is inferred per chunk.
+
+    Returns:
+        IngestResult with the row counts of this chunk.
+    """
+    chunk, rejected = clean_chunk(raw_chunk, timestamp_format, deployment.timezone)
+    result = load_chunk(deployment, chunk, user, batch_size, loader)
+    result.rows_parsed, result.rows_rejected = len(raw_chunk), rejected
+    return result
+
+
+def ingest_columns(
+    columns: dict[str, Deployment],
+    raw_chunk: pd.DataFrame,
+    user=None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    loader=None,
+    timestamp_format: str | None = None,
+) -> IngestResult:
+    """Fan the value columns of a raw chunk out to their deployments.
+
+    The timestamps are parsed once per time zone of the deployments, and
+    every column is loaded before the next chunk is read.
+
+    Args:
+        columns: Deployment of every value column, from `resolve_columns`.
+
+    Returns:
+        IngestResult of the chunk. `rows_parsed` counts the rows of the
+        file, the other counters count values, one per row and column.
+    """
+    result = IngestResult(rows_parsed=len(raw_chunk))
+    timestamps = {}
+    for column, deployment in columns.items():
+        if deployment.timezone not in timestamps:
+            timestamps[deployment.timezone] = parse_timestamps(
+                raw_chunk["timestamp"], timestamp_format, deployment.timezone
+            )
+        chunk, rejected = clean_values(
+            timestamps[deployment.timezone], raw_chunk[column]
+        )
+        result += load_chunk(deployment, chunk, user, batch_size, loader)
+        result.rows_rejected += rejected
+    return result
+
+
+def ingest_sensor_file(
+    file,
+    deployment: Deployment,
+    user=None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    loader=None,
+) -> IngestResult:
+    """Stream a sensor CSV file into the records of a deployment.
+
+    Args:
+        file: File-like object with at least `timestamp` and `value` columns.
+        deployment: The deployment the records belong to.
+        user: The user recorded as creator of the records.
+        chunk_size: Rows read and parsed at once.
+        batch_size: Rows per load.
+        loader: Loader instance. Defaults to `get_loader()`.
+
+    Returns:
+        IngestResult with row counts and throughput.
+    """
+    loader = loader or get_loader()
+    result = IngestResult()
+    started = time.perf_counter()
+
+    timestamp_format = None
+    for raw_chunk in iter_chunks(file, chunk_size):
+        timestamp_format = timestamp_format or infer_file_format(raw_chunk)
+        result += ingest_chunk(
+            deployment, raw_chunk, user, batch_size, loader, timestamp_format
+        )
+
+    result.elapsed = time.perf_counter() - started
+    logger.info("Ingested sensor file into deployment %s: %s", deployment.pk, result)
+    return result
@@ -0,0 +1,141 @@
+"""Live updates of the plots of ongoing deployments.
+
+A deployment without `ended_at` keeps receiving records. Instead of
+reloading the page, which reads and serialises the whole history again,
+the plot asks for the records after its last timestamp and appends them
+with `Plotly.extendTraces`. The updates come either from polling
+`SensorRecordSinceView` or from the websocket at
+`/ws/deployments/<pk>/records/?after=<epoch ms>`, see `stream_records`.
+Both take the `unit=` of the plot, see `watersync.sensor.units`.
+
+The websocket does not re-query on a timer: it checks the cache version of
+the deployment, which `refresh_rollups` bumps on every write, and only
+reads the database when the version changed.
+
+Both send updates shaped like:
+
+    {"x": [<epoch ms>, ...], "y": [<value>, ...], "last": <epoch ms>}
+"""
+
+import asyncio
+import json
+from datetime import UTC, datetime, timedelta
+from http.cookies import SimpleCookie
+from importlib import import_module
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+
+import numpy as np
+from asgiref.sync import sync_to_async
+
+from watersync.core.generics.cache import get_version
+from watersync.sensor.chunks import load_series
+from watersync.sensor.downsampling import DEFAULT_WIDTH, downsample
+from watersync.sensor.models import Deployment
+from watersync.sensor.plotting import epoch_ms
+from watersync.sensor.rollups import CACHE_NAMESPACE
+from watersync.sensor.units import UnitConversionError, conversion, convert
+
+# Seconds between checks for new records, of the websocket and of polling
+POLL_INTERVAL = 30
+
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+def records_since(deployment_id, after: int, width=DEFAULT_WIDTH, units=None) -> dict:
+    """Return the records of a deployment after `after` epoch milliseconds.
+
+    A large backlog, e.g. after an upload, is downsampled to `width` points
+    like the rest of the plot. `units` is a (source, target) pair to
+    convert the values, or None to keep them.
+    """
+    start = EPOCH + timedelta(milliseconds=after + 1)
+    timestamps, values = load_series(deployment_id, start)
+    keep = ~np.isnan(values)
+    timestamps, values = downsample(timestamps[keep], values[keep], width=width)
+    if units is not None:
+        values = convert(values, *units)
+    x = epoch_ms(timestamps).astype(np.int64)
+    return {
+        "x": x.tolist(),
+        "y": values.tolist(),
+        "last": int(x[-1]) if len(x) else after,
+    }
+
+
+# ================ Websocket ========================
+
+
+def _session_user_id(scope):
+    """Return the pk of the user logged in with the session cookie, or None."""
+    cookies = SimpleCookie()
+    for name, value in scope.get("headers", []):
+        if name == b"cookie":
+            cookies.load(value.decode("latin-1"))
+    morsel = cookies.get(settings.SESSION_COOKIE_NAME)
+    if morsel is None:
+        return None
+    engine = import_module(settings.SESSION_ENGINE)
+    return engine.SessionStore(morsel.value).get(SESSION_KEY)
+
+
+def _open_deployment(scope, deployment_id) -> str | None:
+    """Return the unit of the deployment if the connection may follow it, else None."""
+    if _session_user_id(scope) is None:
+        return None
+    return (
+        Deployment.objects.filter(pk=deployment_id, ended_at__isnull=True)
+        .values_list("unit", flat=True)
+        .first()
+    )
+
+
+async def stream_records(scope, receive, send, deployment_id) -> None:
+    """Push the new records of an ongoing deployment over a websocket.
+
+    Expects the websocket.connect event to be the next one `receive` returns.
+    Connections without a logged-in session, or for deployments that ended,
+    are refused, as are units the values cannot be converted to.
+    """
+    await receive()  # websocket.connect
+    source = await sync_to_async(_open_deployment)(scope, deployment_id)
+    if source is None:
+        await send({"type": "websocket.close", "code": 4403})
+        return
+
+    params = parse_qs(scope.get("query_string", b"").decode())
+    try:
+        after = int(params.get("after", ["0"])[0])
+    except ValueError:
+        after = 0
+    units = (source, params.get("unit", [source])[0])
+    try:
+        conversion(*units)
+    except UnitConversionError:
+        await send({"type": "websocket.close", "code": 4400})
+        return
+    await send({"type": "websocket.accept"})
+
+    version = None
+    receiving = asyncio.ensure_future(receive())
+    try:
+        while True:
+            current = await sync_to_async(get_version)(CACHE_NAMESPACE, deployment_id)
+            if current != version:
+                version = current
+                update = await sync_to_async(records_since)(
+                    deployment_id, after, units=units
+                )
+                if update["x"]:
+                    after = update["last"]
+                    await send({"type": "websocket.send", "text": json.dumps(update)})
+
+            done, _ = await asyncio.wait({receiving}, timeout=POLL_INTERVAL)
+            if receiving in done:
+                if receiving.result()["type"] == "websocket.disconnect":
+                    return
+                receiving = asyncio.ensure_future(receive())
+    finally:
+        receiving.cancel()
@@ -0,0 +1,164 @@
+"""Bulk loaders for sensor records.
+
+A loader takes a clean chunk of `timestamp`/`value` rows for one deployment
+and writes it to `sensor_sensorrecord`, skipping rows whose
+(deployment, timestamp) already exists.
+
+Two implementations are available:
+
+    - CopyLoader streams the rows with PostgreSQL `COPY FROM STDIN` into an
+      unlogged staging table and merges them with a single
+      `INSERT ... ON CONFLICT DO NOTHING`. This is the fast path.
+    - OrmLoader uses `bulk_create(ignore_conflicts=True)` and works on any
+      database backend.
+
+All ingest paths get their loader from `get_loader()`:
+
+    >>> loader = get_loader()
+    >>> result = loader.load(deployment.pk, chunk, user=request.user)
+    >>> result.inserted, result.skipped
+"""
+
+import io
+import uuid
+from dataclasses import dataclass
+
+from django.db import connection, transaction
+
+import pandas as pd
+
+from watersync.sensor.models import SensorRecord
+
+STAGING_TABLE = "sensor_sensorrecord_staging"
+
+COPY_SQL = (
+    f"COPY {STAGING_TABLE} (load_id, deployment_id, timestamp, value, created_by_id) "
+    "FROM STDIN (FORMAT csv)"
+)
+
+MERGE_SQL = f"""
+    WITH inserted AS (
+        INSERT INTO sensor_sensorrecord
+            (deployment_id, timestamp, value, created_at, created_by_id, is_deleted)
+        SELECT DISTINCT ON (deployment_id, timestamp)
+            deployment_id, timestamp, value, now(), created_by_id, false
+        FROM {STAGING_TABLE}
+        WHERE load_id = %s
+        ORDER BY deployment_id, timestamp
+        ON CONFLICT (deployment_id, timestamp) DO NOTHING
+        RETURNING 1
+    )
+    SELECT count(*) FROM inserted
+"""
+
+CLEANUP_SQL = f"DELETE FROM {STAGING_TABLE} WHERE load_id = %s"
+
+
+@dataclass
+class LoadResult:
+    """Outcome of loading rows into the database.
+
+    Attributes:
+        inserted: Rows that were new and got inserted.
+        skipped: Rows skipped because (deployment, timestamp) already existed.
+    """
+
+    inserted: int = 0
+    skipped: int = 0
+
+    def __add__(self, other):
+        return LoadResult(self.inserted + other.inserted, self.skipped + other.skipped)
+
+
+class OrmLoader:
+    """Load rows with `bulk_create(ignore_conflicts=True)`.
+
+    `bulk_create` does not report how many rows were ignored, so the rows of
+    the deployment within the time window of the chunk are counted before and
+    after the insert. The count is an index range scan on
+    (deployment, timestamp).
+    """
+
+    def load(self, deployment_id, chunk: pd.DataFrame, user=None) -> LoadResult:
+        if chunk.empty:
+            return LoadResult()
+
+        window = SensorRecord.objects.filter(
+            deployment_id=deployment_id,
+            timestamp__range=(chunk["timestamp"].min(), chunk["timestamp"].max()),
+        )
+        records = [
+            SensorRecord(
+                deployment_id=deployment_id,
+                timestamp=timestamp,
+                value=value,
+                created_by=user,
+            )
+            for timestamp, value in zip(
+                chunk["timestamp"].tolist(),
+                chunk["value"].round(3).tolist(),
+                strict=True,
+            )
+        ]
+
+        with transaction.atomic():
+            before = window.count()
+            SensorRecord.objects.bulk_create(records, ignore_conflicts=True)
+            inserted = window.count() - before
+
+        return LoadResult(inserted=inserted, skipped=len(records) - inserted)
+
+
+class CopyLoader:
+    """Load rows with PostgreSQL `COPY FROM STDIN` and a merge statement.
+
+    The chunk is serialised to CSV in one vectorised pandas call, streamed into
+    the unlogged staging table under a unique load id, and merged into
+    `sensor_sensorrecord` with `ON CONFLICT (deployment_id, timestamp) DO
+    NOTHING`. The load id keeps concurrent loads apart; the staged rows are
+    removed in the same transaction.
+    """
+
+    def load(self, deployment_id, chunk: pd.DataFrame, user=None) -> LoadResult:
+        if chunk.empty:
+            return LoadResult()
+
+        load_id = uuid.uuid4()
+        buffer = io.StringIO()
+        pd.DataFrame(
+            {
+                "load_id": str(load_id),
+                "deployment_id": deployment_id,
+                "timestamp": chunk["timestamp"],
+                "value": chunk["value"].round(3),
+                "created_by_id": user.pk if user is not None else None,
+            }
+        ).to_csv(
+            buffer, header=False, index=False, date_format="%Y-%m-%dT%H:%M:%S.%f%z"
+        )
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            with cursor.cursor.copy(COPY_SQL) as copy:
+                copy.write(buffer.getvalue())
+            cursor.execute(MERGE_SQL, [load_id])
+            inserted = cursor.fetchone()[0]
+            cursor.execute(CLEANUP_SQL, [load_id])
+
+        return LoadResult(inserted=inserted, skipped=len(chunk) - inserted)
+
+
+def get_loader(method: str | None = None):
+    """Return the loader to use for the current database.
+
+    Args:
+        method: Force "copy" or "orm". By default COPY is used on PostgreSQL
+            and the ORM loader everywhere else.
+    """
+    if method is None:
+        method = "copy" if connection.vendor == "postgresql" else "orm"
+
+    if method == "copy":
+        return CopyLoader()
+    if method == "orm":
+        return OrmLoader()
+    raise ValueError(f"Unknown loader: {method}")
@@ -0,0 +1,88 @@
+from datetime import timedelta
+from importlib import import_module
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+
+from watersync.core.generics.querysets import Epoch
+from watersync.sensor.models import Deployment, SensorRecord
+
+DEFAULT_DAYS = 30
+PAGE_SIZE = 100
+
+# The index changes of migration 0010, applied in reverse for --baseline
+INDEX_MIGRATION = "watersync.sensor.migrations.0010_sensorrecord_timeseries_indexes"
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN ANALYZE the typical sensor record queries of a deployment. "
+        "With --baseline the queries also run against the previous "
+        "single-column indexes, to compare the plans."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--deployment", type=int, required=True)
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=DEFAULT_DAYS,
+            help="Length of the plotted range, ending at the last record.",
+        )
+        parser.add_argument(
+            "--baseline",
+            action="store_true",
+            help=(
+                "Also run with the indexes before migration 0010, built in a "
+                "transaction that is rolled back. Locks the record table and "
+                "takes as long as building the indexes."
+            ),
+        )
+
+    def queries(self, deployment_id, start, end):
+        """Return the benchmarked queries by name."""
+        records = SensorRecord.objects.filter(deployment_id=deployment_id)
+        in_range = records.filter(timestamp__gte=start, timestamp__lt=end)
+        return {
+            # as_arrays(), used by plots, statistics and exports
+            "range plot": in_range.order_by("timestamp").values_list(
+                Epoch(F("timestamp")), Cast("value", FloatField())
+            ),
+            # First page of the keyset-paginated record list
+            "latest page": records.order_by("-timestamp", "-pk")[: PAGE_SIZE + 1],
+            # Time range over all deployments, as in rollup and partition maintenance
+            "all deployments": SensorRecord.objects.filter(
+                timestamp__gte=start, timestamp__lt=end
+            ).values_list("deployment_id", flat=True),
+        }
+
+    def explain(self, deployment_id, start, end):
+        for name, queryset in self.queries(deployment_id, start, end).items():
+            self.stdout.write(self.style.MIGRATE_LABEL(f"-- {name}"))
+            self.stdout.write(queryset.explain(analyze=True, buffers=True))
+            self.stdout.write("")
+
+    def handle(self, *args, **options):
+        deployment_id = options["deployment"]
+        if not Deployment.objects.filter(pk=deployment_id).exists():
+            raise CommandError(f"Deployment {deployment_id} does not exist.")
+
+        last = SensorRecord.objects.filter(deployment_id=deployment_id).date_range()[1]
+        if last is None:
+            raise CommandError(f"Deployment {deployment_id} has no records.")
+        start, end = last - timedelta(days=options["days"]), last + timedelta(seconds=1)
+
+        self.stdout.write(self.style.SUCCESS("Time series indexes"))
+        self.explain(deployment_id, start, end)
+
+        if options["baseline"]:
+            migration = import_module(INDEX_MIGRATION)
+            self.stdout.write(self.style.SUCCESS("Single-column indexes (baseline)"))
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute(migration.REVERSE_INDEX_SQL)
+                    cursor.execute("ANALYZE sensor_sensorrecord")
+                self.explain(deployment_id, start, end)
+                transaction.set_rollback(True)
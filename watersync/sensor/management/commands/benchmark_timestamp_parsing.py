@@ -0,0 +1,92 @@
+import time
+import warnings
+
+from django.core.management.base import BaseCommand
+
+import pandas as pd
+
+from watersync.sensor.timestamps import (
+    infer_format,
+    localize,
+    parse_timestamps,
+    validate_timezone,
+)
+
+DEFAULT_ROWS = 2_000_000
+
+# Timestamp columns as written by the supported loggers
+SAMPLE_FORMATS = {
+    "iso": "%Y-%m-%dT%H:%M:%S",
+    "dayfirst": "%d/%m/%Y %H:%M:%S",
+    "solinst": "%Y/%m/%d %H:%M:%S.%f",
+    "hobo": "%m/%d/%y %I:%M:%S %p",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the parsing of synthetic timestamp columns: pandas guessing "
+        "day-first per value against one explicit format inferred from a "
+        "sample. No database access."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+        parser.add_argument(
+            "--format",
+            dest="formats",
+            action="append",
+            choices=SAMPLE_FORMATS,
+            help="Timestamp layout to benchmark, repeatable. All by default.",
+        )
+        parser.add_argument(
+            "--timezone",
+            default="Europe/Brussels",
+            help="Time zone the naive timestamps are localized in.",
+        )
+
+    def timed(self, label, rows, function):
+        started = time.perf_counter()
+        with warnings.catch_warnings():
+            # pandas warns when it falls back to parsing value by value
+            warnings.simplefilter("ignore", UserWarning)
+            result = function()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"  {label:<16} {elapsed:8.2f} s {rows / elapsed:14,.0f} rows/s"
+        )
+        return result
+
+    def handle(self, *args, **options):
+        rows, timezone = options["rows"], options["timezone"]
+        validate_timezone(timezone)
+        index = pd.date_range("2020-01-01", periods=rows, freq="15min")
+
+        for name in options["formats"] or SAMPLE_FORMATS:
+            values = pd.Series(index.strftime(SAMPLE_FORMATS[name]))
+            self.stdout.write(self.style.MIGRATE_LABEL(f"-- {name}: {values.iloc[-1]}"))
+
+            guessed = self.timed(
+                "day-first guess",
+                rows,
+                lambda values=values: localize(
+                    pd.to_datetime(values, dayfirst=True, errors="coerce"), timezone
+                ),
+            )
+            timestamp_format = self.timed(
+                "inference", rows, lambda values=values: infer_format(values)
+            )
+            parsed = self.timed(
+                "explicit format",
+                rows,
+                lambda values=values, timestamp_format=timestamp_format: (
+                    parse_timestamps(values, timestamp_format, timezone)
+                ),
+            )
+
+            mismatches = int((guessed != parsed).sum())
+            self.stdout.write(
+                f"  inferred {timestamp_format!r}, "
+                f"{int(parsed.isna().sum())} unparsed, "
+                f"{mismatches} differing from the day-first guess"
+            )
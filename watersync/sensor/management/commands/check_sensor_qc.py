@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from watersync.sensor.models import Deployment
+from watersync.sensor.qc import check_deployment
+from watersync.sensor.tasks import check_project_qc
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the automatic quality control checks (spikes, flatlines, steps, "
+        "gaps) of sensor deployments and store their flags."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--deployment",
+            type=int,
+            action="append",
+            help="Deployment to check. Can be repeated.",
+        )
+        parser.add_argument(
+            "--project", type=int, help="Check all deployments of a project."
+        )
+        parser.add_argument(
+            "--queue",
+            action="store_true",
+            help="Queue the checks of --project as Celery tasks instead of running them here.",
+        )
+
+    def handle(self, *args, **options):
+        if options["queue"]:
+            if not options["project"]:
+                raise CommandError("--queue requires --project.")
+            check_project_qc.delay(options["project"])
+            self.stdout.write(
+                self.style.SUCCESS(f"Queued checks of project {options['project']}.")
+            )
+            return
+
+        deployments = Deployment.objects.all()
+        if options["project"]:
+            deployments = Deployment.objects.for_project(options["project"])
+        if options["deployment"]:
+            deployments = deployments.filter(pk__in=options["deployment"])
+
+        for deployment_id in deployments.values_list("pk", flat=True):
+            flagged = check_deployment(deployment_id)
+            self.stdout.write(
+                f"Checked deployment {deployment_id}: {flagged} flagged ranges"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Done."))
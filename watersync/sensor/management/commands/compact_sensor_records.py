@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from watersync.sensor.chunks import CompactResult, compact_records
+from watersync.sensor.models import Deployment
+
+DEFAULT_AGE_DAYS = 30
+
+
+class Command(BaseCommand):
+    help = "Move old sensor records into compressed daily chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=DEFAULT_AGE_DAYS,
+            metavar="DAYS",
+            help="Compact records older than this many days.",
+        )
+        parser.add_argument(
+            "--deployment",
+            type=int,
+            action="append",
+            help="Deployment to compact. Can be repeated. Defaults to all.",
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options["older_than"])
+        deployments = Deployment.objects.all()
+        if options["deployment"]:
+            deployments = deployments.filter(pk__in=options["deployment"])
+
+        total = CompactResult()
+        for deployment_id in deployments.values_list("pk", flat=True):
+            result = compact_records(deployment_id, before)
+            if result.records:
+                self.stdout.write(f"Deployment {deployment_id}: {result}")
+            total.records += result.records
+            total.chunks += result.chunks
+            total.bytes += result.bytes
+
+        self.stdout.write(self.style.SUCCESS(f"Compacted {total}"))
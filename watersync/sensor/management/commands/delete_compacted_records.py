@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from watersync.sensor.chunks import delete_compacted, series_range
+from watersync.sensor.derived import invalidate
+from watersync.sensor.models import Deployment
+from watersync.sensor.partitions import month_windows
+from watersync.sensor.rollups import refresh_rollups
+
+
+def aware_datetime(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"Invalid datetime: {value!r}")
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete compacted sensor records of a deployment for good, by "
+        "rewriting their chunks. Records that are still rows are left alone."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--deployment", type=int, required=True)
+        parser.add_argument(
+            "--start",
+            type=aware_datetime,
+            required=True,
+            help="Inclusive lower bound, ISO 8601. Naive times are UTC.",
+        )
+        parser.add_argument(
+            "--end",
+            type=aware_datetime,
+            required=True,
+            help="Exclusive upper bound, ISO 8601. Naive times are UTC.",
+        )
+
+    def handle(self, *args, **options):
+        start, end = options["start"], options["end"]
+        if start >= end:
+            raise CommandError("--start must be before --end.")
+        try:
+            deployment = Deployment.objects.get(pk=options["deployment"])
+        except Deployment.DoesNotExist as e:
+            raise CommandError(f"No deployment {options['deployment']}.") from e
+
+        first, last = series_range(deployment.pk)
+        deleted = delete_compacted(deployment.pk, start, end)
+        if deleted:
+            # Month by month, like rebuild_rollups, within the stored history
+            one = timedelta(milliseconds=1)
+            start, end = max(start, first), min(end, last + one)
+            for window_start, window_end in month_windows(start, end):
+                refresh_rollups(deployment.pk, window_start, window_end - one)
+            invalidate(deployment.pk, start)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {deleted} compacted records of deployment {deployment.pk}."
+            )
+        )
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from watersync.sensor.ingest import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CHUNK_SIZE,
+    RECORD_COLUMNS,
+    SensorFileError,
+    ingest_sensor_file,
+    read_header,
+)
+from watersync.sensor.loaders import get_loader
+from watersync.sensor.models import Deployment
+
+
+class Command(BaseCommand):
+    help = "Import a sensor CSV file into the records of a deployment."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the CSV file.")
+        parser.add_argument("--deployment", type=int, required=True)
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            "--loader",
+            choices=["copy", "orm"],
+            default=None,
+            help="Force a loader. Defaults to COPY on PostgreSQL.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            deployment = Deployment.objects.get(pk=options["deployment"])
+        except Deployment.DoesNotExist as e:
+            raise CommandError(
+                f"Deployment {options['deployment']} does not exist."
+            ) from e
+
+        with open(options["path"], "rb") as file:
+            try:
+                read_header(file, required=RECORD_COLUMNS)
+            except SensorFileError as e:
+                raise CommandError(str(e)) from e
+
+            result = ingest_sensor_file(
+                file,
+                deployment,
+                chunk_size=options["chunk_size"],
+                batch_size=options["batch_size"],
+                loader=get_loader(options["loader"]),
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {options['path']}: {result}"))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from watersync.sensor.derived import refresh_series
+from watersync.sensor.models import DerivedSeries
+
+
+class Command(BaseCommand):
+    help = "Bring the outputs of derived series up to date with their inputs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--series",
+            type=int,
+            action="append",
+            help="Derived series to refresh. Can be repeated. Defaults to all.",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Recompute the whole output instead of what is out of date.",
+        )
+
+    def handle(self, *args, **options):
+        series_list = DerivedSeries.objects.select_related("output")
+        if options["series"]:
+            series_list = series_list.filter(pk__in=options["series"])
+
+        for series in series_list:
+            written = refresh_series(series, full=options["full"])
+            self.stdout.write(f"Refreshed {series}: {written} records")
+
+        self.stdout.write(self.style.SUCCESS("Done."))
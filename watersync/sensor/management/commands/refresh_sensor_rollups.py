@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from watersync.sensor.models import Deployment
+from watersync.sensor.rollups import missing_rollups, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the hourly and daily rollups of sensor records."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--deployment",
+            type=int,
+            action="append",
+            help="Deployment to rebuild. Can be repeated. Defaults to all.",
+        )
+        parser.add_argument(
+            "--missing",
+            action="store_true",
+            help="Only build deployments that have records but no rollups.",
+        )
+
+    def handle(self, *args, **options):
+        deployments = Deployment.objects.all()
+        if options["deployment"]:
+            deployments = deployments.filter(pk__in=options["deployment"])
+        if options["missing"]:
+            deployments = deployments.filter(pk__in=missing_rollups())
+
+        for deployment_id in deployments.values_list("pk", flat=True):
+            rebuild_rollups(deployment_id)
+            self.stdout.write(f"Rebuilt rollups of deployment {deployment_id}")
+
+        self.stdout.write(self.style.SUCCESS("Done."))
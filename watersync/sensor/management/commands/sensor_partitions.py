@@ -0,0 +1,53 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from watersync.sensor.partitions import (
+    DEFAULT_MONTHS_AHEAD,
+    detach_partitions,
+    ensure_partitions,
+    list_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = "Create, list and detach the monthly partitions of sensor records."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=DEFAULT_MONTHS_AHEAD,
+            help="Months after the current one to create partitions for.",
+        )
+        parser.add_argument(
+            "--detach-before",
+            metavar="YYYY-MM",
+            help="Detach the partitions of all months before this one.",
+        )
+        parser.add_argument(
+            "--drop",
+            action="store_true",
+            help="Drop detached partitions instead of keeping them as tables.",
+        )
+        parser.add_argument("--list", action="store_true", help="List the partitions.")
+
+    def handle(self, *args, **options):
+        for name in ensure_partitions(months_ahead=options["ahead"]):
+            self.stdout.write(f"Created {name}")
+
+        if options["detach_before"]:
+            try:
+                before = date.fromisoformat(f"{options['detach_before']}-01")
+            except ValueError as e:
+                raise CommandError("--detach-before must be given as YYYY-MM.") from e
+            for name in detach_partitions(before, drop=options["drop"]):
+                self.stdout.write(
+                    f"{'Dropped' if options['drop'] else 'Detached'} {name}"
+                )
+
+        if options["list"]:
+            for partition in list_partitions():
+                self.stdout.write(f"{partition.name}\t{partition.start:%Y-%m-%d}")
+
+        self.stdout.write(self.style.SUCCESS("Done."))
@@ -0,0 +1,232 @@
+"""Aligned multi-deployment queries.
+
+Comparing deployments, e.g. river stage against nearby piezometers, needs
+their records on a common time axis. `aligned_matrix` aggregates several
+deployments into fixed-width buckets and returns one (time x deployment)
+matrix as column arrays, computed in a single SQL query: rows are grouped
+by bucket only, and every deployment is an aggregate column restricted to
+its own rows with a FILTER clause (conditional aggregation).
+
+The query reads the rollups when the interval is a whole number of hours
+or days and the bounds fall on bucket boundaries, and the records
+otherwise. Deployments with records in compressed chunks are aggregated in
+NumPy instead, since their history is not in the record table.
+
+Typical usage:
+
+    >>> matrix = aligned_matrix([stage.pk, well.pk], "1 hour", "avg", start, end)
+    >>> matrix.timestamps, matrix.columns[stage.pk]
+"""
+
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.db.models import F, FloatField, Max, Min, Q, Sum
+from django.db.models.functions import Cast
+
+import numpy as np
+
+from watersync.core.generics.querysets import (
+    ALIGNED_AGGREGATES,
+    DateBin,
+    Epoch,
+    interval_seconds,
+)
+from watersync.sensor.chunks import has_chunks, load_series, series_range
+from watersync.sensor.models import SensorRecord, SensorRecordRollup
+from watersync.sensor.rollups import RESOLUTION_STEPS, is_aligned
+
+# Largest number of buckets of a matrix, to keep responses bounded
+MAX_BUCKETS = 100_000
+
+# Aggregates of rollup buckets merged into coarser buckets
+ROLLUP_AGGREGATES = {
+    "min": lambda condition: Min("min_value", filter=condition),
+    "max": lambda condition: Max("max_value", filter=condition),
+    "sum": lambda condition: Sum("sum_value", filter=condition),
+    "count": lambda condition: Sum("count", filter=condition),
+    "avg": lambda condition: (
+        Sum("sum_value", filter=condition)
+        / Cast(Sum("count", filter=condition), FloatField())
+    ),
+}
+
+# NumPy reductions over the records of a bucket, see `bucket_series`
+REDUCTIONS = {
+    "min": np.minimum.reduceat,
+    "max": np.maximum.reduceat,
+    "sum": np.add.reduceat,
+}
+
+
+@dataclass
+class AlignedMatrix:
+    """Deployments aggregated onto a common time grid.
+
+    Attributes:
+        timestamps: Bucket starts as datetime64[ms] in UTC.
+        columns: Dict of deployment pk to float64 values, NaN where the
+            deployment has no records in a bucket.
+    """
+
+    timestamps: np.ndarray
+    columns: dict[int, np.ndarray]
+
+
+def bucket_series(timestamps, values, seconds: int, agg: str = "avg"):
+    """Aggregate a sorted series into epoch-aligned buckets of `seconds`.
+
+    Returns:
+        Tuple of (bucket starts as datetime64[ms], aggregates as float64)
+        for the buckets that have records.
+    """
+    ms = np.asarray(timestamps, dtype="datetime64[ms]").view(np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    if not len(ms):
+        return np.empty(0, dtype="datetime64[ms]"), np.empty(0)
+
+    step = seconds * 1000
+    buckets = ms // step
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+    counts = np.diff(np.append(starts, len(ms)))
+    if agg == "count":
+        result = counts.astype(np.float64)
+    elif agg == "avg":
+        result = np.add.reduceat(values, starts) / counts
+    else:
+        result = REDUCTIONS[agg](values, starts)
+    return (buckets[starts] * step).astype("datetime64[ms]"), result
+
+
+def _rollup_resolution(seconds: int, start, end) -> str | None:
+    """Return the coarsest rollup resolution that tiles the buckets exactly."""
+    for resolution, step in reversed(RESOLUTION_STEPS.items()):
+        step_seconds = int(step.total_seconds())
+        if (
+            seconds % step_seconds == 0
+            and is_aligned(start, resolution)
+            and is_aligned(end, resolution)
+        ):
+            return resolution
+    return None
+
+
+def _in_range(queryset, field, start, end):
+    if start is not None:
+        queryset = queryset.filter(**{f"{field}__gte": start})
+    if end is not None:
+        queryset = queryset.filter(**{f"{field}__lt": end})
+    return queryset
+
+
+def _rollup_matrix(deployment_ids, seconds, agg, resolution, start, end) -> dict:
+    """Aggregate rollups of `resolution` into the matrix in one query."""
+    annotations = {
+        f"series_{index}": ROLLUP_AGGREGATES[agg](Q(deployment_id=pk))
+        for index, pk in enumerate(deployment_ids)
+    }
+    rows = (
+        _in_range(
+            SensorRecordRollup.objects.filter(
+                deployment_id__in=deployment_ids, resolution=resolution
+            ),
+            "bucket",
+            start,
+            end,
+        )
+        .order_by()
+        .annotate(grid=Epoch(DateBin(F("bucket"), seconds)))
+        .values("grid")
+        .annotate(**annotations)
+        .order_by("grid")
+        .values_list("grid", *annotations)
+    )
+    columns = list(zip(*rows, strict=True)) or [()] * (len(deployment_ids) + 1)
+    epochs = np.array(columns[0], dtype=np.float64)
+    result = {
+        "bucket": np.round(epochs * 1000).astype(np.int64).astype("datetime64[ms]")
+    }
+    for pk, column in zip(deployment_ids, columns[1:], strict=True):
+        result[pk] = np.array(column, dtype=np.float64)
+    return result
+
+
+def _align(parts) -> tuple[np.ndarray, list[np.ndarray]]:
+    """Place (buckets, columns) parts on the union of their buckets."""
+    timestamps = np.unique(np.concatenate([buckets for buckets, _ in parts]))
+    columns = []
+    for buckets, part_columns in parts:
+        index = np.searchsorted(timestamps, buckets)
+        for values in part_columns:
+            column = np.full(len(timestamps), np.nan)
+            column[index] = values
+            columns.append(column)
+    return timestamps, columns
+
+
+def _check_size(deployment_ids, seconds, start, end):
+    if start is None or end is None:
+        ranges = [series_range(pk) for pk in deployment_ids]
+        firsts = [first for first, _ in ranges if first is not None]
+        if not firsts:
+            return
+        start = start or min(firsts)
+        end = end or max(last for _, last in ranges if last is not None)
+    if (end - start) / timedelta(seconds=seconds) > MAX_BUCKETS:
+        raise ValueError(
+            f"The interval is too fine for the range, at most {MAX_BUCKETS} buckets are allowed."
+        )
+
+
+def aligned_matrix(
+    deployment_ids, interval, agg: str = "avg", start=None, end=None
+) -> AlignedMatrix:
+    """Aggregate several deployments onto one time grid.
+
+    Args:
+        deployment_ids: Deployments to align, in column order.
+        interval: Bucket width as a timedelta or a string like "15 minutes".
+            Buckets are aligned to the Unix epoch.
+        agg: One of "min", "max", "avg", "sum" and "count".
+        start: Inclusive lower bound (aware) or None.
+        end: Exclusive upper bound (aware) or None.
+
+    Returns:
+        AlignedMatrix over the buckets in which any deployment has records.
+
+    Raises:
+        ValueError: If the interval or aggregate is not understood, or the
+            matrix would have more than MAX_BUCKETS rows.
+    """
+    if agg not in ALIGNED_AGGREGATES:
+        raise ValueError(f"Unknown aggregate: {agg}")
+    seconds = interval_seconds(interval)
+    deployment_ids = list(dict.fromkeys(deployment_ids))
+    _check_size(deployment_ids, seconds, start, end)
+
+    resolution = _rollup_resolution(seconds, start, end)
+    if resolution is not None:
+        # Rollups also cover the records stored in chunks
+        chunked, queried = [], deployment_ids
+        result = _rollup_matrix(queried, seconds, agg, resolution, start, end)
+    else:
+        chunked = [pk for pk in deployment_ids if has_chunks(pk, start, end)]
+        queried = [pk for pk in deployment_ids if pk not in chunked]
+        records = _in_range(SensorRecord.objects.all(), "timestamp", start, end)
+        result = (
+            records.aligned("deployment_id", queried, timedelta(seconds=seconds), agg)
+            if queried
+            else {"bucket": np.empty(0, dtype="datetime64[ms]")}
+        )
+
+    parts = [(result["bucket"], [result[pk] for pk in queried])]
+    parts += [
+        (buckets, [values])
+        for buckets, values in (
+            bucket_series(*load_series(pk, start, end), seconds, agg) for pk in chunked
+        )
+    ]
+    timestamps, columns = _align(parts)
+    order = queried + chunked
+    by_pk = dict(zip(order, columns, strict=True))
+    return AlignedMatrix(timestamps, {pk: by_pk[pk] for pk in deployment_ids})
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sensor", "0003_pressuresensordeploymentdetail_and_more"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+                CREATE UNLOGGED TABLE sensor_sensorrecord_staging (
+                    load_id uuid NOT NULL,
+                    deployment_id bigint NOT NULL,
+                    timestamp timestamp with time zone NOT NULL,
+                    value numeric(10, 3) NOT NULL,
+                    created_by_id bigint NULL
+                );
+                CREATE INDEX sensor_sensorrecord_staging_load_id
+                    ON sensor_sensorrecord_staging (load_id);
+            """,
+            reverse_sql="DROP TABLE sensor_sensorrecord_staging;",
+        ),
+    ]
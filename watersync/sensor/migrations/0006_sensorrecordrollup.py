@@ -0,0 +1,52 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sensor", "0005_sensorimportjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SensorRecordRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "resolution",
+                    models.CharField(
+                        choices=[("hour", "Hourly"), ("day", "Daily")], max_length=10
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                ("min_value", models.FloatField()),
+                ("max_value", models.FloatField()),
+                ("sum_value", models.FloatField()),
+                ("count", models.PositiveIntegerField()),
+                ("first_value", models.FloatField()),
+                ("last_value", models.FloatField()),
+                ("first_at", models.DateTimeField()),
+                ("last_at", models.DateTimeField()),
+                (
+                    "deployment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rollups",
+                        to="sensor.deployment",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["bucket"],
+                "unique_together": {("deployment", "resolution", "bucket")},
+            },
+        ),
+    ]
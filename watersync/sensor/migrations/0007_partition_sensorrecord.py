@@ -0,0 +1,118 @@
+from django.db import migrations
+
+# Converts sensor_sensorrecord into a table partitioned by month of timestamp.
+# PostgreSQL 16 does not support identity columns on partitioned tables, so
+# the id is taken from a plain sequence, and the primary key includes the
+# partition key. The existing rows are copied once into the new partitions.
+PARTITION_SQL = """
+    ALTER TABLE sensor_sensorrecord RENAME TO sensor_sensorrecord_unpartitioned;
+    ALTER TABLE sensor_sensorrecord_unpartitioned
+        RENAME CONSTRAINT sensor_sensorrecord_pkey TO sensor_sensorrecord_unpartitioned_pkey;
+
+    CREATE SEQUENCE sensor_sensorrecord_pk_seq AS bigint;
+    CREATE TABLE sensor_sensorrecord (
+        LIKE sensor_sensorrecord_unpartitioned INCLUDING DEFAULTS INCLUDING STORAGE
+    ) PARTITION BY RANGE ("timestamp");
+    ALTER TABLE sensor_sensorrecord
+        ALTER COLUMN id SET DEFAULT nextval('sensor_sensorrecord_pk_seq');
+    ALTER SEQUENCE sensor_sensorrecord_pk_seq OWNED BY sensor_sensorrecord.id;
+
+    ALTER TABLE sensor_sensorrecord
+        ADD CONSTRAINT sensor_sensorrecord_pkey PRIMARY KEY (id, "timestamp");
+    ALTER TABLE sensor_sensorrecord
+        ADD CONSTRAINT sensor_sensorrecord_deployment_id_timestamp_uniq
+        UNIQUE (deployment_id, "timestamp");
+    CREATE INDEX sensor_sensorrecord_deployment_id_idx ON sensor_sensorrecord (deployment_id);
+    CREATE INDEX sensor_sensorrecord_timestamp_idx ON sensor_sensorrecord ("timestamp");
+    CREATE INDEX sensor_sensorrecord_is_deleted_idx ON sensor_sensorrecord (is_deleted);
+    CREATE INDEX sensor_sensorrecord_created_by_id_idx ON sensor_sensorrecord (created_by_id);
+    CREATE INDEX sensor_sensorrecord_deleted_by_id_idx ON sensor_sensorrecord (deleted_by_id);
+    ALTER TABLE sensor_sensorrecord
+        ADD CONSTRAINT sensor_sensorrecord_deployment_id_fk
+        FOREIGN KEY (deployment_id) REFERENCES sensor_deployment (id)
+        DEFERRABLE INITIALLY DEFERRED;
+    ALTER TABLE sensor_sensorrecord
+        ADD CONSTRAINT sensor_sensorrecord_created_by_id_fk
+        FOREIGN KEY (created_by_id) REFERENCES users_user (id)
+        DEFERRABLE INITIALLY DEFERRED;
+    ALTER TABLE sensor_sensorrecord
+        ADD CONSTRAINT sensor_sensorrecord_deleted_by_id_fk
+        FOREIGN KEY (deleted_by_id) REFERENCES users_user (id)
+        DEFERRABLE INITIALLY DEFERRED;
+
+    CREATE TABLE sensor_sensorrecord_default PARTITION OF sensor_sensorrecord DEFAULT;
+
+    -- One partition per month of existing data and for the next three months
+    DO $$
+    DECLARE
+        month date;
+    BEGIN
+        FOR month IN
+            SELECT DISTINCT date_trunc('month', "timestamp" AT TIME ZONE 'UTC')::date
+            FROM sensor_sensorrecord_unpartitioned
+            UNION
+            SELECT (date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => n))::date
+            FROM generate_series(0, 3) AS n
+        LOOP
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF sensor_sensorrecord FOR VALUES FROM (%L) TO (%L)',
+                'sensor_sensorrecord_p' || to_char(month, 'YYYY_MM'),
+                month::timestamp AT TIME ZONE 'UTC',
+                (month + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+            );
+        END LOOP;
+    END
+    $$;
+
+    INSERT INTO sensor_sensorrecord SELECT * FROM sensor_sensorrecord_unpartitioned;
+    SELECT setval(
+        'sensor_sensorrecord_pk_seq',
+        COALESCE((SELECT max(id) FROM sensor_sensorrecord_unpartitioned), 0) + 1,
+        false
+    );
+    DROP TABLE sensor_sensorrecord_unpartitioned;
+"""
+
+UNPARTITION_SQL = """
+    ALTER TABLE sensor_sensorrecord RENAME TO sensor_sensorrecord_partitioned;
+
+    CREATE TABLE sensor_sensorrecord (
+        LIKE sensor_sensorrecord_partitioned INCLUDING DEFAULTS INCLUDING STORAGE
+    );
+    INSERT INTO sensor_sensorrecord SELECT * FROM sensor_sensorrecord_partitioned;
+    ALTER SEQUENCE sensor_sensorrecord_pk_seq OWNED BY sensor_sensorrecord.id;
+    DROP TABLE sensor_sensorrecord_partitioned;
+
+    ALTER TABLE sensor_sensorrecord ADD PRIMARY KEY (id);
+    ALTER TABLE sensor_sensorrecord
+        ADD CONSTRAINT sensor_sensorrecord_deployment_id_timestamp_uniq
+        UNIQUE (deployment_id, "timestamp");
+    CREATE INDEX sensor_sensorrecord_deployment_id_idx ON sensor_sensorrecord (deployment_id);
+    CREATE INDEX sensor_sensorrecord_timestamp_idx ON sensor_sensorrecord ("timestamp");
+    CREATE INDEX sensor_sensorrecord_is_deleted_idx ON sensor_sensorrecord (is_deleted);
+    CREATE INDEX sensor_sensorrecord_created_by_id_idx ON sensor_sensorrecord (created_by_id);
+    CREATE INDEX sensor_sensorrecord_deleted_by_id_idx ON sensor_sensorrecord (deleted_by_id);
+    ALTER TABLE sensor_sensorrecord
+        ADD CONSTRAINT sensor_sensorrecord_deployment_id_fk
+        FOREIGN KEY (deployment_id) REFERENCES sensor_deployment (id)
+        DEFERRABLE INITIALLY DEFERRED;
+    ALTER TABLE sensor_sensorrecord
+        ADD CONSTRAINT sensor_sensorrecord_created_by_id_fk
+        FOREIGN KEY (created_by_id) REFERENCES users_user (id)
+        DEFERRABLE INITIALLY DEFERRED;
+    ALTER TABLE sensor_sensorrecord
+        ADD CONSTRAINT sensor_sensorrecord_deleted_by_id_fk
+        FOREIGN KEY (deleted_by_id) REFERENCES users_user (id)
+        DEFERRABLE INITIALLY DEFERRED;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sensor", "0006_sensorrecordrollup"),
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunSQL(sql=PARTITION_SQL, reverse_sql=UNPARTITION_SQL),
+    ]
@@ -0,0 +1,45 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sensor", "0008_schedule_partition_maintenance"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SensorRecordChunk",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("start", models.DateTimeField()),
+                ("end", models.DateTimeField()),
+                ("count", models.PositiveIntegerField()),
+                ("min_value", models.FloatField()),
+                ("max_value", models.FloatField()),
+                ("timestamps", models.BinaryField()),
+                ("values", models.BinaryField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "deployment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chunks",
+                        to="sensor.deployment",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["start"],
+                "unique_together": {("deployment", "start")},
+            },
+        ),
+    ]
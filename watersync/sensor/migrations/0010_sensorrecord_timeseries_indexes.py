@@ -0,0 +1,77 @@
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The indexes of the partitioned table were created by hand in 0007, so the
+# single-column indexes are dropped by name. Indexes created on the parent
+# are created on every partition, including ones attached later.
+INDEX_SQL = """
+    DROP INDEX sensor_sensorrecord_deployment_id_idx;
+    DROP INDEX sensor_sensorrecord_timestamp_idx;
+    DROP INDEX sensor_sensorrecord_is_deleted_idx;
+    CREATE INDEX sensor_record_live_idx ON sensor_sensorrecord
+        (deployment_id, "timestamp" DESC) INCLUDE (value) WHERE NOT is_deleted;
+    CREATE INDEX sensor_record_brin ON sensor_sensorrecord
+        USING brin ("timestamp") WITH (autosummarize = on);
+"""
+
+REVERSE_INDEX_SQL = """
+    DROP INDEX sensor_record_live_idx;
+    DROP INDEX sensor_record_brin;
+    CREATE INDEX sensor_sensorrecord_deployment_id_idx ON sensor_sensorrecord (deployment_id);
+    CREATE INDEX sensor_sensorrecord_timestamp_idx ON sensor_sensorrecord ("timestamp");
+    CREATE INDEX sensor_sensorrecord_is_deleted_idx ON sensor_sensorrecord (is_deleted);
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sensor", "0009_sensorrecordchunk"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(sql=INDEX_SQL, reverse_sql=REVERSE_INDEX_SQL),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="sensorrecord",
+                    name="deployment",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="records",
+                        to="sensor.deployment",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="sensorrecord",
+                    name="timestamp",
+                    field=models.DateTimeField(),
+                ),
+                migrations.AlterField(
+                    model_name="sensorrecord",
+                    name="is_deleted",
+                    field=models.BooleanField(default=False),
+                ),
+                migrations.AddIndex(
+                    model_name="sensorrecord",
+                    index=models.Index(
+                        condition=models.Q(("is_deleted", False)),
+                        fields=["deployment", "-timestamp"],
+                        include=("value",),
+                        name="sensor_record_live_idx",
+                    ),
+                ),
+                migrations.AddIndex(
+                    model_name="sensorrecord",
+                    index=django.contrib.postgres.indexes.BrinIndex(
+                        autosummarize=True,
+                        fields=["timestamp"],
+                        name="sensor_record_brin",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,58 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sensor", "0010_sensorrecord_timeseries_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pressuresensordeploymentdetail",
+            name="barometer",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Barometric pressure deployment used to compensate absolute pressures",
+                limit_choices_to={"variable": "pressure"},
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="compensated_deployments",
+                to="sensor.deployment",
+                verbose_name="Barometer",
+            ),
+        ),
+        migrations.AddField(
+            model_name="pressuresensordeploymentdetail",
+            name="fluid_density",
+            field=models.FloatField(
+                default=1000.0,
+                help_text="Density of the water above the sensor, higher for saline water",
+                verbose_name="Fluid Density (kg/m³)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="historicalpressuresensordeploymentdetail",
+            name="barometer",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                help_text="Barometric pressure deployment used to compensate absolute pressures",
+                limit_choices_to={"variable": "pressure"},
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="+",
+                to="sensor.deployment",
+                verbose_name="Barometer",
+            ),
+        ),
+        migrations.AddField(
+            model_name="historicalpressuresensordeploymentdetail",
+            name="fluid_density",
+            field=models.FloatField(
+                default=1000.0,
+                help_text="Density of the water above the sensor, higher for saline water",
+                verbose_name="Fluid Density (kg/m³)",
+            ),
+        ),
+    ]
@@ -0,0 +1,84 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sensor", "0011_pressuresensordeploymentdetail_barometer"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DerivedSeries",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "transform",
+                    models.CharField(
+                        choices=[
+                            ("water_level", "Compensated water level"),
+                            ("unit_conversion", "Unit conversion"),
+                            ("rolling_mean", "Rolling mean"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                ("parameters", models.JSONField(blank=True, default=dict)),
+                ("computed_until", models.DateTimeField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "output",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="derivation",
+                        to="sensor.deployment",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "derived series",
+            },
+        ),
+        migrations.CreateModel(
+            name="DerivedSeriesInput",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("role", models.CharField(max_length=30)),
+                (
+                    "deployment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="derived_inputs",
+                        to="sensor.deployment",
+                    ),
+                ),
+                (
+                    "series",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="inputs",
+                        to="sensor.derivedseries",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("series", "role")},
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sensor", "0012_derivedseries"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QCFlag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("start", models.DateTimeField()),
+                ("end", models.DateTimeField()),
+                ("flags", models.PositiveSmallIntegerField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "deployment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="qc_flags",
+                        to="sensor.deployment",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["start"],
+                "indexes": [
+                    models.Index(
+                        fields=["deployment", "start"], name="sensor_qcflag_range_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sensor", "0013_qcflag"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sensorimportjob",
+            name="format",
+            field=models.CharField(
+                choices=[
+                    ("csv", "Watersync CSV (timestamp, value, location, sensor)"),
+                    ("xle", "Solinst Levelogger (.xle)"),
+                    ("diver", "van Essen Diver (.MON, .CSV)"),
+                    ("hobo", "Onset HOBO (.csv)"),
+                    ("mapped", "Other CSV (column mapping)"),
+                ],
+                default="csv",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="sensorimportjob",
+            name="options",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sensor", "0014_sensorimportjob_format"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sensorimportjob",
+            name="rows_covered",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
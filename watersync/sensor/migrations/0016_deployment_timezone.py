@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sensor", "0015_sensorimportjob_rows_covered"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="deployment",
+            name="timezone",
+            field=models.CharField(
+                default="UTC",
+                help_text="Time zone of the logger clock, e.g. Europe/Brussels to follow daylight saving time or Etc/GMT-1 for UTC+1 all year",
+                max_length=64,
+            ),
+        ),
+        migrations.AddField(
+            model_name="historicaldeployment",
+            name="timezone",
+            field=models.CharField(
+                default="UTC",
+                help_text="Time zone of the logger clock, e.g. Europe/Brussels to follow daylight saving time or Etc/GMT-1 for UTC+1 all year",
+                max_length=64,
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sensor", "0016_deployment_timezone"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="derivedseries",
+            name="transform",
+            field=models.CharField(
+                choices=[
+                    ("water_level", "Compensated water level"),
+                    ("unit_conversion", "Unit conversion"),
+                    ("rolling_mean", "Rolling mean"),
+                    ("regularisation", "Regular interval"),
+                ],
+                max_length=30,
+            ),
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations
+from django.db.models import Exists, OuterRef
+
+
+def backfill_rollups(apps, schema_editor):
+    Deployment = apps.get_model("sensor", "Deployment")
+    SensorRecord = apps.get_model("sensor", "SensorRecord")
+    SensorRecordChunk = apps.get_model("sensor", "SensorRecordChunk")
+    SensorRecordRollup = apps.get_model("sensor", "SensorRecordRollup")
+
+    # Deployments whose records were stored before rollups existed
+    deployment_ids = list(
+        Deployment.objects.filter(
+            Exists(SensorRecord.objects.filter(deployment_id=OuterRef("pk")))
+            | Exists(SensorRecordChunk.objects.filter(deployment_id=OuterRef("pk")))
+        )
+        .exclude(
+            Exists(SensorRecordRollup.objects.filter(deployment_id=OuterRef("pk")))
+        )
+        .values_list("pk", flat=True)
+    )
+    if not deployment_ids:
+        return
+
+    # The rollups are computed by the application, which is only imported
+    # when there is something to backfill
+    from watersync.sensor.rollups import rebuild_rollups
+
+    for deployment_id in deployment_ids:
+        rebuild_rollups(deployment_id)
+
+
+class Migration(migrations.Migration):
+    # Every month of a deployment is rebuilt in its own transaction
+    atomic = False
+
+    dependencies = [
+        ("sensor", "0017_alter_derivedseries_transform"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -9,12 +9,14 @@ from watersync.core.config import (
     get_variable_label,
     is_valid_unit_for_variable,
 )
+from watersync.core.generics.indexes import timeseries_indexes
 from watersync.core.generics.managers import (
     LocationWithCountsManager,
     UserScopedManager,
 )
 from watersync.core.generics.models import SetupSimpleHistory, TimeSeriesModel
 from watersync.core.models import Location
+from watersync.sensor.timestamps import validate_timezone
 from watersync.users.models import User
 
 
@@ -90,6 +92,8 @@ class Deployment(models.Model):
         unit: The unit of measurement (must be valid for the variable).
         started_at: When this timeseries started (optional).
         ended_at: When this timeseries ended (optional, null if ongoing).
+        timezone: Time zone of the logger clock, used to read uploaded
+            timestamps without an offset.
     """
 
     class DeploymentTypes(models.TextChoices):
@@ -117,6 +121,14 @@ class Deployment(models.Model):
     )
     started_at = models.DateTimeField(null=True, blank=True, help_text="When this timeseries started")
     ended_at = models.DateTimeField(null=True, blank=True, help_text="When this timeseries ended (null if ongoing)")
+    timezone = models.CharField(
+        max_length=64,
+        default="UTC",
+        help_text=(
+            "Time zone of the logger clock, e.g. Europe/Brussels to follow daylight saving "
+            "time or Etc/GMT-1 for UTC+1 all year"
+        ),
+    )
 
     objects = LocationWithCountsManager()
     history = HistoricalRecords()
@@ -142,6 +154,7 @@ class Deployment(models.Model):
             "Unit": "get_unit_display",
             "Start": "started_at",
             "End": "ended_at",
+            "Time zone": "timezone",
     }
 
     class Meta:
@@ -162,6 +175,11 @@ class Deployment(models.Model):
                     f"Unit '{self.unit}' is not valid for variable '{get_variable_label(self.variable)}'. "
                     f"Please select a compatible unit."
                 )
+
+        try:
+            validate_timezone(self.timezone)
+        except ValueError as e:
+            errors["timezone"] = str(e)
         
         if errors:
             raise ValidationError(errors)
@@ -182,6 +200,12 @@ class SensorRecord(TimeSeriesModel):
     Records are immutable: update not allowed, use delete and recreate.
     Soft delete: records are marked deleted but preserved in database.
 
+    Old records are compacted into SensorRecordChunk rows, so querysets of
+    this model, and their statistics(), date_range(), resample() and
+    aligned(), only see the records that are still rows. Read the full
+    history with `watersync.sensor.chunks.load_series` and `series_range`,
+    or the rollups in `watersync.sensor.rollups`.
+
     Attributes:
         deployment: link to the particular logger deployment.
         value: Measured magnitude (inherited from TimeSeriesModel).
@@ -194,11 +218,284 @@ class SensorRecord(TimeSeriesModel):
     timestamp_field = "timestamp"
     location_field = "deployment__location"
 
+    # Both are covered by the unique constraint and timeseries_indexes
     deployment = models.ForeignKey(
-        Deployment, on_delete=models.CASCADE, related_name="records", db_index=True
+        Deployment, on_delete=models.CASCADE, related_name="records", db_index=False
     )
-    timestamp = models.DateTimeField(db_index=True)
+    timestamp = models.DateTimeField()
 
+    # The table is range partitioned by month of timestamp with the primary
+    # key (id, timestamp), see migration 0007 and watersync.sensor.partitions.
+    # Filter on timestamp where possible so that only the partitions of the
+    # range are scanned.
     class Meta:
         unique_together = ("deployment", "timestamp")
         ordering = ["-timestamp"]
+        indexes = timeseries_indexes(
+            "sensor_record", ["deployment", "-timestamp"], brin_field="timestamp"
+        )
+
+
+class SensorImportJob(models.Model):
+    """Background import of an uploaded sensor file.
+
+    The uploaded file is kept in media storage and imported by a Celery task
+    in checkpointed chunks. The row counters double as progress report and as
+    checkpoint: `rows_parsed` is the number of data rows of the file that have
+    been committed, so an interrupted import resumes right after them.
+
+    Attributes:
+        deployment: The deployment the records are imported into.
+        file: The uploaded file.
+        format: Logger export format of the file, see `watersync.sensor.formats`.
+        options: Options of the format, e.g. the channel or column mapping.
+        status: Current state of the import.
+        rows_parsed, rows_inserted, rows_skipped, rows_rejected: Progress counters.
+        rows_covered: Part of rows_skipped dropped before loading because
+            the deployment already held them.
+        error: Error message of a failed import.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        COMPLETED = "completed", "Completed"
+        FAILED = "failed", "Failed"
+
+    class Formats(models.TextChoices):
+        CSV = "csv", "Watersync CSV (timestamp, value, location, sensor)"
+        XLE = "xle", "Solinst Levelogger (.xle)"
+        DIVER = "diver", "van Essen Diver (.MON, .CSV)"
+        HOBO = "hobo", "Onset HOBO (.csv)"
+        MAPPED = "mapped", "Other CSV (column mapping)"
+
+    deployment = models.ForeignKey(
+        Deployment, on_delete=models.CASCADE, related_name="import_jobs"
+    )
+    file = models.FileField(upload_to="sensor_imports/%Y/%m/")
+    format = models.CharField(
+        max_length=20, choices=Formats.choices, default=Formats.CSV
+    )
+    options = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.PENDING
+    )
+    rows_parsed = models.PositiveBigIntegerField(default=0)
+    rows_inserted = models.PositiveBigIntegerField(default=0)
+    rows_skipped = models.PositiveBigIntegerField(default=0)
+    rows_covered = models.PositiveBigIntegerField(default=0)
+    rows_rejected = models.PositiveBigIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="sensor_import_jobs",
+    )
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return (
+            f"Import {self.pk} into {self.deployment_id} ({self.get_status_display()})"
+        )
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in (self.Status.PENDING, self.Status.RUNNING)
+
+    def progress(self) -> dict:
+        """Return the progress counters as a dict."""
+        return {
+            "status": self.status,
+            "rows_parsed": self.rows_parsed,
+            "rows_inserted": self.rows_inserted,
+            "rows_skipped": self.rows_skipped,
+            "rows_covered": self.rows_covered,
+            "rows_rejected": self.rows_rejected,
+        }
+
+
+class SensorRecordRollup(models.Model):
+    """Hourly and daily aggregates of the records of a deployment.
+
+    Rollups are derived data maintained by `watersync.sensor.rollups`: the
+    buckets touched by inserted or (soft-)deleted records are recomputed
+    incrementally. Long-range plots and statistics read from the coarsest
+    rollup that satisfies the request instead of the raw records.
+
+    Attributes:
+        deployment: The deployment the records belong to.
+        resolution: Width of the bucket (hour or day).
+        bucket: Start of the bucket in UTC.
+        min_value, max_value, sum_value, count: Aggregates of the bucket.
+        first_value, last_value: Values of the earliest and latest record.
+        first_at, last_at: Timestamps of the earliest and latest record.
+    """
+
+    class Resolutions(models.TextChoices):
+        HOUR = "hour", "Hourly"
+        DAY = "day", "Daily"
+
+    deployment = models.ForeignKey(
+        Deployment, on_delete=models.CASCADE, related_name="rollups"
+    )
+    resolution = models.CharField(max_length=10, choices=Resolutions.choices)
+    bucket = models.DateTimeField()
+    min_value = models.FloatField()
+    max_value = models.FloatField()
+    sum_value = models.FloatField()
+    count = models.PositiveIntegerField()
+    first_value = models.FloatField()
+    last_value = models.FloatField()
+    first_at = models.DateTimeField()
+    last_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("deployment", "resolution", "bucket")
+        ordering = ["bucket"]
+
+    def __str__(self) -> str:
+        return f"{self.deployment_id} {self.resolution} {self.bucket:%Y-%m-%d %H:%M}"
+
+
+class SensorRecordChunk(models.Model):
+    """Compressed records of a deployment for one day.
+
+    Compacted history of a deployment is stored as one chunk per UTC day
+    instead of one SensorRecord row per reading. Timestamps and values are
+    kept in binary columns encoded by `watersync.sensor.codecs`; use
+    `watersync.sensor.chunks.load_series` to read records from chunks and
+    rows alike.
+
+    Attributes:
+        deployment: The deployment the records belong to.
+        start, end: The day covered by the chunk, [start, end).
+        count: Number of records in the chunk.
+        min_value, max_value: Value range of the records.
+        timestamps, values: Encoded timestamps and values.
+        updated_at: Last time the chunk was written.
+    """
+
+    deployment = models.ForeignKey(
+        Deployment, on_delete=models.CASCADE, related_name="chunks"
+    )
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    count = models.PositiveIntegerField()
+    min_value = models.FloatField()
+    max_value = models.FloatField()
+    timestamps = models.BinaryField()
+    values = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("deployment", "start")
+        ordering = ["start"]
+
+    def __str__(self) -> str:
+        return f"{self.deployment_id} {self.start:%Y-%m-%d} ({self.count} records)"
+
+
+class DerivedSeries(models.Model):
+    """Series computed from the records of other deployments.
+
+    A derived series, like a compensated water level or a rolling mean,
+    declares its input deployments and a transform. The result is stored as
+    the records of its own output deployment, so it is plotted, summarised
+    and exported like measured data. `watersync.sensor.derived` keeps it up
+    to date: when input records arrive, only the time after
+    `computed_until` is recomputed.
+
+    Attributes:
+        output: The deployment holding the computed records.
+        transform: How the inputs are combined.
+        parameters: Settings of the transform, e.g. the rolling window or
+            the interval of a regularised series.
+        computed_until: Inputs before this time are reflected in the output.
+        updated_at: Last time the series was refreshed.
+    """
+
+    class Transforms(models.TextChoices):
+        WATER_LEVEL = "water_level", "Compensated water level"
+        UNIT_CONVERSION = "unit_conversion", "Unit conversion"
+        ROLLING_MEAN = "rolling_mean", "Rolling mean"
+        REGULARISATION = "regularisation", "Regular interval"
+
+    output = models.OneToOneField(
+        Deployment, on_delete=models.CASCADE, related_name="derivation"
+    )
+    transform = models.CharField(max_length=30, choices=Transforms.choices)
+    parameters = models.JSONField(default=dict, blank=True)
+    computed_until = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "derived series"
+
+    def __str__(self) -> str:
+        return f"{self.get_transform_display()} into {self.output_id}"
+
+
+class DerivedSeriesInput(models.Model):
+    """Input deployment of a derived series in a named role.
+
+    Attributes:
+        series: The derived series.
+        deployment: The deployment whose records are read.
+        role: What the input is used for, e.g. "pressure" or "barometer".
+    """
+
+    series = models.ForeignKey(
+        DerivedSeries, on_delete=models.CASCADE, related_name="inputs"
+    )
+    deployment = models.ForeignKey(
+        Deployment, on_delete=models.PROTECT, related_name="derived_inputs"
+    )
+    role = models.CharField(max_length=30)
+
+    class Meta:
+        unique_together = ("series", "role")
+
+    def __str__(self) -> str:
+        return f"{self.role}: {self.deployment_id}"
+
+
+class QCFlag(models.Model):
+    """Quality control flags of the records of a deployment in a time range.
+
+    Flags are stored per range instead of per record: consecutive records
+    with the same flags share one row, a lone spike is a range of one
+    record. `flags` is a bitmask of `watersync.sensor.qc.Flag`. The raw
+    records are never changed; readers drop flagged records on request,
+    see `watersync.sensor.qc.clean_series`.
+
+    Attributes:
+        deployment: The deployment the flagged records belong to.
+        start, end: Timestamps of the first and last flagged record.
+        flags: Bitmask of the failed checks.
+        created_at: When the check ran.
+    """
+
+    deployment = models.ForeignKey(
+        Deployment, on_delete=models.CASCADE, related_name="qc_flags"
+    )
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    flags = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["deployment", "start"], name="sensor_qcflag_range_idx")
+        ]
+        ordering = ["start"]
+
+    def __str__(self) -> str:
+        return f"{self.deployment_id} {self.start:%Y-%m-%d %H:%M} ({self.flags:#06b})"
@@ -16,6 +16,8 @@ class PressureSensorDeploymentDetail(models.Model, SetupSimpleHistory):
 
     Used for both gauge pressure and absolute pressure sensor deployments.
     Stores the installation elevation which is needed for water level calculations.
+    Absolute pressure deployments are compensated with the barometer deployment
+    (see watersync.sensor.compensation).
     """
 
     deployment = models.OneToOneField(
@@ -28,6 +30,21 @@ class PressureSensorDeploymentDetail(models.Model, SetupSimpleHistory):
         verbose_name="Installation Elevation (m)",
         help_text="Elevation of the sensor installation point in meters (above sea level or reference datum)",
     )
+    barometer = models.ForeignKey(
+        "sensor.Deployment",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="compensated_deployments",
+        limit_choices_to={"variable": "pressure"},
+        verbose_name="Barometer",
+        help_text="Barometric pressure deployment used to compensate absolute pressures",
+    )
+    fluid_density = models.FloatField(
+        default=1000.0,
+        verbose_name="Fluid Density (kg/m³)",
+        help_text="Density of the water above the sensor, higher for saline water",
+    )
 
     history = HistoricalRecords()
 
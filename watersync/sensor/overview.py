@@ -0,0 +1,180 @@
+"""Cached overview data of a deployment.
+
+The deployment page shows the record count, the time range, statistics, the
+latest value and a plot. `deployment_overview` collects all of it at once:
+
+    - With rollups (bounds on full hours, no flagged data excluded), one
+      aggregate query over the rollups gives count, range, statistics and
+      the latest value, and the plot is read from the rollups as well, see
+      `watersync.sensor.rollups.plot_series`.
+    - Otherwise the records are read once, with
+      `watersync.sensor.chunks.load_series` or
+      `watersync.sensor.qc.clean_series`, and everything is computed from
+      the same arrays.
+
+The result, with the plot series already downsampled, is cached per
+deployment and request parameters. `refresh_rollups`, which every write
+path calls, and the quality control invalidate it by bumping the version
+of the deployment's entries, see `watersync.core.generics.cache`.
+
+Typical usage:
+
+    >>> overview = deployment_overview(deployment.pk, start, end, width=1200)
+    >>> overview.statistics["avg_value"], overview.latest_value
+"""
+
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from django.core.cache import cache
+from django.db.models import F, FloatField, Max, Min, Sum
+
+import numpy as np
+
+from watersync.core.generics.cache import bump_version, versioned_key
+from watersync.core.generics.querysets import Last
+from watersync.sensor.chunks import load_series
+from watersync.sensor.downsampling import DEFAULT_WIDTH, downsample
+from watersync.sensor.models import SensorRecordRollup
+from watersync.sensor.qc import clean_series, has_flags
+from watersync.sensor.rollups import (
+    CACHE_NAMESPACE,
+    array_statistics,
+    plot_series,
+    statistics_resolution,
+)
+
+TIMEOUT = 60 * 60 * 24
+
+
+@dataclass
+class DeploymentOverview:
+    """Everything the overview of a deployment shows.
+
+    Attributes:
+        statistics: Dict like `TimeSeriesMixin.statistics()`.
+        first_at, last_at: Time of the first and last record, or None.
+        latest_value: Value of the last record, or None.
+        timestamps, values: Plot series, downsampled to the plot width.
+    """
+
+    statistics: dict
+    first_at: datetime | None
+    last_at: datetime | None
+    latest_value: float | None
+    timestamps: np.ndarray
+    values: np.ndarray
+
+    @property
+    def count(self) -> int:
+        return self.statistics["count"]
+
+
+def _as_datetime(timestamp: np.datetime64) -> datetime:
+    ms = int(np.datetime64(timestamp, "ms").astype(np.int64))
+    return datetime.fromtimestamp(ms / 1000, tz=UTC)
+
+
+def _from_arrays(timestamps, values, width) -> DeploymentOverview:
+    """Compute the overview from the records of the range."""
+    plot_timestamps, plot_values = downsample(timestamps, values, width=width)
+    if not len(timestamps):
+        return DeploymentOverview(
+            array_statistics(values), None, None, None, plot_timestamps, plot_values
+        )
+    return DeploymentOverview(
+        statistics=array_statistics(values),
+        first_at=_as_datetime(timestamps[0]),
+        last_at=_as_datetime(timestamps[-1]),
+        latest_value=float(values[-1]),
+        timestamps=plot_timestamps,
+        values=plot_values,
+    )
+
+
+def _from_rollups(
+    deployment_id, resolution, start, end, width
+) -> DeploymentOverview | None:
+    """Compute the overview from the rollups, or None if there are none."""
+    # Aggregates cannot be named like the fields other aggregates read
+    rollups = SensorRecordRollup.objects.filter(
+        deployment_id=deployment_id, resolution=resolution
+    )
+    if start is not None:
+        rollups = rollups.filter(bucket__gte=start)
+    if end is not None:
+        rollups = rollups.filter(bucket__lt=end)
+    summary = rollups.aggregate(
+        min_value=Min("min_value"),
+        max_value=Max("max_value"),
+        total=Sum("sum_value"),
+        count=Sum("count"),
+        first=Min("first_at"),
+        last=Max("last_at"),
+        latest=Last("last_value", F("last_at"), output_field=FloatField()),
+    )
+    if not summary["count"]:
+        return None
+
+    timestamps, values = plot_series(deployment_id, start, end, width=width)
+    timestamps, values = downsample(timestamps, values, width=width)
+    return DeploymentOverview(
+        statistics={
+            "min_value": summary["min_value"],
+            "max_value": summary["max_value"],
+            "avg_value": summary["total"] / summary["count"],
+            "count": summary["count"],
+        },
+        first_at=summary["first"],
+        last_at=summary["last"],
+        latest_value=summary["latest"],
+        timestamps=timestamps,
+        values=values,
+    )
+
+
+def compute_overview(
+    deployment_id, start=None, end=None, width=DEFAULT_WIDTH, exclude_flagged=False
+) -> DeploymentOverview:
+    """Compute the overview of a deployment without the cache."""
+    if exclude_flagged and has_flags(deployment_id, start, end):
+        return _from_arrays(*clean_series(deployment_id, start, end), width)
+
+    resolution = statistics_resolution(start, end)
+    if resolution is not None:
+        overview = _from_rollups(deployment_id, resolution, start, end, width)
+        if overview is not None:
+            return overview
+    return _from_arrays(*load_series(deployment_id, start, end), width)
+
+
+def deployment_overview(
+    deployment_id, start=None, end=None, width=DEFAULT_WIDTH, exclude_flagged=False
+) -> DeploymentOverview:
+    """Return the overview of a deployment, from the cache if possible.
+
+    Args:
+        deployment_id: Primary key of the deployment.
+        start: Inclusive lower bound (aware) or None.
+        end: Exclusive upper bound (aware) or None.
+        width: Target plot width in pixels.
+        exclude_flagged: Leave out records flagged by quality control.
+    """
+    key = versioned_key(
+        CACHE_NAMESPACE,
+        deployment_id,
+        start and start.isoformat(),
+        end and end.isoformat(),
+        width,
+        int(exclude_flagged),
+    )
+    overview = cache.get(key)
+    if overview is None:
+        overview = compute_overview(deployment_id, start, end, width, exclude_flagged)
+        cache.set(key, overview, TIMEOUT)
+    return overview
+
+
+def invalidate_overview(deployment_id) -> None:
+    """Drop the cached overviews of a deployment."""
+    bump_version(CACHE_NAMESPACE, deployment_id)
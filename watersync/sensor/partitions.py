@@ -0,0 +1,204 @@
+"""Monthly range partitions of the sensor record table.
+
+`sensor_sensorrecord` is partitioned by `timestamp` into one partition per
+calendar month (UTC), named `sensor_sensorrecord_pYYYY_MM`. Every partition
+has its own, small indexes, queries filtering on `timestamp` only touch the
+partitions of the range, and old months can be detached as a whole instead
+of being deleted row by row.
+
+Records outside all monthly partitions, e.g. from importing an old logger
+file, land in the default partition `sensor_sensorrecord_default`.
+`ensure_partitions` creates the partitions of the coming months and moves
+rows from the default partition into partitions of their own month. It is
+run daily by the `maintain_sensor_partitions` task and can be run by hand
+with the `sensor_partitions` management command.
+
+The model API is unchanged. The primary key of the table is (id, timestamp),
+as PostgreSQL requires the partition key in every unique constraint; ids
+still come from a single sequence and stay unique.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from datetime import UTC, date, datetime
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "sensor_sensorrecord"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+DEFAULT_MONTHS_AHEAD = 3
+
+PARTITION_RE = re.compile(rf"^{PARENT_TABLE}_p(?P<year>\d{{4}})_(?P<month>\d{{2}})$")
+
+
+def add_months(month: date, months: int) -> date:
+    """Return the first day of the month `months` after `month`."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_windows(start: datetime, end: datetime):
+    """Split [start, end) into (start, end) windows at month boundaries (UTC)."""
+    month = start.date().replace(day=1)
+    while start < end:
+        month = add_months(month, 1)
+        boundary = min(datetime(month.year, month.month, 1, tzinfo=UTC), end)
+        yield start, boundary
+        start = boundary
+
+
+def partition_name(month: date) -> str:
+    """Return the name of the partition holding `month`."""
+    return f"{PARENT_TABLE}_p{month:%Y_%m}"
+
+
+def _bound(month: date) -> str:
+    return datetime(month.year, month.month, 1, tzinfo=UTC).isoformat()
+
+
+@dataclass(frozen=True)
+class Partition:
+    """A monthly partition of the sensor record table."""
+
+    name: str
+    month: date
+
+    @property
+    def start(self) -> datetime:
+        return datetime(self.month.year, self.month.month, 1, tzinfo=UTC)
+
+    @property
+    def end(self) -> datetime:
+        following = add_months(self.month, 1)
+        return datetime(following.year, following.month, 1, tzinfo=UTC)
+
+
+def list_partitions() -> list[Partition]:
+    """Return the monthly partitions attached to the record table, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [PARENT_TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            month = date(int(match["year"]), int(match["month"]), 1)
+            partitions.append(Partition(name, month))
+    return sorted(partitions, key=lambda partition: partition.month)
+
+
+def _default_months() -> list[date]:
+    """Months that have rows in the default partition."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT DISTINCT date_trunc('month', "timestamp" AT TIME ZONE 'UTC')::date
+            FROM {DEFAULT_PARTITION}
+            """
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def create_partition(month: date) -> str:
+    """Create the partition of `month`, taking over its rows from the default.
+
+    The partition is built as a standalone table, filled with the rows of
+    the month found in the default partition and then attached, so the
+    default partition never holds rows that belong to an attached month.
+
+    Returns:
+        The name of the new partition.
+    """
+    name = partition_name(month)
+    start, end = _bound(month), _bound(add_months(month, 1))
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING STORAGE)"
+        )
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE "timestamp" >= %s AND "timestamp" < %s
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """,
+            [start, end],
+        )
+        # Attaching creates the indexes and constraints of the parent
+        cursor.execute(
+            f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            [start, end],
+        )
+
+    logger.info("Created partition %s", name)
+    return name
+
+
+def ensure_partitions(
+    months_ahead: int = DEFAULT_MONTHS_AHEAD, today=None
+) -> list[str]:
+    """Create missing partitions for the coming months and the default's rows.
+
+    Args:
+        months_ahead: Number of months after the current one to create.
+        today: Reference date, defaults to the current date.
+
+    Returns:
+        Names of the created partitions.
+    """
+    today = today or timezone.now().date()
+    current = date(today.year, today.month, 1)
+
+    existing = {partition.month for partition in list_partitions()}
+    wanted = {add_months(current, offset) for offset in range(months_ahead + 1)}
+    wanted.update(_default_months())
+
+    return [create_partition(month) for month in sorted(wanted - existing)]
+
+
+def detach_partitions(before: date, drop: bool = False) -> list[str]:
+    """Detach the partitions of all months before `before`.
+
+    Detaching only changes the catalog, the records of the month disappear
+    from the table at once without a bulk delete. Detached partitions are
+    kept as standalone tables for archiving unless `drop` is set. Rollups of
+    the detached months are kept.
+
+    Args:
+        before: First month to keep.
+        drop: Drop the detached tables.
+
+    Returns:
+        Names of the detached partitions.
+    """
+    detached = []
+    for partition in list_partitions():
+        if partition.end > datetime(before.year, before.month, 1, tzinfo=UTC):
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {partition.name}"
+            )
+            if drop:
+                cursor.execute(f"DROP TABLE {partition.name}")
+        logger.info("Detached partition %s", partition.name)
+        detached.append(partition.name)
+    return detached
@@ -1,21 +1,126 @@
-import plotly.express as px
+"""Plotly figures of sensor series with binary typed-array data.
+
+Serialising a figure with `pio.to_json` writes every timestamp as a date
+string and every value as a JSON number, which the browser has to parse
+one by one. The figures here carry their data as typed arrays instead, the
+`{"dtype": ..., "bdata": <base64>}` form that plotly.js (>= 2.28) decodes
+straight into a `Float64Array` or `Float32Array`:
+
+    - x: epoch milliseconds as float64 on a date axis. plotly.js has no
+      64-bit integer arrays; float64 holds epoch milliseconds exactly.
+    - y: values as float64, or float32 with `dtype="f4"` for half the size.
+
+`series_bytes` packs the same arrays as raw little-endian binary for
+clients that build the typed arrays themselves.
+
+Typical usage:
+
+    >>> figure = sensor_figure(timestamps, values, deployment, width=1200)
+    >>> Plotly.newPlot(div, figure.data, figure.layout)  # in the browser
+"""
+
+import base64
+import json
+
+import numpy as np
+import plotly.graph_objects as go
 import plotly.io as pio
 
+from watersync.sensor.downsampling import DEFAULT_WIDTH, downsample
 
-def create_sensor_graph(data, deployment):
-    plotly_data = {
-        "timestamp": [d["timestamp"] for d in data],
-        "value": [d["value"] for d in data],
-        "type": [d["type"] for d in data],
-        "unit": [d["unit"] for d in data],
-    }
+# Value dtypes of the typed arrays, by their plotly.js name
+VALUE_DTYPES = {"f4": np.dtype("<f4"), "f8": np.dtype("<f8")}
+
+
+def epoch_ms(timestamps) -> np.ndarray:
+    """Return datetime64 timestamps as float64 epoch milliseconds."""
+    return np.asarray(timestamps, dtype="datetime64[ms]").view(np.int64).astype("<f8")
+
+
+def typed_array(values, dtype: str = "f8") -> dict:
+    """Encode an array as a plotly.js typed array."""
+    array = np.ascontiguousarray(values, dtype=VALUE_DTYPES[dtype])
+    return {"dtype": dtype, "bdata": base64.b64encode(array.tobytes()).decode("ascii")}
+
+
+def series_bytes(timestamps, values, dtype: str = "f8") -> bytes:
+    """Pack a series as raw binary: the x array followed by the y array.
 
-    fig = px.line(
-        data_frame=plotly_data,
-        x="timestamp",
-        y="value",
-        color="type",
+    Both arrays have the same length; x is float64 epoch milliseconds and
+    y has `dtype`, all little-endian.
+    """
+    x = epoch_ms(timestamps)
+    y = np.ascontiguousarray(values, dtype=VALUE_DTYPES[dtype])
+    return x.tobytes() + y.tobytes()
+
+
+def sensor_layout(deployment, label, unit) -> dict:
+    """Return the layout of a sensor plot as a JSON-ready dict."""
+    fig = go.Figure()
+    fig.update_layout(
         title=f"Sensor Data for {deployment.sensor.identifier}",
-        labels={"value": "Measurement value", "timestamp": "timestamp"},
+        xaxis={"title": "timestamp", "type": "date"},
+        yaxis_title=f"{label} ({unit})",
+    )
+    return json.loads(pio.to_json(fig))["layout"]
+
+
+def sensor_figure(
+    timestamps,
+    values,
+    deployment,
+    width=DEFAULT_WIDTH,
+    method="lttb",
+    label=None,
+    unit=None,
+    dtype="f8",
+) -> dict:
+    """Create the plotly figure for the records of a deployment.
+
+    The series is downsampled to about one point per pixel of `width` before
+    it is encoded, so the size of the figure does not grow with the length
+    of the deployment.
+
+    Args:
+        timestamps: Sorted datetime64 array, e.g. from `as_arrays()`.
+        values: Float array of the same length.
+        deployment: The deployment the records belong to.
+        width: Target plot width in pixels.
+        method: Downsampling method, see `watersync.sensor.downsampling`.
+        label, unit: Name and unit of a derived series, default to the
+            variable and unit of the deployment.
+        dtype: Dtype of the values, "f8" or "f4".
+
+    Returns:
+        Dict with the "data" and "layout" of the figure.
+    """
+    timestamps, values = downsample(timestamps, values, width=width, method=method)
+    label = label or deployment.get_variable_display()
+    unit = unit or deployment.unit
+
+    trace = {
+        "type": "scatter",
+        "mode": "lines",
+        "name": label,
+        "x": typed_array(epoch_ms(timestamps)),
+        "y": typed_array(values, dtype),
+    }
+    return {"data": [trace], "layout": sensor_layout(deployment, label, unit)}
+
+
+def create_sensor_graph(
+    timestamps,
+    values,
+    deployment,
+    width=DEFAULT_WIDTH,
+    method="lttb",
+    label=None,
+    unit=None,
+):
+    """Create the plotly figure JSON for the records of a deployment.
+
+    See `sensor_figure` for the arguments.
+    """
+    return json.dumps(
+        sensor_figure(timestamps, values, deployment, width, method, label, unit)
     )
-    return pio.to_json(fig)
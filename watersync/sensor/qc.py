@@ -0,0 +1,386 @@
+"""Automatic quality control of sensor records.
+
+Every check is a vectorised pass over the NumPy arrays of a series and
+returns a boolean mask of the records that fail it:
+
+    - Spikes: readings more than `spike_threshold` standard deviations from
+      the mean of their neighbours, over a centred window of
+      `spike_window` readings. The reading itself is left out of the
+      window statistics, so a spike does not mask itself.
+    - Flatlines: runs of at least `flatline_run` identical readings, typical
+      of a stuck or disconnected logger. A run entered and left by one
+      `resolution` step in the same direction is a tread of a slow trend
+      and is not flagged.
+    - Steps: jumps between consecutive readings after which the level stays,
+      larger than `step_threshold` times the robust scale (MAD) of the
+      differences. Typical of a sensor that was moved or re-hung.
+    - Gaps: intervals longer than `gap_factor` times the median sampling
+      interval. Gaps have no records; they are stored as the empty range
+      between the records around them.
+
+Stored values are quantised (three decimals), so on a slow series most
+consecutive differences are 0 and the spread of a window can be 0 too.
+The standard deviation of the spike check and the robust scale of the
+step check are therefore never taken below `resolution`.
+
+The results are stored as `QCFlag` ranges holding a bitmask of `Flag`.
+Deployments are checked month by month with a margin, so the memory use is
+bounded. The raw records are never modified: `clean_series` reads a series
+like `watersync.sensor.chunks.load_series` without the flagged records, and
+plots, statistics and exports use it when flagged data is excluded.
+
+Typical usage:
+
+    >>> check_deployment(deployment.pk)
+    >>> timestamps, values = clean_series(deployment.pk, start, end)
+"""
+
+import enum
+import logging
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from django.db import transaction
+
+import numpy as np
+
+from watersync.core.generics.cache import bump_version
+from watersync.sensor.chunks import load_series, series_range
+from watersync.sensor.models import QCFlag
+from watersync.sensor.partitions import month_windows
+from watersync.sensor.rollups import CACHE_NAMESPACE
+
+logger = logging.getLogger(__name__)
+
+# Margin read around every checked month, so windows and runs are not cut
+# at the month boundary
+MARGIN = timedelta(days=1)
+
+# Consistency constant of the MAD for normally distributed data
+MAD_SCALE = 1.4826
+
+
+class Flag(enum.IntFlag):
+    """Failed checks of a record, stored as a bitmask."""
+
+    SPIKE = 1
+    FLATLINE = 2
+    STEP = 4
+    GAP = 8
+
+
+# Flags of records dropped by `clean_series` by default. Gap ranges contain
+# no records, so excluding them would not change anything.
+EXCLUDED = Flag.SPIKE | Flag.FLATLINE | Flag.STEP
+
+
+@dataclass(frozen=True)
+class QCConfig:
+    """Thresholds of the checks, see the module docstring."""
+
+    spike_window: int = 25
+    spike_threshold: float = 4.0
+    flatline_run: int = 12
+    step_window: int = 5
+    step_threshold: float = 8.0
+    gap_factor: float = 5.0
+    # Smallest change the values can show, the precision of SensorRecord.value
+    resolution: float = 0.001
+
+
+DEFAULT_CONFIG = QCConfig()
+
+
+# ================ Checks ========================
+
+
+def _window_sums(values: np.ndarray, before: int, after: int):
+    """Sums over the readings [i - before, i + after] via cumulative sums."""
+    n = len(values)
+    index = np.arange(n)
+    lower = np.clip(index - before, 0, n)
+    upper = np.clip(index + after + 1, 0, n)
+    sums = np.concatenate([[0.0], np.cumsum(values)])
+    return sums[upper] - sums[lower], upper - lower
+
+
+def spike_mask(
+    values, window: int = 25, threshold: float = 4.0, resolution: float = 0.001
+) -> np.ndarray:
+    """Readings with a z-score above `threshold` against their neighbours.
+
+    The standard deviation of the neighbours is at least `resolution`.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 3:
+        return np.zeros(len(values), dtype=bool)
+
+    # Centred on the median to keep the sums of squares precise
+    centred = values - np.median(values)
+    half = window // 2
+    sums, counts = _window_sums(centred, half, half)
+    squares, _ = _window_sums(centred**2, half, half)
+    sums, squares, counts = sums - centred, squares - centred**2, counts - 1
+
+    mean = sums / counts
+    std = np.maximum(np.sqrt(np.maximum(squares / counts - mean**2, 0.0)), resolution)
+    deviation = np.abs(centred - mean)
+    return (counts >= 2) & (deviation > threshold * std) & (deviation > 0)
+
+
+def flatline_mask(
+    values, min_run: int = 12, resolution: float | None = None
+) -> np.ndarray:
+    """Readings in runs of at least `min_run` identical values.
+
+    With a `resolution`, runs between changes of one resolution step in the
+    same direction are the treads of a slowly rising or falling series and
+    are not flagged. At the ends of the series one such change suffices.
+    """
+    values = np.asarray(values)
+    if not len(values):
+        return np.zeros(0, dtype=bool)
+    changed = values[1:] != values[:-1]
+    run = np.concatenate([[0], np.cumsum(changed)])
+    flat = np.bincount(run) >= min_run
+
+    if resolution is not None and len(flat) > 1:
+        levels = values[np.concatenate([[0], np.flatnonzero(changed) + 1])]
+        rises = np.diff(levels.astype(np.float64))
+        # Direction of single-step changes, 0 for larger ones. Half a step
+        # of slack for the rounding of the stored values.
+        steps = np.where(np.abs(rises) <= 1.5 * resolution, np.sign(rises), 0.0)
+        before = np.concatenate([[np.nan], steps])
+        after = np.concatenate([steps, [np.nan]])
+        before = np.where(np.isnan(before), after, before)
+        after = np.where(np.isnan(after), before, after)
+        flat &= ~((before != 0) & (before == after))
+    return flat[run]
+
+
+def robust_scale(values) -> float:
+    """Standard deviation estimated from the median absolute deviation."""
+    values = np.asarray(values)
+    if not len(values):
+        return 0.0
+    return float(MAD_SCALE * np.median(np.abs(values - np.median(values))))
+
+
+def step_mask(
+    values,
+    window: int = 5,
+    threshold: float = 8.0,
+    spikes=None,
+    resolution: float = 0.001,
+) -> np.ndarray:
+    """First readings after a lasting jump of the level.
+
+    The jump between consecutive readings and the difference of the mean
+    level in the `window` readings after and before must both exceed
+    `threshold` times the robust scale of the differences, which is at
+    least `resolution`. Spikes and the reading after a spike are not steps.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    mask = np.zeros(len(values), dtype=bool)
+    if len(values) < 2 * window:
+        return mask
+
+    jumps = np.diff(values)
+    limit = threshold * max(robust_scale(jumps), resolution)
+    after, after_counts = _window_sums(values, 0, window - 1)
+    before, before_counts = _window_sums(values, window, -1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shift = after / after_counts - before / before_counts
+
+    mask[1:] = (np.abs(jumps) > limit) & (np.abs(shift[1:]) > limit)
+    if spikes is not None:
+        mask &= ~spikes
+        mask[1:] &= ~spikes[:-1]
+    return mask
+
+
+def gap_ranges(
+    timestamps, factor: float = 5.0
+) -> list[tuple[np.datetime64, np.datetime64]]:
+    """Return the (start, end) of intervals longer than `factor` median intervals.
+
+    The ranges lie strictly between the records around the gap.
+    """
+    timestamps = np.asarray(timestamps, dtype="datetime64[ms]")
+    if len(timestamps) < 3:
+        return []
+    intervals = np.diff(timestamps)
+    index = np.flatnonzero(intervals > factor * np.median(intervals))
+    one = np.timedelta64(1, "ms")
+    return [(timestamps[i] + one, timestamps[i + 1] - one) for i in index]
+
+
+def check_series(timestamps, values, config: QCConfig = DEFAULT_CONFIG) -> np.ndarray:
+    """Run all record checks and return the `Flag` bitmask of every record."""
+    spikes = spike_mask(
+        values, config.spike_window, config.spike_threshold, config.resolution
+    )
+    flags = spikes * Flag.SPIKE
+    flags |= (
+        flatline_mask(values, config.flatline_run, config.resolution) * Flag.FLATLINE
+    )
+    flags |= (
+        step_mask(
+            values, config.step_window, config.step_threshold, spikes, config.resolution
+        )
+        * Flag.STEP
+    )
+    return flags.astype(np.uint16)
+
+
+def flag_ranges(timestamps, flags) -> list[tuple[np.datetime64, np.datetime64, int]]:
+    """Collapse per-record flags into (start, end, flags) runs of equal flags."""
+    timestamps = np.asarray(timestamps, dtype="datetime64[ms]")
+    flags = np.asarray(flags)
+    if not len(flags):
+        return []
+    boundaries = np.flatnonzero(flags[1:] != flags[:-1]) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [len(flags)]]) - 1
+    return [
+        (timestamps[first], timestamps[last], int(flags[first]))
+        for first, last in zip(starts, ends, strict=True)
+        if flags[first]
+    ]
+
+
+def apply_ranges(timestamps, ranges) -> np.ndarray:
+    """Return the bitmask of every timestamp from (start, end, flags) ranges.
+
+    Ranges may overlap; every bit is set by a running count of the ranges
+    carrying it.
+    """
+    timestamps = np.asarray(timestamps, dtype="datetime64[ms]")
+    result = np.zeros(len(timestamps), dtype=np.uint16)
+    if not ranges:
+        return result
+    starts = np.array([start for start, _, _ in ranges], dtype="datetime64[ms]")
+    ends = np.array([end for _, end, _ in ranges], dtype="datetime64[ms]")
+    bits = np.array([flags for _, _, flags in ranges])
+    first = np.searchsorted(timestamps, starts, side="left")
+    after = np.searchsorted(timestamps, ends, side="right")
+    for flag in Flag:
+        carrying = (bits & flag) != 0
+        delta = np.zeros(len(timestamps) + 1, dtype=np.int64)
+        np.add.at(delta, first[carrying], 1)
+        np.add.at(delta, after[carrying], -1)
+        result[np.cumsum(delta[:-1]) > 0] |= np.uint16(flag)
+    return result
+
+
+# ================ Storage ========================
+
+
+def _to_datetime(timestamp: np.datetime64) -> datetime:
+    ms = int(np.datetime64(timestamp, "ms").astype(np.int64))
+    return datetime.fromtimestamp(ms / 1000, tz=UTC)
+
+
+def check_deployment(
+    deployment_id, start=None, end=None, config: QCConfig = DEFAULT_CONFIG
+) -> int:
+    """Check the records of a deployment and replace its stored flags.
+
+    Every month is read with a margin on both sides and its flags are
+    replaced in one transaction.
+
+    Args:
+        deployment_id: Primary key of the deployment.
+        start: Inclusive lower bound (aware) or None for the first record.
+        end: Exclusive upper bound (aware) or None for after the last record.
+        config: Thresholds of the checks.
+
+    Returns:
+        Number of flagged ranges stored.
+    """
+    first, last = series_range(deployment_id)
+    if first is None:
+        return 0
+    start = max(start, first) if start else first
+    end = (
+        min(end, last + timedelta(milliseconds=1))
+        if end
+        else last + timedelta(milliseconds=1)
+    )
+
+    stored = 0
+    for window_start, window_end in month_windows(start, end):
+        timestamps, values = load_series(
+            deployment_id, window_start - MARGIN, window_end + MARGIN
+        )
+        ranges = flag_ranges(timestamps, check_series(timestamps, values, config))
+        ranges += [
+            (gap_start, gap_end, int(Flag.GAP))
+            for gap_start, gap_end in gap_ranges(timestamps, config.gap_factor)
+        ]
+        lower = np.datetime64(window_start.replace(tzinfo=None), "ms")
+        upper = np.datetime64(window_end.replace(tzinfo=None), "ms")
+        flags = [
+            QCFlag(
+                deployment_id=deployment_id,
+                start=_to_datetime(range_start),
+                end=_to_datetime(range_end),
+                flags=bits,
+            )
+            # Ranges are owned by the month they start in
+            for range_start, range_end, bits in sorted(ranges, key=lambda r: r[0])
+            if lower <= range_start < upper
+        ]
+        with transaction.atomic():
+            QCFlag.objects.filter(
+                deployment_id=deployment_id,
+                start__gte=window_start,
+                start__lt=window_end,
+            ).delete()
+            QCFlag.objects.bulk_create(flags)
+        stored += len(flags)
+
+    # Overviews without flagged data depend on the flags
+    bump_version(CACHE_NAMESPACE, deployment_id)
+
+    logger.info("Checked deployment %s: %s flagged ranges", deployment_id, stored)
+    return stored
+
+
+def stored_ranges(deployment_id, start=None, end=None, flags: int = EXCLUDED):
+    """Return the stored (start, end, flags) ranges carrying any of `flags`."""
+    queryset = QCFlag.objects.filter(deployment_id=deployment_id)
+    if start is not None:
+        queryset = queryset.filter(end__gte=start)
+    if end is not None:
+        queryset = queryset.filter(start__lt=end)
+    return [
+        (
+            np.datetime64(range_start.replace(tzinfo=None), "ms"),
+            np.datetime64(range_end.replace(tzinfo=None), "ms"),
+            bits,
+        )
+        for range_start, range_end, bits in queryset.values_list(
+            "start", "end", "flags"
+        )
+        if bits & flags
+    ]
+
+
+def has_flags(deployment_id, start=None, end=None, flags: int = EXCLUDED) -> bool:
+    """Whether any record of the deployment in the range carries `flags`."""
+    return bool(stored_ranges(deployment_id, start, end, flags))
+
+
+def clean_series(deployment_id, start=None, end=None, flags: int = EXCLUDED):
+    """Return the records of a deployment without the flagged ones.
+
+    Shaped like `watersync.sensor.chunks.load_series`, so it can be passed
+    as the loader of exports.
+    """
+    timestamps, values = load_series(deployment_id, start, end)
+    ranges = stored_ranges(deployment_id, start, end, flags)
+    if not ranges:
+        return timestamps, values
+    keep = (apply_ranges(timestamps, ranges) & flags) == 0
+    return timestamps[keep], values[keep]
@@ -0,0 +1,206 @@
+"""Regularisation of irregular logger timestamps.
+
+Rollups, the alignment of series and gap detection assume readings on a
+regular grid, but logger clocks drift and sampling intervals change during
+a deployment. Regularising a series takes two steps:
+
+    1. Drift correction. Clock checks in the field give reference points
+       (logger time, true time). The clock offset is interpolated linearly
+       between them and held constant before the first and after the last:
+
+           true time = logger time + offset(logger time)
+
+    2. Resampling on a grid of multiples of the interval since the epoch,
+       either by snapping the nearest reading to a grid point or by linear
+       interpolation between the readings around it.
+
+Grid points without readings within the tolerance are NaN, so gaps stay
+gaps instead of being bridged. Since the grid does not depend on where a
+series starts, any time range of a series can be regularised on its own
+as long as it includes the tolerance plus the largest clock offset around
+it; `watersync.sensor.derived` does that month by month.
+
+Everything is vectorised with NumPy on datetime64[ms] arrays.
+
+Typical usage:
+
+    >>> timestamps = correct_drift(timestamps, [("2024-03-01T10:00", "2024-03-01T10:02:30")])
+    >>> grid, values = regularise(timestamps, values, timedelta(minutes=15))
+"""
+
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+SNAP = "snap"
+LINEAR = "linear"
+METHODS = (SNAP, LINEAR)
+
+
+def _milliseconds(timestamps) -> np.ndarray:
+    return np.asarray(timestamps, dtype="datetime64[ms]").view(np.int64)
+
+
+def reference_offsets(reference_points) -> tuple[np.ndarray, np.ndarray]:
+    """Parse clock checks into logger times and clock offsets.
+
+    Args:
+        reference_points: Pairs of (logger time, true time) as ISO 8601
+            strings or datetimes; naive times are taken as UTC.
+
+    Returns:
+        Tuple of (logger times, offsets), both in ms and sorted by logger time.
+
+    Raises:
+        ValueError: If a reference point is not a pair of valid times.
+    """
+    if not reference_points:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    try:
+        logger_times, true_times = zip(*reference_points, strict=True)
+    except (TypeError, ValueError) as e:
+        raise ValueError(
+            "Reference points must be pairs of (logger time, true time)."
+        ) from e
+
+    logger_ms, true_ms = (
+        pd.to_datetime(pd.Series(times), utc=True, format="ISO8601")
+        .dt.tz_localize(None)
+        .to_numpy(dtype="datetime64[ms]")
+        .view(np.int64)
+        for times in (logger_times, true_times)
+    )
+    order = np.argsort(logger_ms, kind="stable")
+    return logger_ms[order], (true_ms - logger_ms)[order]
+
+
+def max_offset(reference_points) -> timedelta:
+    """Largest clock offset of the reference points, in either direction."""
+    _, offsets = reference_offsets(reference_points)
+    return (
+        timedelta(milliseconds=int(np.abs(offsets).max()))
+        if len(offsets)
+        else timedelta(0)
+    )
+
+
+def correct_drift(timestamps, reference_points) -> np.ndarray:
+    """Shift logger timestamps onto the true time of the reference points.
+
+    Returns:
+        datetime64[ms] array, the timestamps as they are without references.
+    """
+    ms = _milliseconds(timestamps)
+    logger_ms, offsets = reference_offsets(reference_points)
+    if len(offsets):
+        ms = ms + np.rint(np.interp(ms, logger_ms, offsets)).astype(np.int64)
+    return ms.view("datetime64[ms]")
+
+
+def regular_grid(start, end, interval: timedelta) -> np.ndarray:
+    """Multiples of `interval` since the epoch in [start, end], as datetime64[ms]."""
+    step = int(interval.total_seconds() * 1000)
+    if step <= 0:
+        raise ValueError("The interval must be positive.")
+    first = -(-int(_milliseconds(start)) // step) * step
+    return np.arange(first, int(_milliseconds(end)) + 1, step, dtype=np.int64).view(
+        "datetime64[ms]"
+    )
+
+
+def snap(timestamps, values, grid, tolerance: timedelta) -> np.ndarray:
+    """Value of the reading nearest to every grid point, NaN beyond the tolerance.
+
+    A reading halfway between two grid points goes to the earlier one.
+    """
+    ms, grid_ms = _milliseconds(timestamps), _milliseconds(grid)
+    values = np.asarray(values, dtype=np.float64)
+    if not len(ms):
+        return np.full(len(grid_ms), np.nan)
+
+    after = np.searchsorted(ms, grid_ms)
+    before = np.clip(after - 1, 0, len(ms) - 1)
+    after = np.clip(after, 0, len(ms) - 1)
+    distance_before = np.abs(grid_ms - ms[before])
+    distance_after = np.abs(ms[after] - grid_ms)
+
+    nearest = np.where(distance_after < distance_before, after, before)
+    distance = np.minimum(distance_before, distance_after)
+    limit = int(tolerance.total_seconds() * 1000)
+    return np.where(distance <= limit, values[nearest], np.nan)
+
+
+def interpolate(timestamps, values, grid, tolerance: timedelta) -> np.ndarray:
+    """Linear interpolation at the grid points between the readings around them.
+
+    A grid point is NaN unless the readings at or before and at or after it
+    are both within the tolerance, so gaps are not bridged.
+    """
+    ms, grid_ms = _milliseconds(timestamps), _milliseconds(grid)
+    values = np.asarray(values, dtype=np.float64)
+    if not len(ms):
+        return np.full(len(grid_ms), np.nan)
+
+    before = np.searchsorted(ms, grid_ms, side="right") - 1
+    after = np.searchsorted(ms, grid_ms, side="left")
+    limit = int(tolerance.total_seconds() * 1000)
+    covered = (
+        (before >= 0)
+        & (after < len(ms))
+        & (grid_ms - ms[np.clip(before, 0, None)] <= limit)
+        & (ms[np.clip(after, None, len(ms) - 1)] - grid_ms <= limit)
+    )
+    return np.where(covered, np.interp(grid_ms, ms, values), np.nan)
+
+
+def default_tolerance(interval: timedelta, method: str) -> timedelta:
+    """Half the interval to snap, the whole interval to interpolate."""
+    return interval / 2 if method == SNAP else interval
+
+
+def regularise(
+    timestamps,
+    values,
+    interval: timedelta,
+    method: str = SNAP,
+    tolerance: timedelta | None = None,
+    reference_points=None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Resample a series on a regular grid after correcting the clock drift.
+
+    Args:
+        timestamps: Sorted datetime64[ms] logger timestamps.
+        values: Values of the readings.
+        interval: Spacing of the grid.
+        method: SNAP the nearest reading or interpolate LINEAR.
+        tolerance: Largest distance between a grid point and a reading it
+            is computed from, see `default_tolerance`.
+        reference_points: Clock checks, see `reference_offsets`.
+
+    Returns:
+        Tuple of (grid as datetime64[ms], values), NaN where no reading is
+        within the tolerance. The grid spans the corrected timestamps,
+        widened by the tolerance when snapping.
+
+    Raises:
+        ValueError: If the method, interval or reference points are invalid.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown regularisation method: {method}")
+    tolerance = default_tolerance(interval, method) if tolerance is None else tolerance
+    timestamps = correct_drift(timestamps, reference_points)
+    values = np.asarray(values, dtype=np.float64)
+    if not len(timestamps):
+        return timestamps, values
+
+    # A clock set back by a reference point can reorder readings
+    order = np.argsort(timestamps, kind="stable")
+    timestamps, values = timestamps[order], values[order]
+    if method == SNAP:
+        grid = regular_grid(
+            timestamps[0] - tolerance, timestamps[-1] + tolerance, interval
+        )
+        return grid, snap(timestamps, values, grid, tolerance)
+    grid = regular_grid(timestamps[0], timestamps[-1], interval)
+    return grid, interpolate(timestamps, values, grid, tolerance)
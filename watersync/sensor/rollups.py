@@ -0,0 +1,432 @@
+"""Hourly and daily rollups of sensor records.
+
+Long-range plots and statistics of a deployment keep aggregating the same raw
+records. `SensorRecordRollup` stores min, max, sum, count, first and last per
+deployment and bucket at hourly and daily resolution, and the read functions
+here use the coarsest resolution that satisfies a request.
+
+Rollups are maintained incrementally: after records are inserted or
+(soft-)deleted, only the buckets covering the affected time range are
+recomputed. Hourly buckets are computed from the records (in NumPy where
+compressed chunks are involved), daily buckets from the hourly ones. Single
+record saves and deletes are handled by the signals in
+`watersync.sensor.signals`; bulk paths that skip signals (the ingest
+pipeline, `QuerySet.update()`) must call `refresh_rollups` themselves.
+Deployments whose records predate their rollups, e.g. all records stored
+before rollups were introduced, are backfilled once by migration 0018 and
+can be rebuilt with `refresh_sensor_rollups --missing`.
+
+Buckets are aligned to the Unix epoch, i.e. to UTC midnight and full hours.
+"""
+
+from datetime import UTC, datetime, timedelta
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Count, Exists, F, FloatField, Max, Min, OuterRef, Sum
+from django.db.models.functions import Cast
+
+import numpy as np
+
+from watersync.core.generics.cache import bump_version
+from watersync.core.generics.querysets import DateBin, Epoch, First, Last
+from watersync.sensor.chunks import has_chunks, load_series, series_range
+from watersync.sensor.downsampling import DEFAULT_WIDTH
+from watersync.sensor.models import (
+    Deployment,
+    SensorRecord,
+    SensorRecordChunk,
+    SensorRecordRollup,
+)
+from watersync.sensor.partitions import month_windows
+
+HOUR = SensorRecordRollup.Resolutions.HOUR
+DAY = SensorRecordRollup.Resolutions.DAY
+
+# Bucket width of every resolution, finest first
+RESOLUTION_STEPS = {
+    HOUR: timedelta(hours=1),
+    DAY: timedelta(days=1),
+}
+
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+# Cache namespace of data computed from the records of a deployment, bumped
+# whenever its rollups are refreshed, see `watersync.sensor.overview`
+CACHE_NAMESPACE = "sensor-records"
+
+
+def floor_bucket(timestamp: datetime, resolution: str) -> datetime:
+    """Return the start of the bucket containing `timestamp`."""
+    step = RESOLUTION_STEPS[resolution]
+    return timestamp - (timestamp - EPOCH) % step
+
+
+def is_aligned(timestamp: datetime | None, resolution: str) -> bool:
+    """Whether `timestamp` is a bucket boundary. Open bounds are aligned."""
+    return timestamp is None or floor_bucket(timestamp, resolution) == timestamp
+
+
+def _bucket_range(start: datetime, end: datetime, resolution: str):
+    """Buckets of `resolution` that cover the closed range [start, end]."""
+    step = RESOLUTION_STEPS[resolution]
+    return floor_bucket(start, resolution), floor_bucket(end, resolution) + step
+
+
+def _replace_buckets(deployment_id, resolution, start, end, rows):
+    """Replace the rollups of [start, end) with the aggregated rows."""
+    SensorRecordRollup.objects.filter(
+        deployment_id=deployment_id,
+        resolution=resolution,
+        bucket__gte=start,
+        bucket__lt=end,
+    ).delete()
+    SensorRecordRollup.objects.bulk_create(
+        [
+            SensorRecordRollup(
+                deployment_id=deployment_id, resolution=resolution, **row
+            )
+            for row in rows
+        ],
+        update_conflicts=True,
+        unique_fields=["deployment", "resolution", "bucket"],
+        update_fields=[
+            "min_value",
+            "max_value",
+            "sum_value",
+            "count",
+            "first_value",
+            "last_value",
+            "first_at",
+            "last_at",
+        ],
+    )
+
+
+def aggregate_hours(timestamps: np.ndarray, values: np.ndarray) -> list[dict]:
+    """Compute hourly rollup rows from a sorted series in NumPy.
+
+    Used instead of SQL when part of the range is stored in compressed
+    chunks, see `watersync.sensor.chunks`.
+    """
+    ms = np.asarray(timestamps).astype("datetime64[ms]").view(np.int64)
+    if not len(ms):
+        return []
+    step = int(RESOLUTION_STEPS[HOUR].total_seconds() * 1000)
+    hours = ms // step
+    starts = np.flatnonzero(np.diff(hours, prepend=hours[0] - 1))
+    stops = np.append(starts[1:], len(ms)) - 1
+
+    def as_datetime(value):
+        return datetime.fromtimestamp(int(value) / 1000, tz=UTC)
+
+    return [
+        {
+            "bucket": as_datetime(hours[start] * step),
+            "min_value": float(minimum),
+            "max_value": float(maximum),
+            "sum_value": float(total),
+            "count": int(stop - start + 1),
+            "first_value": float(values[start]),
+            "last_value": float(values[stop]),
+            "first_at": as_datetime(ms[start]),
+            "last_at": as_datetime(ms[stop]),
+        }
+        for start, stop, minimum, maximum, total in zip(
+            starts,
+            stops,
+            np.minimum.reduceat(values, starts),
+            np.maximum.reduceat(values, starts),
+            np.add.reduceat(values, starts),
+            strict=True,
+        )
+    ]
+
+
+def _refresh_hourly(deployment_id, start, end):
+    if has_chunks(deployment_id, start, end):
+        rows = aggregate_hours(*load_series(deployment_id, start, end))
+        _replace_buckets(deployment_id, HOUR, start, end, rows)
+        return
+
+    value = Cast("value", FloatField())
+    rows = (
+        SensorRecord.objects.filter(
+            deployment_id=deployment_id, timestamp__gte=start, timestamp__lt=end
+        )
+        .order_by()
+        .annotate(
+            bucket=DateBin(F("timestamp"), RESOLUTION_STEPS[HOUR].total_seconds())
+        )
+        .values("bucket")
+        .annotate(
+            min_value=Min(value),
+            max_value=Max(value),
+            sum_value=Sum(value),
+            count=Count("id"),
+            first_value=First(value, F("timestamp"), output_field=FloatField()),
+            last_value=Last(value, F("timestamp"), output_field=FloatField()),
+            first_at=Min("timestamp"),
+            last_at=Max("timestamp"),
+        )
+    )
+    _replace_buckets(deployment_id, HOUR, start, end, rows)
+
+
+def _refresh_daily(deployment_id, start, end):
+    # Annotations cannot reuse the field names of the rollup model, so the
+    # daily aggregates are computed under aliases and renamed afterwards.
+    rows = (
+        SensorRecordRollup.objects.filter(
+            deployment_id=deployment_id,
+            resolution=HOUR,
+            bucket__gte=start,
+            bucket__lt=end,
+        )
+        .order_by()
+        .annotate(day=DateBin(F("bucket"), RESOLUTION_STEPS[DAY].total_seconds()))
+        .values("day")
+        .annotate(
+            day_min=Min("min_value"),
+            day_max=Max("max_value"),
+            day_sum=Sum("sum_value"),
+            day_count=Sum("count"),
+            day_first=First("first_value", F("first_at"), output_field=FloatField()),
+            day_last=Last("last_value", F("last_at"), output_field=FloatField()),
+            day_first_at=Min("first_at"),
+            day_last_at=Max("last_at"),
+        )
+    )
+    _replace_buckets(
+        deployment_id,
+        DAY,
+        start,
+        end,
+        [
+            {
+                "bucket": row["day"],
+                "min_value": row["day_min"],
+                "max_value": row["day_max"],
+                "sum_value": row["day_sum"],
+                "count": row["day_count"],
+                "first_value": row["day_first"],
+                "last_value": row["day_last"],
+                "first_at": row["day_first_at"],
+                "last_at": row["day_last_at"],
+            }
+            for row in rows
+        ],
+    )
+
+
+def refresh_rollups(deployment_id, start: datetime, end: datetime) -> None:
+    """Recompute the rollups of a deployment that cover [start, end].
+
+    Every hourly and daily bucket overlapping the range is recomputed from
+    scratch, so the function is idempotent and can be called after inserts
+    as well as after (soft-)deletes. Buckets left without records are removed.
+    Cached data of the deployment, like its overview, is invalidated.
+
+    Args:
+        deployment_id: Primary key of the deployment.
+        start: Earliest affected timestamp (aware).
+        end: Latest affected timestamp (aware), inclusive.
+    """
+    hour_start, hour_end = _bucket_range(start, end, HOUR)
+    day_start, day_end = _bucket_range(start, end, DAY)
+
+    with transaction.atomic():
+        # Daily buckets are aggregated from the hourly rollups, which are
+        # current again once the affected hours are refreshed.
+        _refresh_hourly(deployment_id, hour_start, hour_end)
+        _refresh_daily(deployment_id, day_start, day_end)
+        # After commit, so no reader caches the old data under the new version
+        transaction.on_commit(partial(bump_version, CACHE_NAMESPACE, deployment_id))
+
+
+def rebuild_rollups(deployment_id) -> None:
+    """Recompute all rollups of a deployment from its records.
+
+    The records are aggregated one month per transaction, so memory use is
+    bounded by a month of records however long the deployment is.
+    """
+    start, end = series_range(deployment_id)
+    SensorRecordRollup.objects.filter(deployment_id=deployment_id).delete()
+    if start is None:
+        return
+    one = timedelta(milliseconds=1)
+    for window_start, window_end in month_windows(start, end + one):
+        refresh_rollups(deployment_id, window_start, window_end - one)
+
+
+def missing_rollups() -> list[int]:
+    """Return the pks of the deployments with records but no rollups."""
+    return list(
+        Deployment.objects.filter(
+            Exists(SensorRecord.objects.filter(deployment_id=OuterRef("pk")))
+            | Exists(SensorRecordChunk.objects.filter(deployment_id=OuterRef("pk")))
+        )
+        .exclude(
+            Exists(SensorRecordRollup.objects.filter(deployment_id=OuterRef("pk")))
+        )
+        .values_list("pk", flat=True)
+    )
+
+
+# ============================================================================
+# READ PATH
+# ============================================================================
+
+
+def plot_resolution(start: datetime, end: datetime, width: int) -> str | None:
+    """Return the coarsest resolution that still gives `width` buckets.
+
+    Returns None when even hourly buckets are too coarse for the range and
+    the raw records should be used.
+    """
+    span = end - start
+    for resolution, step in reversed(RESOLUTION_STEPS.items()):
+        if span / step >= width:
+            return resolution
+    return None
+
+
+def statistics_resolution(start: datetime | None, end: datetime | None) -> str | None:
+    """Return the coarsest resolution whose buckets tile [start, end) exactly.
+
+    Returns None when the bounds are not aligned to full hours.
+    """
+    for resolution in reversed(RESOLUTION_STEPS):
+        if is_aligned(start, resolution) and is_aligned(end, resolution):
+            return resolution
+    return None
+
+
+def _rollups(deployment_id, resolution, start, end):
+    queryset = SensorRecordRollup.objects.filter(
+        deployment_id=deployment_id, resolution=resolution
+    )
+    if start is not None:
+        queryset = queryset.filter(bucket__gte=start)
+    if end is not None:
+        queryset = queryset.filter(bucket__lt=end)
+    return queryset
+
+
+def bucket_extremes(minimum, maximum, first, last) -> np.ndarray:
+    """Minimum and maximum of every bucket in the order they likely occurred.
+
+    Buckets whose last value is below their first are taken as falling and
+    give their maximum first, all others their minimum, so falling segments
+    do not turn into a sawtooth.
+
+    Returns:
+        Values of the two points of every bucket, interleaved.
+    """
+    falling = np.asarray(last) < np.asarray(first)
+    return np.column_stack(
+        [np.where(falling, maximum, minimum), np.where(falling, minimum, maximum)]
+    ).ravel()
+
+
+def plot_series(deployment_id, start=None, end=None, width=DEFAULT_WIDTH):
+    """Return the series to plot for a deployment and time range.
+
+    When the range spans at least `width` hourly (or daily) buckets, the
+    series is built from the rollups: every bucket contributes its minimum
+    and maximum at the bucket start and middle, ordered by `bucket_extremes`,
+    so spikes stay visible. Otherwise the records are returned, see
+    `watersync.sensor.chunks.load_series`.
+
+    Args:
+        deployment_id: Primary key of the deployment.
+        start: Inclusive lower bound (aware) or None.
+        end: Exclusive upper bound (aware) or None.
+        width: Target plot width in pixels.
+
+    Returns:
+        Tuple of (timestamps as datetime64[ms], values as float64).
+    """
+    # The extent of the data is read from the daily rollups, which also
+    # cover records stored in chunks
+    bounds = _rollups(
+        deployment_id, DAY, start and floor_bucket(start, DAY), end
+    ).aggregate(first=Min("first_at"), last=Max("last_at"))
+    if bounds["first"] is None:
+        return load_series(deployment_id, start, end)
+
+    first = max(bounds["first"], start) if start else bounds["first"]
+    last = min(bounds["last"], end) if end else bounds["last"]
+    resolution = plot_resolution(first, last, width)
+    if resolution is None:
+        return load_series(deployment_id, start, end)
+
+    rows = (
+        _rollups(deployment_id, resolution, start, end)
+        .order_by("bucket")
+        .values_list(
+            Epoch(F("bucket")), "min_value", "max_value", "first_value", "last_value"
+        )
+    )
+    data = np.fromiter(
+        rows.iterator(chunk_size=10_000),
+        dtype=[
+            ("epoch", np.float64),
+            ("min", np.float64),
+            ("max", np.float64),
+            ("first", np.float64),
+            ("last", np.float64),
+        ],
+    )
+    buckets = np.round(data["epoch"] * 1000).astype(np.int64).astype("datetime64[ms]")
+    half = np.timedelta64(int(RESOLUTION_STEPS[resolution].total_seconds() * 500), "ms")
+    timestamps = np.column_stack([buckets, buckets + half]).ravel()
+    values = bucket_extremes(data["min"], data["max"], data["first"], data["last"])
+    return timestamps, values
+
+
+def array_statistics(values) -> dict:
+    """Return min, max, avg and count of an array of values."""
+    if not len(values):
+        return {"min_value": None, "max_value": None, "avg_value": None, "count": 0}
+    return {
+        "min_value": float(values.min()),
+        "max_value": float(values.max()),
+        "avg_value": float(values.mean()),
+        "count": len(values),
+    }
+
+
+def deployment_statistics(deployment_id, start=None, end=None):
+    """Return min, max, avg and count of the records of a deployment.
+
+    Reads the coarsest rollup whose buckets exactly cover [start, end) and
+    falls back to the records when the bounds are not aligned to full
+    hours.
+
+    Args:
+        deployment_id: Primary key of the deployment.
+        start: Inclusive lower bound (aware) or None.
+        end: Exclusive upper bound (aware) or None.
+
+    Returns:
+        Dict like `TimeSeriesMixin.statistics()`.
+    """
+    resolution = statistics_resolution(start, end)
+    if resolution is None:
+        _, values = load_series(deployment_id, start, end)
+        return array_statistics(values)
+
+    aggregation = _rollups(deployment_id, resolution, start, end).aggregate(
+        min_value=Min("min_value"),
+        max_value=Max("max_value"),
+        total=Sum("sum_value"),
+        count=Sum("count"),
+    )
+    count = aggregation["count"] or 0
+    return {
+        "min_value": aggregation["min_value"],
+        "max_value": aggregation["max_value"],
+        "avg_value": aggregation["total"] / count if count else None,
+        "count": count,
+    }
@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from watersync.sensor.derived import invalidate
+from watersync.sensor.models import SensorRecord
+from watersync.sensor.rollups import refresh_rollups
+
+
+@receiver(post_save, sender=SensorRecord)
+@receiver(post_delete, sender=SensorRecord)
+def refresh_record_rollups(sender, instance, **kwargs):
+    """Keep the rollups of the record's buckets in sync.
+
+    Covers creation, soft delete and restore (which save the record) and hard
+    delete. Bulk operations do not send these signals and refresh the rollups
+    themselves.
+    """
+    if kwargs.get("raw"):
+        return
+    refresh_rollups(instance.deployment_id, instance.timestamp, instance.timestamp)
+
+
+@receiver(post_save, sender=SensorRecord)
+@receiver(post_delete, sender=SensorRecord)
+def invalidate_derived_series(sender, instance, **kwargs):
+    """Recompute the derived series fed by the record's deployment."""
+    if kwargs.get("raw"):
+        return
+    invalidate(instance.deployment_id, instance.timestamp)
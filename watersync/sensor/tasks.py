@@ -0,0 +1,159 @@
+import logging
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from celery import group, shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+
+from watersync.sensor.derived import refresh_series
+from watersync.sensor.formats import get_format
+from watersync.sensor.ingest import (
+    DEFAULT_CHUNK_SIZE,
+    infer_file_format,
+    ingest_chunk,
+    ingest_columns,
+)
+from watersync.sensor.loaders import get_loader
+from watersync.sensor.models import Deployment, DerivedSeries, SensorImportJob
+from watersync.sensor.partitions import DEFAULT_MONTHS_AHEAD, ensure_partitions
+from watersync.sensor.qc import check_deployment
+
+logger = logging.getLogger(__name__)
+
+
+def job_columns(job) -> dict[str, Deployment]:
+    """Return the deployment of every value column of a multi-variable import job."""
+    columns = job.options.get("columns") or {}
+    deployments = Deployment.objects.in_bulk([int(pk) for pk in columns])
+    return {column: deployments[int(pk)] for pk, column in columns.items()}
+
+
+@shared_task(bind=True)
+def import_sensor_file(self, job_pk, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Import the file of a SensorImportJob in checkpointed chunks.
+
+    The file is read by the parser of its format, see
+    `watersync.sensor.formats`. The value columns of multi-variable files,
+    mapped to their deployments in `options["columns"]`, are fanned out with
+    `ingest_columns`; the counters then count values rather than rows.
+    Unless the format names its timestamp format, it is inferred from the
+    first chunk and kept in the options of the job, so resumed runs parse
+    the rest of the file the same way.
+
+    Every chunk is loaded and its counters are added to the job in one
+    transaction, so the committed counters always match the committed records.
+    When the soft time limit is hit, the current chunk is rolled back and the
+    task re-queues itself; the new run skips the rows already committed.
+    """
+    job = SensorImportJob.objects.select_related("deployment").get(pk=job_pk)
+    if not job.is_active:
+        return job.progress()
+
+    job.status = SensorImportJob.Status.RUNNING
+    job.started_at = job.started_at or timezone.now()
+    job.save(update_fields=["status", "started_at"])
+
+    loader = get_loader()
+
+    try:
+        logger_format = get_format(job.format, job.options)
+        columns = job_columns(job)
+        timestamp_format = logger_format.timestamp_format or job.options.get(
+            "timestamp_format"
+        )
+        with job.file.open("rb") as file:
+            chunks = logger_format.iter_chunks(
+                file, chunk_size, skip_rows=job.rows_parsed
+            )
+            for raw_chunk in chunks:
+                if not timestamp_format:
+                    timestamp_format = infer_file_format(raw_chunk)
+                    job.options = {**job.options, "timestamp_format": timestamp_format}
+                    job.save(update_fields=["options"])
+                with transaction.atomic():
+                    if columns:
+                        result = ingest_columns(
+                            columns,
+                            raw_chunk,
+                            user=job.created_by,
+                            loader=loader,
+                            timestamp_format=timestamp_format,
+                        )
+                    else:
+                        result = ingest_chunk(
+                            job.deployment,
+                            raw_chunk,
+                            user=job.created_by,
+                            loader=loader,
+                            timestamp_format=timestamp_format,
+                        )
+                    SensorImportJob.objects.filter(pk=job.pk).update(
+                        rows_parsed=F("rows_parsed") + result.rows_parsed,
+                        rows_inserted=F("rows_inserted") + result.rows_inserted,
+                        rows_skipped=F("rows_skipped") + result.rows_skipped,
+                        rows_covered=F("rows_covered") + result.rows_covered,
+                        rows_rejected=F("rows_rejected") + result.rows_rejected,
+                    )
+                job.refresh_from_db()
+                self.update_state(state="PROGRESS", meta=job.progress())
+    except SoftTimeLimitExceeded:
+        logger.info(
+            "Import job %s paused at row %s, re-queueing", job.pk, job.rows_parsed
+        )
+        import_sensor_file.apply_async(args=[job.pk], kwargs={"chunk_size": chunk_size})
+        return job.progress()
+    except Exception as e:
+        logger.exception("Import job %s failed", job.pk)
+        job.status = SensorImportJob.Status.FAILED
+        job.error = str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at"])
+        raise
+
+    job.status = SensorImportJob.Status.COMPLETED
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "finished_at"])
+    return job.progress()
+
+
+@shared_task
+def maintain_sensor_partitions(months_ahead=DEFAULT_MONTHS_AHEAD):
+    """Create the record partitions of the coming months.
+
+    Scheduled daily with django-celery-beat, see migration
+    0008_schedule_partition_maintenance.
+    """
+    created = ensure_partitions(months_ahead=months_ahead)
+    return {"created": created}
+
+
+@shared_task
+def refresh_derived_series(series_pk, full=False):
+    """Bring the output of a derived series up to date with its inputs.
+
+    Queued by `watersync.sensor.derived.invalidate` whenever input records
+    are written.
+    """
+    series = DerivedSeries.objects.select_related("output").get(pk=series_pk)
+    return {"written": refresh_series(series, full=full)}
+
+
+@shared_task
+def check_deployment_qc(deployment_pk):
+    """Run the automatic quality control checks of a deployment."""
+    return {"deployment": deployment_pk, "flagged": check_deployment(deployment_pk)}
+
+
+@shared_task
+def check_project_qc(project_pk):
+    """Queue the quality control of every deployment of a project.
+
+    The deployments are checked by parallel `check_deployment_qc` tasks.
+    """
+    deployments = Deployment.objects.for_project(project_pk).values_list(
+        "pk", flat=True
+    )
+    result = group(check_deployment_qc.s(pk) for pk in deployments).apply_async()
+    return {"project": project_pk, "group": result.id}
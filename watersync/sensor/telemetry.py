@@ -0,0 +1,335 @@
+"""Telemetry pushed by gateways, written with group commit.
+
+Gateways post batches of readings as NDJSON or CSV rows with the columns
+`sensor` (identifier), `variable`, `timestamp` and `value`. Every row is
+routed to the ongoing deployment of its sensor and variable, so one batch
+can feed many deployments.
+
+Many small batches arriving at once would each pay for their own
+transaction commit. `GroupCommitter` hands the batches of a worker to one
+writer thread, which writes whatever is pending in one transaction with
+the loader from `watersync.sensor.loaders`, every batch in its own
+savepoint; the requests wait for their share of the result. Nothing waits
+for a group to fill, so a lone request is written at once, and under load
+the batches arriving during a write are grouped into the next. Repeated
+readings are absorbed by the (deployment, timestamp) unique constraint and
+counted as duplicates, as are readings of days already compacted into
+chunks, which the constraint does not cover.
+
+Typical usage:
+
+    >>> rows = parse_ndjson(request.body)
+    >>> result = push_telemetry(rows, user=request.user)
+    >>> result.inserted, result.duplicates, result.rejected
+"""
+
+import io
+import logging
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+from django.db import close_old_connections, transaction
+
+import pandas as pd
+
+from watersync.sensor.ingest import drop_compacted
+from watersync.sensor.loaders import LoadResult, get_loader
+from watersync.sensor.models import Deployment
+from watersync.sensor.rollups import refresh_rollups
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_COLUMNS = ["sensor", "variable", "timestamp", "value"]
+
+# Largest batch accepted in one request
+MAX_ROWS = 100_000
+
+
+class TelemetryError(ValueError):
+    """Raised when a telemetry batch cannot be parsed."""
+
+
+@dataclass
+class TelemetryResult:
+    """Outcome of a telemetry batch.
+
+    Attributes:
+        inserted: Rows that were new and got inserted.
+        duplicates: Valid rows whose (deployment, timestamp) already existed.
+        rejected: Rows with an invalid timestamp or value, repeated within
+            the batch, or without an ongoing deployment.
+        unknown: "sensor/variable" pairs without an ongoing deployment.
+    """
+
+    inserted: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    unknown: list[str] = field(default_factory=list)
+
+    @property
+    def accepted(self) -> int:
+        return self.inserted + self.duplicates
+
+    def as_dict(self) -> dict:
+        return {
+            "accepted": self.accepted,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            "unknown": self.unknown,
+        }
+
+
+# ================ Parsing ========================
+
+
+def _check_columns(rows: pd.DataFrame) -> pd.DataFrame:
+    missing = [column for column in TELEMETRY_COLUMNS if column not in rows.columns]
+    if missing:
+        raise TelemetryError(f"Missing required column: {missing[0]}")
+    if len(rows) > MAX_ROWS:
+        raise TelemetryError(f"At most {MAX_ROWS} rows are accepted per batch.")
+    return rows[TELEMETRY_COLUMNS].astype(str)
+
+
+def parse_ndjson(data: bytes) -> pd.DataFrame:
+    """Parse NDJSON rows into a frame of string columns."""
+    if not data.strip():
+        return pd.DataFrame(columns=TELEMETRY_COLUMNS)
+    try:
+        rows = pd.read_json(
+            io.BytesIO(data), lines=True, dtype=False, convert_dates=False
+        )
+    except ValueError as e:
+        raise TelemetryError(f"Error parsing NDJSON: {e!s}") from e
+    return _check_columns(rows)
+
+
+def parse_csv(data: bytes) -> pd.DataFrame:
+    """Parse CSV rows with a header into a frame of string columns."""
+    if not data.strip():
+        return pd.DataFrame(columns=TELEMETRY_COLUMNS)
+    try:
+        rows = pd.read_csv(io.BytesIO(data), dtype=str)
+    except (ValueError, pd.errors.ParserError) as e:
+        raise TelemetryError(f"Error parsing CSV: {e!s}") from e
+    return _check_columns(rows)
+
+
+def clean_rows(rows: pd.DataFrame) -> tuple[pd.DataFrame, int]:
+    """Parse and validate the timestamps and values of telemetry rows.
+
+    Unlike uploaded files, telemetry timestamps are ISO 8601; timestamps
+    without an offset are taken as UTC. Rows with an unparseable timestamp
+    or value are dropped, as are repeated timestamps.
+
+    Returns:
+        Tuple of (clean chunk with `timestamp` and `value` columns, number
+        of rejected rows).
+    """
+    clean = pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(
+                rows["timestamp"], utc=True, format="ISO8601", errors="coerce"
+            ),
+            "value": pd.to_numeric(rows["value"], errors="coerce"),
+        }
+    ).dropna()
+    clean = clean.drop_duplicates(subset="timestamp", keep="first")
+    return clean, len(rows) - len(clean)
+
+
+# ================ Routing ========================
+
+
+def resolve_deployments(pairs, user=None) -> dict[tuple[str, str], int]:
+    """Map (sensor identifier, variable) pairs to their ongoing deployment.
+
+    Only sensors of `user` are considered when given. If a sensor has
+    several ongoing deployments of the variable, the latest started wins.
+    """
+    pairs = set(pairs)
+    deployments = Deployment.objects.filter(
+        sensor__identifier__in={sensor for sensor, _ in pairs},
+        variable__in={variable for _, variable in pairs},
+        ended_at__isnull=True,
+    )
+    if user is not None:
+        deployments = deployments.filter(sensor__user=user)
+    resolved = {}
+    rows = deployments.order_by("-started_at").values_list(
+        "sensor__identifier", "variable", "pk"
+    )
+    for sensor, variable, pk in rows:
+        if (sensor, variable) in pairs:
+            resolved.setdefault((sensor, variable), pk)
+    return resolved
+
+
+def route_rows(rows: pd.DataFrame, user=None):
+    """Split a batch into clean chunks per deployment.
+
+    Returns:
+        Tuple of (list of (deployment pk, clean chunk), TelemetryResult with
+        the rejected rows and unknown pairs).
+    """
+    result = TelemetryResult()
+    if rows.empty:
+        return [], result
+
+    groups = rows.groupby(["sensor", "variable"], sort=False)
+    resolved = resolve_deployments(groups.groups.keys(), user)
+
+    chunks = []
+    for (sensor, variable), group in groups:
+        pk = resolved.get((sensor, variable))
+        if pk is None:
+            result.unknown.append(f"{sensor}/{variable}")
+            result.rejected += len(group)
+            continue
+        chunk, rejected = clean_rows(group)
+        result.rejected += rejected
+        if not chunk.empty:
+            chunks.append((pk, chunk))
+    return chunks, result
+
+
+# ================ Group commit ========================
+
+
+class GroupCommitter:
+    """Write the batches of concurrent requests in shared transactions.
+
+    A writer thread owns the writes. It takes every batch that is pending
+    when it gets to them, up to `max_rows` rows, and writes them in one
+    transaction without waiting for more: batches that arrive while a group
+    is being written form the next group. Every batch is loaded in its own
+    savepoint, so a batch that fails fails alone.
+
+    Args:
+        max_rows: Rows after which a group is closed.
+        loader: Loader instance. Defaults to `get_loader()` per group.
+    """
+
+    def __init__(self, max_rows: int = 50_000, loader=None):
+        self.max_rows = max_rows
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._pending_batches = threading.Condition(self._lock)
+        self._pending = []
+        self._writer = None
+
+    def submit(self, chunks, user=None) -> LoadResult:
+        """Write the (deployment pk, clean chunk) pairs and wait for the result.
+
+        Raises:
+            Exception: Whatever failed the batch or the transaction of its group.
+        """
+        future = Future()
+        with self._lock:
+            self._pending.append((chunks, user, future))
+            # Threads do not survive a fork, so every worker starts its own
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(
+                    target=self._run, name="telemetry-writer", daemon=True
+                )
+                self._writer.start()
+            self._pending_batches.notify()
+        return future.result()
+
+    def _next_group(self) -> list:
+        with self._lock:
+            while not self._pending:
+                self._pending_batches.wait()
+            group, rows = [], 0
+            while self._pending and (not group or rows < self.max_rows):
+                batch = self._pending.pop(0)
+                group.append(batch)
+                rows += sum(len(chunk) for _, chunk in batch[0])
+            return group
+
+    def _run(self):
+        while True:
+            group = self._next_group()
+            close_old_connections()
+            try:
+                results = self._write(group)
+            except Exception as e:
+                logger.exception(
+                    "Group commit of %s telemetry batches failed", len(group)
+                )
+                results = [e] * len(group)
+            for (_, _, future), result in zip(group, results, strict=True):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _write(self, group) -> list[LoadResult | Exception]:
+        """Load the batches of the group in one transaction, each in a savepoint.
+
+        The rollups and derived series of the written ranges are refreshed
+        after the commit.
+
+        Returns:
+            LoadResult of every batch, or the exception that failed it.
+        """
+        loader = self.loader or get_loader()
+        results = []
+        ranges = {}
+        with transaction.atomic():
+            for chunks, user, _ in group:
+                result, written = LoadResult(), {}
+                try:
+                    with transaction.atomic():
+                        for pk, chunk in chunks:
+                            chunk, compacted = drop_compacted(pk, chunk)
+                            loaded = loader.load(pk, chunk, user=user)
+                            result += loaded + LoadResult(skipped=compacted)
+                            if loaded.inserted:
+                                written.setdefault(pk, []).append(chunk["timestamp"])
+                except Exception as e:
+                    logger.exception("Telemetry batch of %s failed", user)
+                    results.append(e)
+                    continue
+                results.append(result)
+                for pk, timestamps in written.items():
+                    ranges.setdefault(pk, []).extend(timestamps)
+
+        # Imported here, the derived module writes through the ingest module
+        from watersync.sensor.derived import invalidate
+
+        for pk, timestamps in ranges.items():
+            start = min(t.min() for t in timestamps).to_pydatetime()
+            end = max(t.max() for t in timestamps).to_pydatetime()
+            try:
+                refresh_rollups(pk, start, end)
+                invalidate(pk, start)
+            except Exception:
+                # The readings are stored; `refresh_sensor_rollups` catches up
+                logger.exception("Refreshing deployment %s after telemetry failed", pk)
+        return results
+
+
+committer = GroupCommitter()
+
+
+def push_telemetry(
+    rows: pd.DataFrame, user=None, committer: GroupCommitter = committer
+):
+    """Route, validate and write a parsed telemetry batch.
+
+    Args:
+        rows: Frame from `parse_ndjson` or `parse_csv`.
+        user: The user recorded as creator; only their sensors are fed.
+        committer: Group committer of the worker.
+
+    Returns:
+        TelemetryResult of the batch.
+    """
+    chunks, result = route_rows(rows, user)
+    if chunks:
+        loaded = committer.submit(chunks, user)
+        result.inserted, result.duplicates = loaded.inserted, loaded.skipped
+    return result
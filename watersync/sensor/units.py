@@ -0,0 +1,107 @@
+"""Vectorised unit conversion of sensor series.
+
+Records are stored in the unit of their deployment. Plots, statistics and
+exports can show them in another unit of the same dimension, e.g. kPa as
+cmH2O or degC as degF. Building a pint Quantity per value is slow, and
+even converting a whole array through pint repeats the unit lookup on
+every request. Instead the conversion between two units is reduced once
+to a scale and an offset,
+
+    target = source * scale + offset
+
+which is cached per (source unit, target unit) pair and applied to whole
+NumPy arrays. Any unit pint knows is accepted as target, not only the unit
+choices of the variable.
+
+Typical usage:
+
+    >>> values = convert(values, deployment.unit, "cmH2O")
+"""
+
+import functools
+import re
+
+from django.conf import settings
+
+import numpy as np
+from pint.errors import PintError
+
+# Unit names and simple products or quotients like "uS/cm" or "m3/s".
+# Requested units are checked against it before pint parses them.
+UNIT_PATTERN = re.compile(r"[^\W\d][\w/*^ .]{0,49}")
+
+
+class UnitConversionError(ValueError):
+    """Raised when values cannot be converted to the requested unit."""
+
+
+@functools.lru_cache(maxsize=256)
+def conversion(source: str, target: str) -> tuple[float, float]:
+    """Return the (scale, offset) converting values from `source` to `target`.
+
+    Raises:
+        UnitConversionError: If a unit is unknown, the dimensions differ or
+            the conversion is not linear (e.g. logarithmic units).
+    """
+    if source == target:
+        return 1.0, 0.0
+    if not UNIT_PATTERN.fullmatch(target):
+        raise UnitConversionError(f"Invalid unit: {target[:50]}")
+    try:
+        units = settings.UREG.parse_units(target)
+    except Exception as e:
+        # The expression parser of pint fails in assorted ways on malformed input
+        raise UnitConversionError(f"Invalid unit: {target}") from e
+    try:
+        converted = settings.UREG.Quantity(np.array([0.0, 1.0, 1000.0]), source).to(
+            units
+        )
+    except (PintError, ValueError) as e:
+        raise UnitConversionError(f"Cannot convert {source} to {target}: {e!s}") from e
+
+    offset, one, thousand = (float(value) for value in converted.magnitude)
+    scale = one - offset
+    if not np.isclose(thousand, offset + 1000 * scale, rtol=1e-9):
+        raise UnitConversionError(
+            f"Cannot convert {source} to {target}: not a linear conversion"
+        )
+    return scale, offset
+
+
+def convert(values, source: str, target: str | None) -> np.ndarray:
+    """Convert an array of values from `source` to `target`.
+
+    Returns the values as they are if `target` is None or `source`.
+    """
+    if target is None or target == source:
+        return values
+    scale, offset = conversion(source, target)
+    return np.asarray(values, dtype=np.float64) * scale + offset
+
+
+def convert_value(value: float | None, source: str, target: str | None) -> float | None:
+    """Convert a single value, keeping None."""
+    if value is None or target is None or target == source:
+        return value
+    scale, offset = conversion(source, target)
+    return value * scale + offset
+
+
+def convert_statistics(statistics: dict, source: str, target: str | None) -> dict:
+    """Convert min, max and avg of `array_statistics`-like statistics."""
+    if target is None or target == source:
+        return statistics
+    converted = {
+        **statistics,
+        **{
+            key: convert_value(statistics[key], source, target)
+            for key in ("min_value", "max_value", "avg_value")
+        },
+    }
+    # A negative scale swaps the extremes
+    if conversion(source, target)[0] < 0:
+        converted["min_value"], converted["max_value"] = (
+            converted["max_value"],
+            converted["min_value"],
+        )
+    return converted
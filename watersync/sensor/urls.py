@@ -20,18 +20,24 @@ from watersync.sensor.views import (
     deployment_decommission_view,
     deployment_delete_view,
     deployment_detail_view,
+    deployment_export_view,
     deployment_list_view,
+    deployment_matrix_view,
     deployment_overview_view,
     deployment_update_view,
+    deployment_water_level_view,
     sensor_create_view,
     sensor_delete_view,
     sensor_detail_view,
     sensor_list_view,
     sensor_update_view,
+    sensorimportjob_list_view,
     sensorrecord_create_view,
     sensorrecord_delete_view,
     sensorrecord_download_view,
     sensorrecord_list_view,
+    sensorrecord_plot_view,
+    sensorrecord_since_view,
     variable_units_api_view,
 )
 
@@ -53,8 +59,14 @@ api_urlpatterns = [
 deployment_urlpatterns = [
     path("", deployment_list_view, name="deployments"),
     path("add/", deployment_create_view, name="add-deployment"),
+    path("export/", deployment_export_view, name="export-deployments"),
+    path("matrix/", deployment_matrix_view, name="matrix-deployments"),
     path("<str:deployment_pk>/", deployment_detail_view, name="detail-deployment"),
-    path("<str:deployment_pk>/overview", deployment_overview_view, name="overview-deployment"),
+    path(
+        "<str:deployment_pk>/overview",
+        deployment_overview_view,
+        name="overview-deployment",
+    ),
     path(
         "<str:deployment_pk>/update/", deployment_update_view, name="update-deployment"
     ),
@@ -79,6 +91,11 @@ sensorrecord_urlpatterns = [
         sensorrecord_delete_view,
         name="delete-sensorrecord",
     ),
+    path("imports/", sensorimportjob_list_view, name="sensorimportjobs"),
+    path("download/", sensorrecord_download_view, name="download-sensorrecords"),
+    path("plot/", sensorrecord_plot_view, name="plot-sensorrecords"),
+    path("since/", sensorrecord_since_view, name="since-sensorrecords"),
+    path("water-level/", deployment_water_level_view, name="water-level"),
     path(
         "<int:sensorrecords_pk>/download/",
         sensorrecord_download_view,
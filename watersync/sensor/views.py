@@ -1,24 +1,35 @@
-import csv
+import hashlib
 import json
-from decimal import Decimal
+from urllib.parse import urlencode
 
+from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import JsonResponse
-from django.shortcuts import get_object_or_404, redirect
+from django.db import transaction
+from django.db.models import Q
+from django.http import (
+    HttpResponse,
+    HttpResponseBadRequest,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.views.generic import (
     DeleteView,
     FormView,
     ListView,
-    TemplateView,
     View,
 )
 
-import pandas as pd
+import numpy as np
 
 from watersync.core.config import get_sensor_unit_choices, get_variables_json
-from watersync.core.generics.mixins import FilterMixin
+from watersync.core.generics.cache import versioned_key
+from watersync.core.generics.mixins import FilterMixin, KeysetPaginationMixin
 from watersync.core.generics.views import (
     WatersyncCreateView,
     WatersyncDeleteView,
@@ -27,13 +38,49 @@ from watersync.core.generics.views import (
     WatersyncUpdateView,
 )
 from watersync.core.models import Project
+from watersync.sensor.chunks import compacted_until
+from watersync.sensor.compensation import (
+    CompensationError,
+    compensate_deployment,
+    pressure_detail,
+    water_level_output,
+    water_level_series,
+)
+from watersync.sensor.downsampling import DEFAULT_WIDTH
+from watersync.sensor.export import FORMATS as EXPORT_FORMATS
+from watersync.sensor.export import column_labels, export_matrix, export_records
 from watersync.sensor.filters import DeploymentFilter
 from watersync.sensor.forms_detail import DEPLOYMENT_TYPE_DETAIL_FORMS
-from watersync.sensor.models import Deployment, Sensor, SensorRecord
+from watersync.sensor.ingest import SensorFileError, resolve_columns
+from watersync.sensor.live import POLL_INTERVAL, records_since
+from watersync.sensor.matrix import aligned_matrix
+from watersync.sensor.models import (
+    Deployment,
+    Sensor,
+    SensorImportJob,
+    SensorRecord,
+)
 from watersync.sensor.models_detail import DEPLOYMENT_TYPE_DETAIL_RELATED_NAMES
+from watersync.sensor.overview import deployment_overview
+from watersync.sensor.qc import clean_series
+from watersync.sensor.rollups import CACHE_NAMESPACE, plot_series
+from watersync.sensor.units import (
+    UnitConversionError,
+    conversion,
+    convert,
+    convert_statistics,
+    convert_value,
+)
 
 from .forms import DeploymentForm, SensorForm, SensorRecordForm
-from .plotting import create_sensor_graph
+from .plotting import (
+    VALUE_DTYPES,
+    create_sensor_graph,
+    epoch_ms,
+    sensor_figure,
+    series_bytes,
+)
+from .tasks import import_sensor_file
 
 # ================ Variable/Unit API View ========================
 
@@ -91,15 +138,62 @@ sensor_list_view = SensorListView.as_view()
 # Placing the sensor records above deployments because they will be reused there
 
 
-class SensorRecordListView(LoginRequiredMixin, ListView):
+def parse_date_bounds(params):
+    """Return the date filter as aware (start, exclusive end) datetimes.
+
+    Whole days are selected, so the bounds fall on midnight and the
+    statistics can be read from the daily rollups.
+    """
+    bounds = []
+    for param, offset in (("date_start", 0), ("date_end", 1)):
+        try:
+            date = timezone.datetime.strptime(params.get(param, ""), "%Y-%m-%d")
+        except ValueError:
+            bounds.append(None)  # Missing or invalid dates are ignored
+            continue
+        bounds.append(timezone.make_aware(date + timezone.timedelta(days=offset)))
+    return tuple(bounds)
+
+
+def parse_width(params) -> int:
+    """Return the plot width in pixels, DEFAULT_WIDTH if missing or invalid."""
+    try:
+        return int(params.get("width", DEFAULT_WIDTH))
+    except ValueError:
+        return DEFAULT_WIDTH
+
+
+def parse_unit(params, deployment) -> str:
+    """Return the unit requested with `?unit=`, the deployment's by default.
+
+    Raises:
+        UnitConversionError: If the values cannot be converted to the unit.
+    """
+    unit = params.get("unit") or deployment.unit
+    conversion(deployment.unit, unit)
+    return unit
+
+
+# Parameters that select the plotted data; the record cursor does not
+PLOT_PARAMS = ("date_start", "date_end", "qc", "width", "unit")
+
+
+class SensorRecordListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = SensorRecord
     template_name = "sensor/partial/record_list.html"
     paginate_by = 100
 
+    def get_deployment(self):
+        """Return the deployment of the records, fetched once per request."""
+        if not hasattr(self, "deployment"):
+            self.deployment = get_object_or_404(
+                Deployment.objects.select_related("sensor", "location__project"),
+                pk=self.kwargs["deployment_pk"],
+            )
+        return self.deployment
+
     def get_queryset(self):
-        deployment_pk = self.kwargs.get("deployment_pk")
-        deployment = get_object_or_404(Deployment, pk=deployment_pk)
-        queryset = deployment.records.all()
+        queryset = self.get_deployment().records.all()
 
         # Filter by type
         sensor_type = self.request.GET.get("type")
@@ -107,52 +201,63 @@ class SensorRecordListView(LoginRequiredMixin, ListView):
             queryset = queryset.filter(type=sensor_type)
 
         # Filter by date range
-        date_start = self.request.GET.get("date_start")
-        date_end = self.request.GET.get("date_end")
+        date_start, date_end = self.get_date_bounds()
         if date_start:
-            try:
-                date_start = timezone.datetime.strptime(date_start, "%Y-%m-%d")
-                queryset = queryset.filter(timestamp__gte=date_start)
-            except ValueError:
-                pass  # Handle invalid date format or raise a validation error
-
+            queryset = queryset.filter(timestamp__gte=date_start)
         if date_end:
-            try:
-                date_end = timezone.datetime.strptime(date_end, "%Y-%m-%d")
-                date_end = timezone.make_aware(
-                    timezone.datetime.combine(date_end, timezone.datetime.max.time())
-                )
-                queryset = queryset.filter(timestamp__lte=date_end)
-            except ValueError:
-                pass  # Handle invalid date format or raise a validation error
+            queryset = queryset.filter(timestamp__lt=date_end)
+
+        # Ordered newest first by (timestamp, id) in KeysetPaginationMixin
+        return queryset
 
-        return queryset.order_by("-timestamp")
+    def get_date_bounds(self):
+        return parse_date_bounds(self.request.GET)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        deployment = get_object_or_404(Deployment, pk=self.kwargs["deployment_pk"])
-        records = self.get_queryset()
-        sensor_types = deployment.records.all()
-        data = [
-            {
-                "timestamp": record.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-                "value": float(record.value)
-                if isinstance(record.value, Decimal)
-                else record.value,
-                "type": record.type,
-                "unit": record.unit,
-            }
-            for record in records
-        ]
+        deployment = self.get_deployment()
+        date_start, date_end = self.get_date_bounds()
+
+        # Statistics and the plot series, downsampled to the width of the
+        # plot, are computed together and cached. The plot itself is fetched
+        # separately from SensorRecordPlotView, which hits the same entry.
+        overview = deployment_overview(
+            deployment.pk,
+            date_start,
+            date_end,
+            width=parse_width(self.request.GET),
+            exclude_flagged=self.request.GET.get("qc") == "exclude",
+        )
 
-        # Create graph using the extracted function
-        graph_json = create_sensor_graph(data, deployment)
+        try:
+            unit = parse_unit(self.request.GET, deployment)
+        except UnitConversionError as e:
+            unit = deployment.unit
+            context["unit_error"] = str(e)
 
-        # Add data to context
-        # context["sensor_types"] = sensor_types.values_list("type", flat=True)
-        context["graph_json"] = graph_json
-        context["sensor_record_list"] = json.dumps(data)  # JSON format for JavaScript
+        context["overview"] = overview
+        context["statistics"] = convert_statistics(
+            overview.statistics, deployment.unit, unit
+        )
+        context["latest_value"] = convert_value(
+            overview.latest_value, deployment.unit, unit
+        )
+        context["unit"] = unit
+        context["unit_choices"] = get_sensor_unit_choices(deployment.variable)
+        context["plot_query"] = urlencode(
+            {
+                param: self.request.GET[param]
+                for param in PLOT_PARAMS
+                if param in self.request.GET
+            }
+        )
+        context["follow"] = deployment.ended_at is None and date_end is None
+        context["poll_interval"] = POLL_INTERVAL
         context["deployment"] = deployment
+        # Compacted records are not rows, so the listing cannot show them
+        context["compacted_until"] = compacted_until(
+            deployment.pk, date_start, date_end
+        )
         return context
 
 
@@ -161,33 +266,48 @@ class SensorRecordCreateView(LoginRequiredMixin, FormView):
     form_class = SensorRecordForm
 
     def form_valid(self, form):
-        # Get the cleaned CSV data as a DataFrame
-        df = form.cleaned_data["csv_file"]
-
-        # Convert the 'timestamp' column to datetime with the correct format
-        df["timestamp"] = pd.to_datetime(df["timestamp"], dayfirst=True)
+        csv_file = form.cleaned_data["csv_file"]
+        file_format = form.cleaned_data["format"]
 
-        # Resolve the deployment based on the first row's location and sensor
-        deployment = get_object_or_404(
-            Deployment,
-            location__name=df.iloc[0]["location"],
-            sensor__identifier=df.iloc[0]["sensor"],
+        options = form.get_options()
+        if file_format == SensorImportJob.Formats.CSV:
+            # Resolve the deployments based on the first row's location and
+            # sensor, one per value column of multi-variable files
+            try:
+                columns = resolve_columns(csv_file)
+            except Deployment.DoesNotExist:
+                form.add_error(
+                    "csv_file",
+                    "No deployment matches the location and sensor of the file.",
+                )
+                return self.form_invalid(form)
+            except SensorFileError as e:
+                form.add_error("csv_file", str(e))
+                return self.form_invalid(form)
+            deployments = list(columns.values())
+            if list(columns) != ["value"]:
+                options["columns"] = {
+                    str(deployment.pk): column for column, deployment in columns.items()
+                }
+        else:
+            # Logger exports do not name the location, they go to this deployment
+            deployments = [
+                get_object_or_404(Deployment, pk=self.kwargs["deployment_pk"])
+            ]
+
+        # Keep the file in media storage and import it in the background
+        job = SensorImportJob.objects.create(
+            deployment=deployments[0],
+            file=csv_file,
+            format=file_format,
+            options=options,
+            created_by=self.request.user,
+        )
+        transaction.on_commit(lambda: import_sensor_file.delay(job.pk))
+        messages.info(
+            self.request,
+            f"Import of {csv_file.name} into {', '.join(map(str, deployments))} queued.",
         )
-
-        # Prepare SensorRecord instances
-        records = [
-            SensorRecord(
-                deployment=deployment,
-                timestamp=row["timestamp"],
-                value=row["value"],
-                unit=row["unit"],
-                type=row["type"],
-            )
-            for _, row in df.iterrows()
-        ]
-
-        # Bulk create SensorRecord instances
-        SensorRecord.objects.bulk_create(records, ignore_conflicts=True)
 
         return super().form_valid(form)
 
@@ -222,30 +342,44 @@ class SensorRecordDeleteView(LoginRequiredMixin, DeleteView):
         )
 
 
+def export_response(deployments, request, filename, **options):
+    """Stream the records of `deployments` in the format requested by `?format=`.
+
+    Extra `options` are passed on to `export_records`. With `?qc=exclude`
+    records flagged by quality control are left out, with `?unit=` the
+    values are converted to that unit.
+    """
+    export_format = request.GET.get("format", "csv")
+    if request.GET.get("qc") == "exclude":
+        options.setdefault("loader", clean_series)
+    options.setdefault("target_unit", request.GET.get("unit") or None)
+    date_start, date_end = parse_date_bounds(request.GET)
+    try:
+        content = export_records(
+            deployments, export_format, date_start, date_end, **options
+        )
+    except (ValueError, ImportError) as e:
+        return HttpResponseBadRequest(str(e))
+
+    response = StreamingHttpResponse(
+        content, content_type=EXPORT_FORMATS[export_format].content_type
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{filename}.{EXPORT_FORMATS[export_format].extension}"'
+    )
+    return response
+
+
 class SensorRecordDownloadView(LoginRequiredMixin, View):
     def get(self, request, *args, **kwargs):
         # Get the deployment based on the provided deployment_pk
-        deployment = get_object_or_404(Deployment, pk=kwargs["deployment_pk"])
-
-        # Create the HttpResponse object with the appropriate CSV header.
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = (
-            f'attachment; filename="{deployment.sensor.identifier}_timeseries.csv"'
+        deployment = get_object_or_404(
+            Deployment.objects.select_related("sensor"), pk=kwargs["deployment_pk"]
         )
-
-        writer = csv.writer(response)
-        writer.writerow(["timestamp", "value", "type", "unit"])
-
-        # Fetch the sensor records for the deployment
-        records = SensorRecord.objects.filter(deployment=deployment).order_by(
-            "timestamp"
+        return export_response(
+            [deployment], request, f"{deployment.sensor.identifier}_timeseries"
         )
 
-        for record in records:
-            writer.writerow([record.timestamp, record.value, record.type, record.unit])
-
-        return response
-
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         project_pk = self.kwargs.get("project_pk")
@@ -257,10 +391,282 @@ class SensorRecordDownloadView(LoginRequiredMixin, View):
         return context
 
 
+def _plot_etag(request, *args, **kwargs):
+    """ETag of the plot data, changes with the records of the deployment."""
+    key = versioned_key(
+        CACHE_NAMESPACE, kwargs["deployment_pk"], "plot", request.GET.urlencode()
+    )
+    return hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()
+
+
+class SensorRecordPlotView(LoginRequiredMixin, View):
+    """Plot data of a deployment, fetched by the record listing.
+
+    Answers with the figure as JSON with base64 typed arrays, or with
+    `?encoding=binary` the bare series as raw bytes, see
+    `watersync.sensor.plotting`; the number of points and the dtype are in
+    the X-Plot-Points and X-Plot-Dtype headers. `?dtype=f4` sends the values
+    as float32, `?unit=` converts them, see `watersync.sensor.units`. The
+    series comes from the cached overview, and the ETag
+    follows its cache version, so the browser revalidates its copy instead
+    of downloading it again until the records change.
+    """
+
+    @method_decorator(condition(etag_func=_plot_etag))
+    def get(self, request, *args, **kwargs):
+        deployment = get_object_or_404(
+            Deployment.objects.select_related("sensor"), pk=kwargs["deployment_pk"]
+        )
+        dtype = request.GET.get("dtype", "f8")
+        if dtype not in VALUE_DTYPES:
+            return HttpResponseBadRequest(f"Unsupported dtype: {dtype}")
+        try:
+            unit = parse_unit(request.GET, deployment)
+        except UnitConversionError as e:
+            return HttpResponseBadRequest(str(e))
+
+        date_start, date_end = parse_date_bounds(request.GET)
+        width = parse_width(request.GET)
+        overview = deployment_overview(
+            deployment.pk,
+            date_start,
+            date_end,
+            width=width,
+            exclude_flagged=request.GET.get("qc") == "exclude",
+        )
+        values = convert(overview.values, deployment.unit, unit)
+
+        if request.GET.get("encoding") == "binary":
+            response = HttpResponse(
+                series_bytes(overview.timestamps, values, dtype),
+                content_type="application/octet-stream",
+            )
+            response["X-Plot-Points"] = len(overview.timestamps)
+            response["X-Plot-Dtype"] = dtype
+            response["X-Plot-Unit"] = unit
+        else:
+            figure = sensor_figure(
+                overview.timestamps,
+                values,
+                deployment,
+                width=width,
+                unit=unit,
+                dtype=dtype,
+            )
+            # Live updates continue after the last plotted record
+            if len(overview.timestamps):
+                figure["last"] = int(epoch_ms(overview.timestamps)[-1])
+            else:
+                figure["last"] = (
+                    int(date_start.timestamp() * 1000) - 1 if date_start else 0
+                )
+            response = HttpResponse(json.dumps(figure), content_type="application/json")
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class SensorRecordSinceView(LoginRequiredMixin, View):
+    """Records of a deployment after `?after=<epoch ms>`, for polling plots.
+
+    Takes the `?unit=` of the plot. See `watersync.sensor.live` for the
+    websocket alternative.
+    """
+
+    def get(self, request, *args, **kwargs):
+        deployment = get_object_or_404(Deployment, pk=kwargs["deployment_pk"])
+        try:
+            after = int(request.GET.get("after", 0))
+        except ValueError:
+            return HttpResponseBadRequest("after must be epoch milliseconds")
+        try:
+            unit = parse_unit(request.GET, deployment)
+        except UnitConversionError as e:
+            return HttpResponseBadRequest(str(e))
+        return JsonResponse(
+            records_since(
+                deployment.pk,
+                after,
+                width=parse_width(request.GET),
+                units=(deployment.unit, unit),
+            )
+        )
+
+
+class DeploymentExportView(LoginRequiredMixin, View):
+    """Export several deployments of a project as one aligned wide table.
+
+    The deployments are selected with repeated `?deployment=<pk>` parameters.
+    """
+
+    def get(self, request, *args, **kwargs):
+        selected = [pk for pk in request.GET.getlist("deployment") if pk.isdigit()]
+        deployments = (
+            Deployment.objects.for_project(kwargs["project_pk"])
+            .filter(pk__in=selected)
+            .select_related("sensor")
+            .order_by("pk")
+        )
+        if not deployments:
+            return HttpResponseBadRequest("Select at least one deployment to export.")
+        return export_response(deployments, request, "deployments")
+
+
+class DeploymentMatrixView(LoginRequiredMixin, View):
+    """Several deployments of a project aggregated onto one time grid.
+
+    The deployments are selected with repeated `?deployment=<pk>`
+    parameters, the grid with `?interval=` (e.g. "15 minutes") and
+    `?agg=` (min, max, avg, sum or count). Returns the matrix as JSON
+    column arrays, or streams it like an export when `?format=` is given.
+    """
+
+    default_interval = "1 hour"
+
+    def get(self, request, *args, **kwargs):
+        selected = [pk for pk in request.GET.getlist("deployment") if pk.isdigit()]
+        deployments = list(
+            Deployment.objects.for_project(kwargs["project_pk"])
+            .filter(pk__in=selected)
+            .select_related("sensor")
+            .order_by("pk")
+        )
+        if not deployments:
+            return HttpResponseBadRequest("Select at least one deployment.")
+
+        date_start, date_end = parse_date_bounds(request.GET)
+        agg = request.GET.get("agg", "avg")
+        try:
+            matrix = aligned_matrix(
+                [deployment.pk for deployment in deployments],
+                request.GET.get("interval", self.default_interval),
+                agg,
+                date_start,
+                date_end,
+            )
+        except ValueError as e:
+            return HttpResponseBadRequest(str(e))
+
+        export_format = request.GET.get("format")
+        if export_format:
+            try:
+                content = export_matrix(matrix, deployments, export_format)
+            except (ValueError, ImportError) as e:
+                return HttpResponseBadRequest(str(e))
+            response = StreamingHttpResponse(
+                content, content_type=EXPORT_FORMATS[export_format].content_type
+            )
+            response["Content-Disposition"] = (
+                f'attachment; filename="matrix.{EXPORT_FORMATS[export_format].extension}"'
+            )
+            return response
+
+        labels = column_labels(deployments)
+        return JsonResponse(
+            {
+                "agg": agg,
+                "timestamp": matrix.timestamps.view(np.int64).tolist(),
+                "columns": {
+                    label: [
+                        None if np.isnan(value) else value
+                        for value in matrix.columns[d.pk].tolist()
+                    ]
+                    for label, d in zip(labels, deployments, strict=True)
+                },
+            }
+        )
+
+
+class DeploymentWaterLevelView(LoginRequiredMixin, View):
+    """Barometrically compensated water table elevation of a pressure deployment.
+
+    Renders the plot as a partial on the deployment page, or streams the
+    series like a record download when `?format=` is given. A materialised
+    water level series is read from its records and rollups.
+    """
+
+    template_name = "sensor/partial/water_level.html"
+
+    def get(self, request, *args, **kwargs):
+        deployment = get_object_or_404(
+            Deployment.objects.select_related(
+                "sensor", "pressure_sensor_detail__barometer"
+            ),
+            pk=kwargs["deployment_pk"],
+        )
+        try:
+            pressure_detail(deployment)
+        except CompensationError as e:
+            if "format" in request.GET:
+                return HttpResponseBadRequest(str(e))
+            return render(request, self.template_name, {"error": str(e)})
+
+        if "format" in request.GET:
+            return export_response(
+                [deployment],
+                request,
+                f"{deployment.sensor.identifier}_water_level",
+                loader=water_level_series,
+                unit="m",
+            )
+
+        date_start, date_end = parse_date_bounds(request.GET)
+        output_id = water_level_output(deployment.pk)
+        if output_id is not None:
+            timestamps, elevation = plot_series(output_id, date_start, date_end)
+        else:
+            series = compensate_deployment(deployment, date_start, date_end)
+            timestamps, elevation = series.timestamps, series.elevation
+        graph_json = create_sensor_graph(
+            timestamps,
+            elevation,
+            deployment,
+            label="Water table elevation",
+            unit="m",
+        )
+        return render(
+            request,
+            self.template_name,
+            {"deployment": deployment, "graph_json": graph_json},
+        )
+
+
+class SensorImportJobListView(LoginRequiredMixin, ListView):
+    """Recent import jobs of a deployment with their progress.
+
+    Rendered as a partial on the deployment page. The partial polls itself
+    while any of the listed jobs is still pending or running. Imports of
+    multi-variable files are listed under every deployment they feed.
+    """
+
+    model = SensorImportJob
+    template_name = "sensor/partial/import_jobs.html"
+    context_object_name = "import_jobs"
+
+    def get_queryset(self):
+        deployment_pk = self.kwargs["deployment_pk"]
+        return SensorImportJob.objects.filter(
+            Q(deployment_id=deployment_pk)
+            | Q(options__columns__has_key=str(deployment_pk))
+        )[:5]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["has_active_jobs"] = any(
+            job.is_active for job in context["import_jobs"]
+        )
+        return context
+
+
 sensorrecord_create_view = SensorRecordCreateView.as_view()
 sensorrecord_delete_view = SensorRecordDeleteView.as_view()
 sensorrecord_download_view = SensorRecordDownloadView.as_view()
+deployment_export_view = DeploymentExportView.as_view()
+deployment_matrix_view = DeploymentMatrixView.as_view()
+deployment_water_level_view = DeploymentWaterLevelView.as_view()
+sensorrecord_plot_view = SensorRecordPlotView.as_view()
+sensorrecord_since_view = SensorRecordSinceView.as_view()
 sensorrecord_list_view = SensorRecordListView.as_view()
+sensorimportjob_list_view = SensorImportJobListView.as_view()
 # ================ Deployment views ========================
 
 
@@ -345,28 +751,22 @@ class DeploymentDeleteView(WatersyncDeleteView):
     model = Deployment
 
 
-class DeploymentOverviewView(TemplateView):
+class DeploymentOverviewView(SensorRecordListView):
+    """Page of a deployment with its records, statistics and plot.
+
+    Renders the record listing into the full page layout; the deployment
+    is fetched once and the statistics and plot come from the cached
+    overview, see `watersync.sensor.overview`.
+    """
+
     template_name = "sensor/deployment_detail.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        deployment = get_object_or_404(
-            Deployment.objects.with_counts(),
-            pk=self.kwargs["deployment_pk"]
-        )
-
-        # Include additional context from SensorRecordListView
-        record_view = SensorRecordListView.as_view()(
-            self.request, deployment_pk=deployment.pk
-        ).context_data
-        context.update(record_view)
-
-        # Additional context
-        context["deployment"] = deployment
-        context["project"] = deployment.location.project
-
+        context["project"] = self.get_deployment().location.project
         return context
 
+
 deployment_create_view = DeploymentCreateView.as_view()
 deployment_delete_view = DeploymentDeleteView.as_view()
 deployment_detail_view = DeploymentDetailView.as_view()
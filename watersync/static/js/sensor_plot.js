@@ -0,0 +1,95 @@
+// Plots of sensor records, loaded from the plot endpoint and kept up to date
+// for ongoing deployments.
+
+// Decode a plotly.js typed array spec ({dtype, bdata}) into a typed array
+function decodeTypedArray(spec) {
+    if (!spec || spec.bdata === undefined) {
+        return spec;
+    }
+    const binary = atob(spec.bdata);
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+    }
+    return spec.dtype === 'f4' ? new Float32Array(bytes.buffer) : new Float64Array(bytes.buffer);
+}
+
+
+// Fetch the figure from data-url and plot it. If data-since-url is set, new
+// records are appended over the websocket at data-socket-url, or by polling
+// data-since-url when the websocket is not available.
+function loadSensorPlot(graph) {
+    fetch(graph.dataset.url, { credentials: 'same-origin' })
+        .then(response => response.json())
+        .then(figure => {
+            // Decoded up front so extendTraces can append to the arrays
+            figure.data.forEach(trace => {
+                trace.x = decodeTypedArray(trace.x);
+                trace.y = decodeTypedArray(trace.y);
+            });
+            Plotly.newPlot(graph, figure.data, figure.layout);
+            if (graph.dataset.sinceUrl) {
+                followSensorPlot(graph, figure.last);
+            }
+        });
+}
+
+
+// Query string asking for the records after `after`, in the unit of the plot
+function sinceQuery(graph, after) {
+    const params = new URLSearchParams({ after: after });
+    if (graph.dataset.unit) {
+        params.set('unit', graph.dataset.unit);
+    }
+    return '?' + params.toString();
+}
+
+
+function followSensorPlot(graph, after) {
+    const interval = Number(graph.dataset.interval || 30) * 1000;
+    let timer = null;
+
+    function append(update) {
+        if (update.x.length) {
+            Plotly.extendTraces(graph, { x: [update.x], y: [update.y] }, [0]);
+        }
+        after = update.last;
+    }
+
+    function poll() {
+        if (timer !== null) {
+            return;
+        }
+        timer = setInterval(() => {
+            // Stop once the graph was swapped out of the page
+            if (!document.body.contains(graph)) {
+                clearInterval(timer);
+                return;
+            }
+            fetch(graph.dataset.sinceUrl + sinceQuery(graph, after), { credentials: 'same-origin' })
+                .then(response => response.json())
+                .then(append);
+        }, interval);
+    }
+
+    if (!graph.dataset.socketUrl || !window.WebSocket) {
+        poll();
+        return;
+    }
+    const scheme = window.location.protocol === 'https:' ? 'wss://' : 'ws://';
+    const socket = new WebSocket(scheme + window.location.host + graph.dataset.socketUrl + sinceQuery(graph, after));
+    socket.onmessage = event => {
+        if (!document.body.contains(graph)) {
+            socket.close();
+            return;
+        }
+        append(JSON.parse(event.data));
+    };
+    socket.onclose = event => {
+        // 4403: refused, the deployment ended or the session expired
+        // 4400: the unit of the plot is invalid
+        if (event.code !== 4403 && event.code !== 4400 && document.body.contains(graph)) {
+            poll();
+        }
+    };
+}
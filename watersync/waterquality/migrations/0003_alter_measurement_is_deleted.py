@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("waterquality", "0002_measurement_created_at_measurement_created_by_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="measurement",
+            name="is_deleted",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -20,7 +20,7 @@ from watersync.core.config import (
 )
 from watersync.core.generics.managers import (
     LocationWithCountsManager,
-    SoftDeleteLocationScopedManager,
+    TimeSeriesManager,
 )
 from watersync.core.generics.models import SetupSimpleHistory, SoftDeleteMixin
 from watersync.waterquality.models_setup import Protocol
@@ -153,6 +153,12 @@ class Measurement(SoftDeleteMixin, models.Model):
     for unit conversions.
     """
 
+    # TimeSeriesManager configuration. Time series methods (date_range,
+    # statistics, resample, ...) use the fieldwork date of the sample; filter
+    # on a single parameter before aggregating values.
+    timestamp_field = "sample__fieldwork__date"
+    location_field = "sample__location"
+
     sample = models.ForeignKey(
         Sample, on_delete=models.CASCADE, related_name="measurements"
     )
@@ -187,7 +193,7 @@ class Measurement(SoftDeleteMixin, models.Model):
         related_name="measurements_created",
     )
 
-    objects = SoftDeleteLocationScopedManager()
+    objects = TimeSeriesManager()
 
     # Records are immutable - no update allowed
     _has_update = False